@@ -1,4 +1,6 @@
-from web_app import app
+from web_app import create_app
+
+app = create_app()
 print(">>> Fichier app.py exécuté depuis :", __file__)
 
 if __name__ == '__main__':
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Mesure les chemins critiques des modèles, de fonction et de ConnectedUser
+sur des jeux de données générés (`flask seed`) de plusieurs tailles.
+
+Les résultats sont écrits en JSON pour comparer les exécutions. Avec
+`--baseline`, le script échoue (code 1) si la médiane d'un benchmark dépasse
+celle de la référence de plus de `--threshold` (20 % par défaut).
+
+Usage :
+    python bench/bench_hot_paths.py --sizes small,medium --output bench.json
+    python bench/bench_hot_paths.py --sizes small --baseline bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from typing import Any, Callable
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+# La base de benchmark, vidée à chaque jeu de données, doit être choisie
+# avant l'import de l'application : BENCH_DATABASE_URL (PostgreSQL par
+# exemple) ou une base SQLite temporaire, jamais DATABASE_URL.
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_directory.name, 'bench.db')}")
+
+import openpyxl  # noqa: E402
+
+from web_app import app  # noqa: E402
+from web_app.cache import cache  # noqa: E402
+from web_app.connnected_user_web.connected_user import ConnectedUser  # noqa: E402
+from web_app.fonction import nb_cares_years_of_cow  # noqa: E402
+from web_app.models import init_db_test  # noqa: E402
+from web_app.models.cow import Cow, CowUtils  # noqa: E402
+from web_app.models.user import UserUtils  # noqa: E402
+from web_app.seed import SEED_PASSWORD, seed_farms  # noqa: E402
+
+# Taille des jeux de données : paramètres de seed_farms
+SIZES: dict[str, dict[str, int]] = {
+    "small": dict(cows=100, calves=10, years=3),
+    "medium": dict(cows=1000, calves=100, years=5),
+    "large": dict(cows=10000, calves=1000, years=10),
+}
+UNTIL = date(2025, 6, 30)
+IMPORT_ROWS = 200
+
+
+class BenchContext:
+    """Données partagées par les benchmarks d'un même jeu de données."""
+
+    def __init__(self, user_id: int, years: int) -> None:
+        self.user_id = user_id
+        self.user = ConnectedUser(user=UserUtils.get_user(user_id=user_id))
+        self.year = UNTIL.year - 1
+        self.first_year = UNTIL.year - years
+        self.next_import_id = 1_000_000
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": self.user.email,
+                                         "password": SEED_PASSWORD})
+
+    def import_file(self) -> io.BytesIO:
+        """Fichier Excel de nouvelles vaches, comme pour /upload_cows/."""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for cow_id in range(self.next_import_id, self.next_import_id + IMPORT_ROWS):
+            sheet.append([cow_id])  # type: ignore
+        self.next_import_id += IMPORT_ROWS
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        return file
+
+
+def bulk_import(ctx: BenchContext) -> None:
+    response = ctx.client.post("/upload_cows/",
+                               data={"file": (ctx.import_file(), "cows.xlsx")},
+                               content_type="multipart/form-data")
+    assert response.status_code == 200, response.data
+
+
+BENCHMARKS: dict[str, Callable[[BenchContext], Any]] = {
+    "get_care_on_year": lambda ctx: CowUtils.get_care_on_year(ctx.user_id, ctx.year),
+    "get_valid_reproduction": lambda ctx: CowUtils.get_valid_reproduction(ctx.user_id),
+    "get_calandar_list": lambda ctx: ctx.user.cow_utils.get_calandar_list(),
+    "update_pharmacie_year": lambda ctx: ctx.user.update_pharmacie_year(ctx.first_year + 1),
+    "pharmacie_to_csv": lambda ctx: ctx.user.pharmacie_to_csv(ctx.first_year + 1),
+    "remaining_care_to_excel": lambda ctx: ctx.user.remaining_care_to_excel(),
+    "nb_cares_years_of_cow": lambda ctx: [
+        nb_cares_years_of_cow(cow) for cow in Cow.query.filter_by(user_id=ctx.user_id)],
+    "reload_all_reproduction": lambda ctx: ctx.user.cow_utils.reload_all_reproduction(),
+    "history_pharmacie_page": lambda ctx: ctx.user.get_history_pharmacie_page(limit=50),
+    "history_pharmacie_full": lambda ctx: ctx.user.get_history_pharmacie(),
+    "bulk_import_cows": bulk_import,
+}
+
+
+def measure(function: Callable[[BenchContext], Any], ctx: BenchContext,
+            repeat: int) -> dict[str, float]:
+    """Exécute le benchmark une fois à blanc puis `repeat` fois. Le cache
+    applicatif est vidé avant chaque mesure pour mesurer le calcul lui-même."""
+    timings: list[float] = []
+    for run in range(repeat + 1):
+        cache.clear()
+        started = time.perf_counter()
+        function(ctx)
+        elapsed = (time.perf_counter() - started) * 1000
+        if run:
+            timings.append(elapsed)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": repeat,
+    }
+
+
+def run(sizes: list[str], repeat: int, only: list[str] | None) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with app.app_context():
+        for size in sizes:
+            init_db_test()
+            started = time.perf_counter()
+            user_id = seed_farms(until=UNTIL, **SIZES[size])[0]
+            print(f"{size}: dataset seeded in {time.perf_counter() - started:.1f}s",
+                  file=sys.stderr)
+            ctx = BenchContext(user_id, SIZES[size]["years"])
+            for name, function in BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                results[f"{size}/{name}"] = measure(function, ctx, repeat)
+                print(f"{size}/{name}: {results[f'{size}/{name}']['median_ms']} ms",
+                      file=sys.stderr)
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any],
+            threshold: float) -> list[str]:
+    """Renvoie les benchmarks dont la médiane dépasse la référence de plus
+    de `threshold` (fraction)."""
+    regressions = []
+    for name, result in results.items():
+        if (reference := baseline.get(name)) is None:
+            continue
+        ratio = result["median_ms"] / max(reference["median_ms"], 1e-6)
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{status:>10} {name}: {reference['median_ms']} -> "
+              f"{result['median_ms']} ms ({ratio:.2f}x)", file=sys.stderr)
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def metadata() -> dict[str, str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0],
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small",
+                        help=f"Tailles séparées par des virgules : {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Benchmarks à exécuter, séparés par des virgules")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Ralentissement toléré par rapport à la référence")
+    args = parser.parse_args()
+
+    results = run(args.sizes.split(","), args.repeat,
+                  args.only.split(",") if args.only else None)
+    report = {"meta": metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare la sérialisation JSON des réponses volumineuses : chemin
+historique (schéma marshmallow puis fournisseur JSON par défaut de Flask)
+contre `FarmJSONProvider`, avec le module json et, s'il est installé, orjson.
+
+Usage :
+    python bench/bench_json.py --cows 2000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from typing import Any, Callable
+from unittest import mock
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+# Base temporaire, remplie par seed_farms, choisie avant l'import de
+# l'application (jamais DATABASE_URL)
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_directory.name, 'bench.db')}")
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from web_app import app, json_provider  # noqa: E402
+from web_app.models import init_db_test  # noqa: E402
+from web_app.models.cow import CowSchema, CowUtils  # noqa: E402
+from web_app.models.prescription import PrescriptionUtils  # noqa: E402
+from web_app.seed import seed_farms  # noqa: E402
+
+
+def payloads(user_id: int) -> dict[str, tuple[Callable[[], Any], Callable[[], Any]]]:
+    """Données de chaque endpoint : (chemin historique, nouveau chemin)."""
+    cows = CowUtils.get_all_cows(user_id)
+    reproductions = CowUtils.get_valid_reproduction(user_id)
+    prescriptions = PrescriptionUtils.get_all_prescriptions_cares(user_id)
+    schema = CowSchema()
+    return {
+        "herd_list": (lambda: [schema.dump(cow) for cow in cows], lambda: cows),
+        "all_reproductions": (lambda: {"success": True, "message": reproductions},) * 2,
+        "prescriptions": (lambda: {"success": True, "message": prescriptions},) * 2,
+    }
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cows", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    default = DefaultJSONProvider(app)
+    farm = app.json
+    with app.app_context(), app.test_request_context():
+        init_db_test()
+        user_id = seed_farms(cows=args.cows, calves=args.cows // 10, years=args.years,
+                             until=date(2025, 6, 30))[0]
+        for name, (legacy, current) in payloads(user_id).items():
+            results = {"default": measure(lambda: default.response(legacy()), args.repeat)}
+            with mock.patch.object(json_provider, "orjson", None):
+                results["farm/json"] = measure(lambda: farm.response(current()), args.repeat)
+            if json_provider.orjson:
+                results["farm/orjson"] = measure(lambda: farm.response(current()), args.repeat)
+            size = len(farm.response(current()).data)
+            print(f"{name} ({size / 1024:.0f} KiB): " + ", ".join(
+                f"{backend} {ms:.2f} ms ({results['default'] / ms:.1f}x)"
+                for backend, ms in results.items()))
+
+
+if __name__ == "__main__":
+    main()
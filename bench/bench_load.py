@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Test de charge HTTP : rejoue des sessions d'éleveurs réalistes avec une
+concurrence configurable et mesure débit, latences et taux d'erreur par étape.
+
+Chaque utilisateur virtuel enchaîne : connexion, page du troupeau, liste du
+troupeau, fiche d'une vache, ajout d'un traitement, pharmacie, stock et export
+du calendrier.
+
+Cibles :
+    --target client : client de test Flask, dans le processus
+    --target server : serveur werkzeug local démarré par le script
+    --url URL       : serveur déjà lancé (gunicorn...), dont la base contient
+                      les fermes `flask seed` (farm<n>@seed.local / seed)
+
+Pour les deux premières cibles, les fermes sont générées dans
+BENCH_DATABASE_URL (PostgreSQL par exemple) ou dans une base SQLite
+temporaire.
+
+Usage :
+    python bench/bench_load.py --target server --concurrency 8 --duration 30
+    python bench/bench_load.py --url http://127.0.0.1:8000 --concurrency 16
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Callable
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_directory.name, 'load.db')}")
+
+# Une étape : (nom, méthode, chemin, données du formulaire)
+Step = tuple[str, str, str, dict[str, Any] | None]
+
+# Les vues JSON signalent leurs erreurs par {"success": false} avec un code 200
+_JSON_FAILURE = re.compile(rb'"success":\s*false')
+
+
+class TestClientTransport:
+    """Envoie les requêtes au client de test Flask (sans réseau)."""
+
+    def __init__(self, app: Any) -> None:
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, data: dict[str, Any] | None) -> tuple[int, bytes]:
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.data
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+class HTTPTransport:
+    """Envoie les requêtes à un serveur HTTP, avec un cookie de session par
+    utilisateur virtuel. Les redirections ne sont pas suivies."""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect())
+
+    def request(self, method: str, path: str, data: dict[str, Any] | None) -> tuple[int, bytes]:
+        body = urllib.parse.urlencode(data, doseq=True).encode() if data else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def session_script(farm: int, cows: int, medics: list[str],
+                   rng: random.Random) -> list[Step]:
+    """Session type d'un éleveur sur sa ferme."""
+    cow_id = rng.randint(1, cows)
+    care_day = date.today() - timedelta(days=rng.randint(0, 300))
+    steps: list[Step] = [
+        ("login", "POST", "/login",
+         {"email": f"farm{farm}@seed.local", "password": "seed"}),
+        ("herd_page", "GET", "/herd", None),
+        ("herd_list", "GET", "/herd/list", None),
+        ("cow_page", "GET", f"/cow/{cow_id}", None),
+    ]
+    if medics:  # pas de traitement possible sans stock
+        steps.append(("add_care", "POST", "/cow/add_care",
+                      {"cow_id": cow_id, "date": care_day.isoformat(),
+                       "medication": [rng.choice(medics)],
+                       "dose": [rng.randint(1, 2)], "note": "load test"}))
+    return steps + [
+        ("pharmacy_page", "GET", "/medicine_cabinet", None),
+        ("pharmacy_stock", "GET", "/pharmacy/get-stock", None),
+        ("calendar_export", "GET", "/reproduction/calandar/export-calendar", None),
+    ]
+
+
+def farm_medics(transport: Any, farm: int) -> list[str]:
+    """Renvoie les médicaments en stock de la ferme, pour que les traitements
+    ajoutés pendant le test soient acceptés (requêtes non mesurées)."""
+    transport.request("POST", "/login", {"email": f"farm{farm}@seed.local",
+                                         "password": "seed"})
+    _, body = transport.request("GET", "/pharmacy/get-stock", None)
+    try:
+        stock: dict[str, int] = json.loads(body)["message"]
+        return sorted(medic for medic, quantity in stock.items() if quantity > 0)
+    except (ValueError, KeyError, AttributeError):
+        return []
+
+
+def virtual_user(index: int, transport: Any, args: argparse.Namespace,
+                 deadline: float, results: dict[str, list[tuple[float, bool]]],
+                 failures: dict[str, str], lock: threading.Lock) -> None:
+    rng = random.Random(index)
+    farm = args.first_farm + index % args.farms
+    medics = farm_medics(transport, farm)
+    iteration = 0
+    while time.monotonic() < deadline and (not args.iterations or iteration < args.iterations):
+        for name, method, path, data in session_script(farm, args.cows, medics, rng):
+            started = time.perf_counter()
+            try:
+                status, body = transport.request(method, path, data)
+                ok = status < 400 and not _JSON_FAILURE.search(body[:200])
+                detail = f"{status} {body[:200].decode(errors='replace')}"
+            except OSError as e:
+                ok, detail = False, repr(e)
+            elapsed = time.perf_counter() - started
+            with lock:
+                results[name].append((elapsed, ok))
+                if not ok:
+                    failures.setdefault(name, detail)
+        iteration += 1
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(results: dict[str, list[tuple[float, bool]]], elapsed: float) -> dict[str, Any]:
+    steps = {}
+    for name, samples in results.items():
+        latencies = [s[0] * 1000 for s in samples]
+        errors = sum(not s[1] for s in samples)
+        steps[name] = {
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+        }
+    total = sum(len(s) for s in results.values())
+    return {
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "sessions_per_second": round(len(results.get("login", [])) / elapsed, 2),
+        "steps": steps,
+    }
+
+
+def print_table(result: dict[str, Any]) -> None:
+    print(f"{'step':<16}{'req':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}",
+          file=sys.stderr)
+    for name, step in result["steps"].items():
+        print(f"{name:<16}{step['requests']:>7}{step['error_rate'] * 100:>7.1f}"
+              f"{step['throughput_rps']:>8.1f}{step['p50_ms']:>9.1f}"
+              f"{step['p95_ms']:>9.1f}{step['p99_ms']:>9.1f}", file=sys.stderr)
+    print(f"total: {result['requests']} requests, {result['throughput_rps']} req/s, "
+          f"{result['sessions_per_second']} sessions/s", file=sys.stderr)
+
+
+def prepare_app(args: argparse.Namespace) -> Any:
+    """Génère les fermes dans la base de test et renvoie l'application."""
+    from web_app import app
+    from web_app.models import init_db_test
+    from web_app.seed import seed_farms
+
+    app.config.update(PERF_LOG_FILE=None, PROFILE_ENABLED=False)
+    with app.app_context():
+        init_db_test()
+        user_ids = seed_farms(farms=args.farms, cows=args.cows, calves=args.cows // 10,
+                              years=args.years, seed=args.seed)
+    args.first_farm = user_ids[0]
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("client", "server"), default="server")
+    parser.add_argument("--url", help="Serveur existant à tester")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20,
+                        help="Durée du test en secondes")
+    parser.add_argument("--iterations", type=int, default=0,
+                        help="Sessions par utilisateur virtuel (0 : illimité)")
+    parser.add_argument("--farms", type=int, default=0,
+                        help="Nombre de fermes (par défaut : une par utilisateur virtuel)")
+    parser.add_argument("--first-farm", type=int, default=1,
+                        help="Numéro de la première ferme (avec --url)")
+    parser.add_argument("--cows", type=int, default=200, help="Vaches par ferme")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    args = parser.parse_args()
+    args.farms = args.farms or args.concurrency
+
+    server = None
+    make_transport: Callable[[], Any]
+    if args.url:
+        make_transport = lambda: HTTPTransport(args.url)  # noqa: E731
+    else:
+        app = prepare_app(args)
+        if args.target == "client":
+            make_transport = lambda: TestClientTransport(app)  # noqa: E731
+        else:
+            from werkzeug.serving import make_server
+            server = make_server("127.0.0.1", 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_port}"
+            make_transport = lambda: HTTPTransport(url)  # noqa: E731
+
+    results: dict[str, list[tuple[float, bool]]] = defaultdict(list)
+    failures: dict[str, str] = {}
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=virtual_user,
+                                args=(i, make_transport(), args, deadline, results,
+                                      failures, lock))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    if server:
+        server.shutdown()
+
+    result = report(results, elapsed)
+    result["first_failures"] = failures
+    result["config"] = {"target": args.url or args.target,
+                        "concurrency": args.concurrency,
+                        "farms": args.farms, "cows": args.cows,
+                        "database": os.environ["DATABASE_URL"].split(":")[0]
+                        if not args.url else "remote"}
+    print_table(result)
+    for name, detail in failures.items():
+        print(f"first {name} failure: {detail}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
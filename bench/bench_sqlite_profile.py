@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare le débit d'écriture concurrente sur SQLite avec les réglages par
+défaut et avec le profil de production (WAL, pragmas, relance sur verrou).
+
+Chaque worker est un processus distinct qui enchaîne des transactions de
+lecture-modification-écriture sur une liste JSON, comme le font les
+fonctions d'ajout de traitement de CowUtils.
+
+Usage :
+    python bench/bench_sqlite_profile.py --workers 4 --transactions 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from web_app.storage import DEFAULT_SQLITE_PRAGMAS, apply_sqlite_profile, is_lock_error
+
+PROFILES = ("default", "production")
+
+
+def make_engine(path: str, profile: str):
+    if profile == "default":
+        # réglages actuels : journal "delete", synchronous=FULL, pas de relance
+        return create_engine(f"sqlite:///{path}")
+    engine = create_engine(f"sqlite:///{path}")
+    apply_sqlite_profile(engine, DEFAULT_SQLITE_PRAGMAS, busy_timeout_ms=5000)
+    return engine
+
+
+def worker(args: tuple[str, str, int, int]) -> tuple[int, int]:
+    path, profile, worker_id, transactions = args
+    engine = make_engine(path, profile)
+    retries = 5 if profile == "production" else 0
+    committed = errors = 0
+    for i in range(transactions):
+        for attempt in range(retries + 1):
+            try:
+                with engine.begin() as connection:
+                    row = connection.execute(
+                        text("SELECT cares FROM cow WHERE id = :id"),
+                        {"id": i % 16}).one()
+                    cares = json.loads(row[0])
+                    cares.append({"worker": worker_id, "n": i})
+                    connection.execute(
+                        text("UPDATE cow SET cares = :cares WHERE id = :id"),
+                        {"cares": json.dumps(cares[-50:]), "id": i % 16})
+                    connection.execute(
+                        text("INSERT INTO event (payload) VALUES (:payload)"),
+                        {"payload": json.dumps({"worker": worker_id, "n": i})})
+                committed += 1
+                break
+            except OperationalError as e:
+                if not is_lock_error(e) or attempt == retries:
+                    errors += 1
+                    break
+                time.sleep(0.005 * 2 ** attempt)
+    engine.dispose()
+    return committed, errors
+
+
+def run(profile: str, workers: int, transactions: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = make_engine(path, profile)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE cow (id INTEGER PRIMARY KEY, cares JSON NOT NULL)"))
+            connection.execute(text(
+                "CREATE TABLE event (id INTEGER PRIMARY KEY, payload JSON)"))
+            for cow_id in range(16):
+                connection.execute(text("INSERT INTO cow VALUES (:id, '[]')"),
+                                   {"id": cow_id})
+        engine.dispose()
+
+        started = time.perf_counter()
+        with Pool(workers) as pool:
+            results = pool.map(worker, [(path, profile, w, transactions)
+                                        for w in range(workers)])
+        elapsed = time.perf_counter() - started
+
+    committed = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return {
+        "committed": committed,
+        "lock_errors": errors,
+        "seconds": round(elapsed, 3),
+        "commits_per_second": round(committed / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--transactions", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {profile: run(profile, args.workers, args.transactions)
+               for profile in PROFILES}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Configuration gunicorn de production, lue depuis `config.config`
+(variables d'environnement WEB_CONCURRENCY, WSGI_THREADS, WSGI_BIND...).
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import os
+import shutil
+import tempfile
+
+# Le cache "memory" est propre à chaque processus : les workers partagent
+# par défaut un cache SQLite (CACHE_TYPE=redis pour plusieurs machines)
+os.environ.setdefault("CACHE_TYPE", "sqlite")
+# Chaque worker rotatif renommerait le fichier de son côté : la rotation est
+# laissée par défaut à logrotate (fichier surveillé)
+os.environ.setdefault("LOG_ROTATION", "watched")
+# Instantanés des métriques des workers, agrégés par /metrics : un répertoire
+# propre à ce maître, supprimé à l'arrêt
+_default_metrics_dir = os.path.join(tempfile.gettempdir(), f"biofarm-metrics-{os.getpid()}")
+_metrics_dir = os.environ.setdefault("METRICS_DIR", _default_metrics_dir)
+os.makedirs(_metrics_dir, exist_ok=True)
+
+from config import config as _app_config  # noqa: E402
+
+bind = _app_config.WSGI_BIND
+workers = _app_config.WSGI_WORKERS
+threads = _app_config.WSGI_THREADS
+worker_class = "gthread" if _app_config.WSGI_THREADS > 1 else "sync"
+
+# Application chargée dans le maître avant le fork : les modules et les
+# données en lecture seule sont partagés entre workers (copie sur écriture)
+preload_app = True
+
+# Recyclage progressif des workers, décalé par le jitter pour ne pas les
+# redémarrer tous en même temps
+max_requests = _app_config.WSGI_MAX_REQUESTS
+max_requests_jitter = _app_config.WSGI_MAX_REQUESTS_JITTER
+timeout = _app_config.WSGI_TIMEOUT
+graceful_timeout = _app_config.WSGI_GRACEFUL_TIMEOUT
+
+
+def on_starting(server):
+    # versions de données et valeurs mémorisées doivent être communes aux
+    # workers, sinon une écriture n'invalide que le cache du worker qui l'a
+    # traitée et les autres servent des 304 et des calculs périmés
+    if _app_config.CACHE_TYPE == "memory" and server.cfg.workers > 1:
+        raise RuntimeError("CACHE_TYPE=memory n'est pas partagé entre workers : "
+                           "utiliser sqlite ou redis, ou un seul worker")
+    if _app_config.LOG_ROTATION in ("size", "time") and server.cfg.workers > 1:
+        raise RuntimeError(f"LOG_ROTATION={_app_config.LOG_ROTATION} fait tourner le "
+                           "journal dans chaque worker : utiliser watched et logrotate, "
+                           "ou un seul worker")
+
+
+def on_exit(server):
+    if _metrics_dir == _default_metrics_dir:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
+
+
+def post_fork(server, worker):
+    from web_app.server import reset_after_fork
+    from wsgi import application
+    reset_after_fork(application)
+
+
+def worker_exit(server, worker):
+    from web_app.server import flush_before_exit
+    from wsgi import application
+    flush_before_exit(application)
@@ -0,0 +1,21 @@
+"""Configuration commune des tests lancés avec pytest.
+
+Base de données, journaux et cache sont écrits dans un répertoire temporaire
+plutôt qu'à la racine du dépôt. Les variables sont fixées avant le premier
+import de `config`, et héritées par les sous-processus (serveur, sondes
+d'import) ; une valeur déjà présente, comme DATABASE_URL pour PostgreSQL,
+est conservée.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+_directory = tempfile.mkdtemp(prefix="biofarm-tests-")
+atexit.register(shutil.rmtree, _directory, ignore_errors=True)
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_directory, "app.db"))
+os.environ.setdefault("LOG_FILE", os.path.join(_directory, "app.log"))
+os.environ.setdefault("PERF_LOG_FILE", os.path.join(_directory, "perf.log"))
+os.environ.setdefault("CACHE_URL", os.path.join(_directory, "cache.db"))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_directory, "profiles"))
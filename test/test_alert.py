@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import importlib.util
+import unittest
+import warnings
+
+from datetime import date, datetime
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.digest import format_digest, send_stock_digest
+from web_app.models import init_db_test
+from web_app.models.alert import AlertUtils, StockAlert
+from web_app.models.cow import CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.type_dict import Traitement
+from web_app.models.user import UserUtils
+
+
+class StockAlertTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com", password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        self.today = date.today()
+        PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+            self.user_id, self.today.year, remaining_stock={"0": 10, "1": 10},
+            total_enter={}, total_used={}, total_used_calf={}, total_out_dlc={}, total_out={}))
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        self.user = ConnectedUser(UserUtils.get_user(self.user_id))
+        self.user.set_reorder_threshold("doliprane", 4)
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def treat(self, **medicaments: int) -> None:
+        self.user.cow_utils.add_cow_care(1, Traitement(
+            date_traitement=self.today.isoformat(), medicaments=medicaments,
+            annotation="", id=0))
+
+    def alerts(self) -> list[tuple[str, int]]:
+        return [(alert["medicament"], alert["stock"]) for alert in self.user.get_stock_alerts()]
+
+    def test_crossing_opens_then_resolves_the_alert(self):
+        self.treat(doliprane=5)
+        self.assertEqual([], self.alerts())
+        self.treat(doliprane=1)
+        self.assertEqual([("doliprane", 4)], self.alerts())
+        self.treat(doliprane=2)
+        self.assertEqual([("doliprane", 2)], self.alerts())
+        self.assertEqual(1, StockAlert.query.count())
+
+        self.user.prescription_utils.add_prescription(self.today, {"doliprane": 10})
+        self.assertEqual([], self.alerts())
+        self.treat(doliprane=10)
+        self.assertEqual([("doliprane", 2)], self.alerts())
+        self.assertEqual(2, StockAlert.query.count())
+
+    def test_untracked_medicines_are_not_checked(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "stock_alert" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.treat(spasfon=9)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual([], statements)
+        self.assertEqual([], self.alerts())
+
+    def test_threshold_change_checks_the_current_stock(self):
+        self.user.set_reorder_threshold("spasfon", 10)
+        self.assertEqual([("spasfon", 10)], self.alerts())
+        self.user.set_reorder_threshold("spasfon", None)
+        self.assertEqual([], self.alerts())
+        with self.assertRaises(ValueError):
+            self.user.set_reorder_threshold("spasfon", -1)
+
+    def test_one_open_alert_per_medicine(self):
+        self.treat(doliprane=7)
+        db.session.add(StockAlert(user_id=self.user_id, medicine_id=0, stock=3, threshold=4))
+        with self.assertRaises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_concurrent_alert_insert_is_retried(self):
+        opened = []
+
+        def open_concurrently(session, flush_context, instances):
+            # l'alerte apparaît entre la lecture des alertes ouvertes et
+            # l'insertion, comme l'écrirait un autre worker sur PostgreSQL
+            if not opened and any(isinstance(new, StockAlert) for new in session.new):
+                opened.append(1)
+                session.connection().execute(insert(StockAlert).values(
+                    user_id=self.user_id, medicine_id=0, stock=4, threshold=4,
+                    raised_at=datetime.now()))
+
+        event.listen(db.session, "before_flush", open_concurrently)
+        try:
+            with self.assertLogs(level="WARNING") as logs:
+                self.treat(doliprane=7)
+        finally:
+            event.remove(db.session, "before_flush", open_concurrently)
+        self.assertIn("concurrent update, retry 1/", "\n".join(logs.output))
+        self.assertEqual([("doliprane", 3)], self.alerts())
+        self.assertEqual(1, StockAlert.query.count())
+
+    def test_alerts_endpoint(self):
+        self.treat(doliprane=7)
+        client = app.test_client()
+        client.post("/login", data={"email": "user@mail.com", "password": "pwd"})
+        result = client.get("/pharmacy/get-alerts").get_json()
+        self.assertTrue(result["success"], result)
+        self.assertEqual([{"medicament": "doliprane", "unit": "ml", "stock": 3, "threshold": 4,
+                           "raised_at": self.today.isoformat()}], result["message"])
+
+    def test_digest(self):
+        self.treat(doliprane=7)
+        alerts = AlertUtils.get_unnotified_alerts()
+        self.assertIn("- doliprane : 3 ml en stock (seuil 4)", format_digest(self.user_id, alerts))
+
+    @unittest.skipIf(importlib.util.find_spec("flask_mail"), "Flask-Mail est installé")
+    def test_digest_without_flask_mail(self):
+        self.treat(doliprane=7)
+        self.assertEqual(0, send_stock_digest(app))
+        self.assertEqual(1, len(AlertUtils.get_unnotified_alerts()))
+
+
+if __name__ == "__main__":
+    unittest.main()
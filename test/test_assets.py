@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import tempfile
+import unittest
+
+from flask import Flask, render_template_string, url_for
+
+from web_app.assets import AssetManifest, init_assets
+
+
+def make_app(static: str, debug: bool = False) -> Flask:
+    app = Flask(__name__, static_folder=static, static_url_path="/static")
+    app.debug = debug
+    init_assets(app)
+    return app
+
+
+def write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+class AssetTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.static = self.directory.name
+        write(os.path.join(self.static, "js", "herd.js"), "console.log('herd');")
+        write(os.path.join(self.static, "css", "main.css"), "body { color: green; }")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_manifest(self):
+        manifest = AssetManifest(self.static).build()
+        self.assertEqual(sorted(manifest), ["css/main.css", "js/herd.js"])
+        self.assertEqual(len(manifest["js/herd.js"]), 12)
+
+    def test_url_carries_content_hash(self):
+        app = make_app(self.static)
+        with app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename='js/herd.js') }}")
+            digest = app.extensions["assets"].get("js/herd.js")
+            self.assertEqual(url, f"/static/js/herd.js?v={digest}")
+            # fichier inconnu : URL inchangée
+            self.assertEqual(url_for("static", filename="js/missing.js"),
+                             "/static/js/missing.js")
+
+    def test_versioned_url_is_immutable(self):
+        app = make_app(self.static)
+        with app.test_request_context():
+            url = url_for("static", filename="css/main.css")
+        response = app.test_client().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+        self.assertNotIn("no-cache", response.headers["Cache-Control"])
+
+    def test_unversioned_or_stale_url_is_revalidated(self):
+        client = make_app(self.static).test_client()
+        for url in ("/static/css/main.css", "/static/css/main.css?v=0123456789ab"):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertFalse(response.cache_control.immutable)
+                self.assertIn("no-cache", response.headers["Cache-Control"])
+
+    def test_changed_file_changes_url_in_debug(self):
+        app = make_app(self.static, debug=True)
+        with app.test_request_context():
+            before = url_for("static", filename="js/herd.js")
+            write(os.path.join(self.static, "js", "herd.js"), "console.log('troupeau');")
+            after = url_for("static", filename="js/herd.js")
+        self.assertNotEqual(before, after)
+
+    def test_disabled(self):
+        app = Flask(__name__, static_folder=self.static, static_url_path="/static")
+        app.config["ASSETS_FINGERPRINT"] = False
+        init_assets(app)
+        with app.test_request_context():
+            self.assertEqual(url_for("static", filename="js/herd.js"), "/static/js/herd.js")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+
+from web_app.cache import Cache, MemoryCache, RedisCache, SQLiteCache
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Serveur Redis de substitution : implémente les seules commandes
+    utilisées par RedisCache, sur un dictionnaire partagé."""
+
+    def read_command(self) -> list[bytes] | None:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:-2])):
+            size = int(self.rfile.readline()[1:-2])
+            parts.append(self.rfile.read(size + 2)[:-2])
+        return parts
+
+    def handle(self):
+        store: dict[bytes, tuple[bytes, float | None]] = self.server.store  # type: ignore
+        lock: threading.Lock = self.server.lock  # type: ignore
+        while (command := self.read_command()) is not None:
+            name, args = command[0].upper(), command[1:]
+            with lock:
+                for key in [k for k, (_, exp) in store.items()
+                            if exp is not None and exp <= time.monotonic()]:
+                    del store[key]
+                if name == b"GET":
+                    value = store.get(args[0])
+                    reply = (b"$-1\r\n" if value is None
+                             else b"$%d\r\n%s\r\n" % (len(value[0]), value[0]))
+                elif name == b"SET":
+                    options = [a.upper() for a in args[2:]]
+                    expires = None
+                    if b"PX" in options:
+                        ms = int(args[2 + options.index(b"PX") + 1])
+                        expires = time.monotonic() + ms / 1000
+                    if b"NX" in options and args[0] in store:
+                        reply = b"$-1\r\n"
+                    else:
+                        store[args[0]] = (args[1], expires)
+                        reply = b"+OK\r\n"
+                elif name == b"DEL":
+                    reply = b":%d\r\n" % int(store.pop(args[0], None) is not None)
+                elif name == b"INCR":
+                    value = int(store.get(args[0], (b"0", None))[0]) + 1
+                    store[args[0]] = (str(value).encode(), None)
+                    reply = b":%d\r\n" % value
+                elif name == b"FLUSHDB":
+                    store.clear()
+                    reply = b"+OK\r\n"
+                else:
+                    reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.store = {}
+        self.lock = threading.Lock()
+
+
+class BackendTestsMixin:
+    backend: object
+
+    def test_set_get_delete(self):
+        self.backend.set("a", b"1")
+        self.assertEqual(b"1", self.backend.get("a"))
+        self.backend.delete("a")
+        self.assertIsNone(self.backend.get("a"))
+
+    def test_ttl(self):
+        self.backend.set("a", b"1", ttl=0.05)
+        self.assertEqual(b"1", self.backend.get("a"))
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get("a"))
+
+    def test_add(self):
+        self.assertTrue(self.backend.add("lock", b"1", ttl=0.05))
+        self.assertFalse(self.backend.add("lock", b"1", ttl=0.05))
+        time.sleep(0.1)
+        self.assertTrue(self.backend.add("lock", b"1"))
+
+    def test_incr(self):
+        self.assertEqual(1, self.backend.incr("counter"))
+        self.assertEqual(2, self.backend.incr("counter"))
+
+    def test_clear(self):
+        self.backend.set("a", b"1")
+        self.backend.clear()
+        self.assertIsNone(self.backend.get("a"))
+
+
+class MemoryCacheTests(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryCache()
+
+    def test_lru_eviction(self):
+        backend = MemoryCache(max_entries=2)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(b"1", backend.get("a"))
+
+
+class SQLiteCacheTests(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.backend = SQLiteCache(os.path.join(self.directory.name, "cache.db"))
+
+    def tearDown(self):
+        self.backend._conn.close()
+        self.directory.cleanup()
+
+    def test_shared_between_connections(self):
+        other = SQLiteCache(self.backend.path)
+        self.backend.set("a", b"1")
+        self.assertEqual(b"1", other.get("a"))
+        other._conn.close()
+
+
+class RedisCacheTests(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.backend = RedisCache(f"redis://{host}:{port}/0")
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reconnect(self):
+        self.backend.set("a", b"1")
+        self.backend.close()
+        self.assertEqual(b"1", self.backend.get("a"))
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = Cache()
+
+    def test_namespace_by_user(self):
+        self.cache.set("key", "user 1", user_id=1)
+        self.cache.set("key", "user 2", user_id=2)
+        self.assertEqual("user 1", self.cache.get("key", user_id=1))
+        self.assertEqual("user 2", self.cache.get("key", user_id=2))
+
+    def test_versions(self):
+        version = self.cache.get_version(1, "cow")
+        self.assertEqual(version, self.cache.get_version(1, "cow"))
+        self.assertEqual(version + 1, self.cache.bump_version(1, "cow"))
+        self.assertNotEqual(self.cache.get_version(1, "cow"),
+                            self.cache.get_version(2, "cow"))
+
+    def test_memoize_invalidated_by_version(self):
+        calls = []
+
+        @self.cache.memoize("cow")
+        def compute(user_id: int) -> int:
+            calls.append(user_id)
+            return len(calls)
+
+        self.assertEqual(1, compute(user_id=1))
+        self.assertEqual(1, compute(user_id=1))
+        self.assertEqual(2, compute(user_id=2))
+        self.cache.bump_version(1, "cow")
+        self.assertEqual(3, compute(user_id=1))
+
+    def test_stampede_protection(self):
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(self.cache.get_or_compute("k", slow)))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(["value"] * 8, results)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import gzip
+import io
+import unittest
+
+from flask import Blueprint, Flask, Response, send_file
+
+from web_app.compression import init_compression
+
+CSV = "date;Metacam;Oxytetracycline\n" * 200
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def make_app(**config) -> Flask:
+    app = Flask(__name__)
+    app.config.update(config)
+    init_compression(app)
+
+    @app.route("/csv")
+    def csv():
+        return Response(CSV, mimetype="text/csv")
+
+    @app.route("/small")
+    def small():
+        return {"success": True}
+
+    @app.route("/xlsx")
+    def xlsx():
+        return Response(b"PK\x03\x04" * 500, mimetype=XLSX)
+
+    @app.route("/stream")
+    def stream():
+        return Response((line + "\n" for line in CSV.splitlines()), mimetype="text/csv")
+
+    @app.route("/ics")
+    def ics():
+        response = send_file(io.BytesIO(CSV.encode()), mimetype="text/calendar")
+        response.set_etag("abc")
+        return response
+
+    quiet = Blueprint("quiet", __name__)
+
+    @quiet.route("/quiet")
+    def quiet_view():
+        return Response(CSV, mimetype="text/csv")
+
+    app.register_blueprint(quiet)
+    return app
+
+
+class CompressionTests(unittest.TestCase):
+    def setUp(self):
+        self.client = make_app(
+            COMPRESS_BLUEPRINTS={"quiet": {"enabled": False}}).test_client()
+
+    def get(self, path: str, encoding: str | None = "gzip, deflate"):
+        headers = {"Accept-Encoding": encoding} if encoding else {}
+        return self.client.get(path, headers=headers)
+
+    def test_compressed_when_accepted(self):
+        response = self.get("/csv")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(gzip.decompress(response.data).decode(), CSV)
+        self.assertEqual(int(response.headers["Content-Length"]), len(response.data))
+        self.assertLess(len(response.data), len(CSV) // 10)
+
+    def test_not_compressed_without_accept_encoding(self):
+        for encoding in (None, "identity", "gzip;q=0"):
+            with self.subTest(encoding=encoding):
+                response = self.get("/csv", encoding)
+                self.assertNotIn("Content-Encoding", response.headers)
+                self.assertEqual(response.data.decode(), CSV)
+                self.assertIn("Accept-Encoding", response.headers["Vary"])
+
+    def test_below_threshold(self):
+        self.assertNotIn("Content-Encoding", self.get("/small").headers)
+
+    def test_compressed_formats_excluded(self):
+        response = self.get("/xlsx")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(len(response.data), 2000)
+
+    def test_streamed_response(self):
+        response = self.get("/stream")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        self.assertEqual(gzip.decompress(response.data).decode(), CSV)
+
+    def test_file_response(self):
+        response = self.get("/ics")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Accept-Ranges", response.headers)
+        self.assertEqual(response.headers["ETag"], 'W/"abc"')
+        self.assertEqual(gzip.decompress(response.data).decode(), CSV)
+
+    def test_disabled_for_blueprint(self):
+        self.assertNotIn("Content-Encoding", self.get("/quiet").headers)
+
+    def test_blueprint_threshold(self):
+        client = make_app(COMPRESS_BLUEPRINTS={"": {"min_size": 10}}).test_client()
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+    def test_disabled(self):
+        client = make_app(COMPRESS_ENABLED=False).test_client()
+        response = client.get("/csv", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+from werkzeug.security import generate_password_hash
+
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.user import UserUtils
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+from web_app import app
+
+import unittest
+import warnings
+
+
+class ConditionalResponseTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "user@mail.com",
+                                         "password": "pwd"})
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_not_modified(self):
+        response = self.client.get("/herd/list")
+        self.assertEqual(200, response.status_code)
+        etag = response.headers["ETag"]
+
+        response = self.client.get("/herd/list",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.data)
+
+    def test_write_invalidates_etag(self):
+        etag = self.client.get("/herd/list").headers["ETag"]
+
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+
+        response = self.client.get("/herd/list",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers["ETag"])
+        self.assertEqual(1, len(response.get_json()))
+
+    def test_unrelated_write_keeps_etag(self):
+        etag = self.client.get("/pharmacy/get-prescription").headers["ETag"]
+
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+
+        response = self.client.get("/pharmacy/get-prescription",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(304, response.status_code)
+
+    def test_failure_payload_has_no_etag(self):
+        response = self.client.get("/pharmacy/get-dashboard?section=unknown")
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.get_json()["success"])
+        self.assertNotIn("ETag", response.headers)
+
+        response = self.client.get("/pharmacy/get-dashboard")
+        self.assertTrue(response.get_json()["success"])
+        self.assertIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.models import init_db_test
+from web_app.models.cow import Cow, CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.user import UserUtils
+
+
+def care(day: date, number: int) -> dict:
+    # médicament 0 du catalogue : doliprane
+    return {"date_traitement": day.isoformat(), "medicaments": {"0": number},
+            "annotation": f"soin {number}", "id": number}
+
+
+def reproduction(day: date) -> dict:
+    return {"insemination": [day.isoformat()], "ultrasound": None,
+            "dry": None, "dry_status": False, "calving_preparation": None,
+            "calving_preparation_status": False, "calving_date": None,
+            "calving": False, "abortion": None, "reproduction_details": None}
+
+
+class CowDetailTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        CowUtils.add_cow(user_id=self.user_id, cow_id=7)
+        cow = CowUtils.get_cow(self.user_id, 7)
+        today = date.today()
+        self.cares = [care(today - timedelta(days=30 * (25 - n)), n) for n in range(25)]
+        self.reproductions = [reproduction(today - timedelta(days=400 * (3 - n)))
+                              for n in range(3)]
+        cow.cow_cares = self.cares
+        cow.reproduction = self.reproductions
+        db.session.commit()
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "user@mail.com",
+                                         "password": "pwd"})
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def get_detail(self, **params):
+        response = self.client.get("/cow/get-detail", query_string={"cow_id": 7, **params})
+        self.assertEqual(200, response.status_code)
+        result = response.get_json()
+        self.assertTrue(result["success"], result)
+        return result["message"]
+
+    def test_detail_first_pages(self):
+        detail = self.get_detail(per_page=10)
+        self.assertEqual(7, detail["cow"]["cow_id"])
+        self.assertNotIn("cow_cares", detail["cow"])
+        self.assertEqual(3 - 12, detail["quota"]["remaining"])  # 12 soins sur un an
+        self.assertIsNotNone(detail["quota"]["available_from"])
+
+        cares = detail["cares"]
+        self.assertEqual((25, True), (cares["total"], cares["has_more"]))
+        self.assertEqual([24 - n for n in range(10)],
+                         [item["id"] for item in cares["items"]])
+        self.assertEqual(list(range(10)), [item["index"] for item in cares["items"]])
+        self.assertEqual({"doliprane": 24}, cares["items"][0]["medicaments"])
+
+        reproductions = detail["reproductions"]
+        self.assertFalse(reproductions["has_more"])
+        self.assertEqual(self.reproductions[-1]["insemination"],
+                         reproductions["items"][0]["insemination"])
+
+    def test_next_page_of_one_section(self):
+        detail = self.get_detail(section="cares", page=3, per_page=10)
+        self.assertEqual(["cares"], list(detail))
+        self.assertFalse(detail["cares"]["has_more"])
+        self.assertEqual([4, 3, 2, 1, 0], [item["id"] for item in detail["cares"]["items"]])
+        self.assertEqual([20, 21, 22, 23, 24],
+                         [item["index"] for item in detail["cares"]["items"]])
+
+        response = self.client.get("/cow/get-detail",
+                                   query_string={"cow_id": 7, "section": "info"})
+        self.assertFalse(response.get_json()["success"])
+
+    def test_single_cow_load(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "FROM cow" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.get_detail()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(1, len(statements))
+
+    def test_reading_does_not_mutate_history(self):
+        for url in ("/cow/get-detail", "/cow/get-cares", "/cow/get-reproductions"):
+            self.client.get(url, query_string={"cow_id": 7})
+        db.session.remove()
+        cow = db.session.get(Cow, {"user_id": self.user_id, "cow_id": 7})
+        self.assertEqual(self.cares, list(cow.cow_cares))
+        self.assertEqual(self.reproductions, list(cow.reproduction))
+
+    def test_remove_reproduction_uses_display_order(self):
+        response = self.client.post("/cow/remove_reproduction",
+                                    data={"cow_id": 7, "index": 0})
+        self.assertTrue(response.get_json()["success"])
+        db.session.remove()
+        cow = db.session.get(Cow, {"user_id": self.user_id, "cow_id": 7})
+        self.assertEqual(self.reproductions[:-1], list(cow.reproduction))
+
+
+if __name__ == "__main__":
+    unittest.main()
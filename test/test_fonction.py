@@ -5,7 +5,7 @@ import sys
 from web_app.models import init_db_test
 from web_app.models.cow import CowUtils
 from web_app.models.type_dict import Traitement
-from web_app.models.user import UserUtils
+from web_app.models.user import Users
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
 
 import unittest
@@ -13,7 +13,7 @@ import warnings
 
 from datetime import date, datetime, timedelta
 from random import randint
-from web_app import app
+from web_app import app, db
 from web_app.fonction import (
     day_delta,
     first,
@@ -42,7 +42,12 @@ def random_date():
     return date(y, m, d)
 
 def init_user(user_id: int):
-    UserUtils.add_user(email=f'user{user_id}@mail.com',password=str(hash(user_id)))
+    # l'identifiant est imposé : les vaches créées ensuite référencent user_id
+    user = Users(email=f'user{user_id}@mail.com', password=str(hash(user_id)),
+                 setting={"dry_time": 0, "calving_preparation_time": 0})
+    user.id = user_id
+    db.session.add(user)
+    db.session.commit()
 class DataFunctionsUnitTests(unittest.TestCase):
     def test_first(self):
         for i in range(100):
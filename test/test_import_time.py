@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import subprocess
+import unittest
+
+ROOT = os.path.join(os.path.dirname(__file__), "../")
+# Bibliothèques lourdes chargées uniquement à l'usage (imports Excel, exports)
+LAZY_MODULES = ("pandas", "openpyxl", "icalendar")
+# Budget en secondes, ajustable selon la machine d'intégration
+IMPORT_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "3.0"))
+CREATE_APP_BUDGET = float(os.getenv("CREATE_APP_TIME_BUDGET", "5.0"))
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import web_app
+imported = time.perf_counter() - started
+loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+started = time.perf_counter()
+web_app.create_app()
+created = time.perf_counter() - started
+print(json.dumps({{"import": imported, "create_app": created, "loaded": loaded,
+                  "after_create": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def slowest_imports(count: int = 10) -> str:
+    """Renvoie les imports les plus coûteux (cumulés) selon `-X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import web_app"],
+                            capture_output=True, text=True, cwd=ROOT)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return "\n".join(f"{us / 1000:8.1f} ms {name}" for us, name in rows[:count])
+
+
+class ImportTimeTests(unittest.TestCase):
+    """Suit le coût de démarrage : chaque mesure est faite dans un
+    interpréteur neuf pour ne pas bénéficier des imports des autres tests."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        result = subprocess.run([sys.executable, "-c", PROBE],
+                                capture_output=True, text=True, cwd=ROOT)
+        if result.returncode:
+            raise RuntimeError(result.stderr)
+        cls.probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_heavy_libraries_are_not_imported(self):
+        self.assertEqual(self.probe["loaded"], [])
+        self.assertEqual(self.probe["after_create"], [])
+
+    def test_import_within_budget(self):
+        self.assertLess(self.probe["import"], IMPORT_BUDGET,
+                        f"import web_app: {self.probe['import']:.2f}s\n{slowest_imports()}")
+
+    def test_create_app_within_budget(self):
+        self.assertLess(self.probe["create_app"], CREATE_APP_BUDGET,
+                        f"create_app(): {self.probe['create_app']:.2f}s")
+
+    def test_import_does_not_create_app(self):
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import web_app; print('app' in vars(web_app))"],
+            capture_output=True, text=True, cwd=ROOT)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
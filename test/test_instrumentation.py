@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import unittest
+import warnings
+
+from werkzeug.security import generate_password_hash
+
+from web_app import app
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.user import UserUtils
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        for cow_id in (1, 2, 3):
+            CowUtils.add_cow(user_id=self.user_id, cow_id=cow_id)
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "user@mail.com",
+                                         "password": "pwd"})
+        self.config = dict(app.config)
+
+    def tearDown(self):
+        app.config.update(self.config)
+        self.app_context.pop()
+
+    def test_server_timing_header(self):
+        response = self.client.get("/herd/list")
+        timing = response.headers["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r"app;dur=[\d.]+")
+
+    def test_slow_request_logged(self):
+        app.config["PERF_SLOW_REQUEST_MS"] = 0
+        with self.assertLogs("web_app.perf", "WARNING") as logs:
+            self.client.get("/herd/list")
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual("slow_request", record["event"])
+        self.assertEqual("herd.list", record["endpoint"])
+        self.assertGreaterEqual(record["queries"], 1)
+        self.assertGreaterEqual(record["rows"], 3)
+
+    def test_slow_query_logged_with_parameters(self):
+        app.config["PERF_SLOW_QUERY_MS"] = 0
+        with self.assertLogs("web_app.perf", "WARNING") as logs:
+            self.client.get("/herd/list")
+        queries = [json.loads(r.getMessage()) for r in logs.records]
+        queries = [q for q in queries if q["event"] == "slow_query"]
+        self.assertTrue(any("FROM cow" in q["statement"] for q in queries))
+        self.assertTrue(all("parameters" in q for q in queries))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+from datetime import date
+import unittest
+import warnings
+
+from web_app import app
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.type_dict import Traitement
+from test_fonction import init_user
+
+
+class JsonFiltersTests(unittest.TestCase):
+    """Filtres sur les colonnes JSON, évalués en SQL sur PostgreSQL et en
+    Python sur SQLite : la base est choisie par DATABASE_URL."""
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        init_user(1)
+        for cow_id in (1, 2, 3):
+            CowUtils.add_cow(user_id=1, cow_id=cow_id)
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_cows_treated_with(self):
+        CowUtils.add_cow_care(1, 1, Traitement(
+            date_traitement="2025-01-10", medicaments={"Doliprane": 1},
+            annotation=""))
+        CowUtils.add_cow_care(1, 2, Traitement(
+            date_traitement="2025-01-11",
+            medicaments={"Spasfon": 2, 'Dose "forte"': 1}, annotation=""))
+
+        self.assertEqual([1], CowUtils.get_cows_treated_with(1, "Doliprane"))
+        self.assertEqual([2], CowUtils.get_cows_treated_with(1, 'Dose "forte"'))
+        self.assertEqual([], CowUtils.get_cows_treated_with(1, "Aspirine"))
+
+    def test_valid_reproduction_requires_ultrasound(self):
+        today = date.today().strftime("%Y-%m-%d")
+        CowUtils.add_insemination(1, 1, today)
+        CowUtils.add_insemination(1, 2, today)
+        CowUtils.validated_ultrasound(1, 1, True, 60, 21, today)
+        CowUtils.validated_ultrasound(1, 2, False, 60, 21, today)
+
+        self.assertEqual([1], list(CowUtils.get_valid_reproduction(1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
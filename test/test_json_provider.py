@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import unittest
+import warnings
+from datetime import date, datetime
+from unittest import mock
+
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db, json_provider
+from web_app.models import init_db_test
+from web_app.models.cow import Cow, CowSchema, CowUtils
+from web_app.models.user import UserUtils
+
+COW = dict(user_id=1, cow_id=42, mother_id=7, name="Marguerite", sexe=True,
+           cow_cares=[{"id": 0, "date_traitement": "2025-03-01",
+                       "medicaments": {"Metacam": 12}, "annotation": "fièvre"}],
+           info=[], in_farm=True, born_date=date(2021, 4, 2),
+           reproduction=[], is_calf=False, init_as_cow=True)
+
+
+class ProviderTests(unittest.TestCase):
+    """Les deux sérialiseurs (json et orjson s'il est installé) doivent
+    produire le même document."""
+
+    backends = ["json"] + (["orjson"] if json_provider.orjson else [])
+
+    def dump(self, obj, backend: str) -> dict:
+        orjson = json_provider.orjson if backend == "orjson" else None
+        with mock.patch.object(json_provider, "orjson", orjson):
+            return json.loads(app.json.dumps(obj))
+
+    def test_dates_iso_format(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                self.assertEqual(self.dump({"d": date(2025, 1, 31),
+                                            "t": datetime(2025, 1, 31, 8, 30)}, backend),
+                                 {"d": "2025-01-31", "t": "2025-01-31T08:30:00"})
+
+    def test_cow_matches_schema(self):
+        cow = Cow(**COW)
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                self.assertEqual(self.dump([cow], backend), [CowSchema().dump(cow)])
+
+    def test_integer_keys(self):
+        for backend in self.backends:
+            with self.subTest(backend=backend):
+                self.assertEqual(self.dump({3: {"ultrasound": True}}, backend),
+                                 {"3": {"ultrasound": True}})
+
+    def test_large_integer_falls_back(self):
+        self.assertEqual(json.loads(app.json.dumps({"n": 2**70})), {"n": 2**70})
+
+    def test_non_ascii_not_escaped(self):
+        self.assertIn("Kétoprofène", app.json.dumps(["Kétoprofène"]))
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            app.json.dumps(object())
+
+
+class ResponseTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "user@mail.com",
+                                         "password": "pwd"})
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_herd_list(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1, born_date=date(2020, 5, 1))
+        response = self.client.get("/herd/list")
+        self.assertEqual(response.mimetype, "application/json")
+        cows = response.get_json()
+        self.assertEqual(cows, [CowSchema().dump(cow)
+                                for cow in CowUtils.get_all_cows(self.user_id)])
+        self.assertEqual(cows[0]["born_date"], "2020-05-01")
+
+    def test_row_projection(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1, born_date=date(2020, 5, 1))
+        rows = db.session.execute(select(Cow.cow_id, Cow.born_date)).all()
+        with app.test_request_context():
+            response = app.json.response(rows)
+        self.assertEqual(json.loads(response.data),
+                         [{"cow_id": 1, "born_date": "2020-05-01"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
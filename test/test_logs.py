@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import logging as lg
+import tempfile
+import unittest
+import warnings
+
+from flask import Flask
+
+from web_app import logs
+from web_app.logs import (
+    HTTP304Filter,
+    JSONFormatter,
+    init_logging,
+    install_queue,
+    make_file_handler,
+    parse_levels,
+)
+
+
+def read(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as file:
+        return file.read().splitlines()
+
+
+class QueuePipelineTests(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.log")
+        self.logger = lg.getLogger("test.logs")
+        self.logger.setLevel(lg.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self) -> None:
+        logs._remove_queue(self.logger.name)
+        self.directory.cleanup()
+
+    def flush(self) -> None:
+        # arrête le thread d'écriture après avoir vidé la file
+        _, listener = logs._pipelines[self.logger.name]
+        listener.stop()
+        listener.start()
+
+    def test_records_written_by_listener(self):
+        handler = make_file_handler(self.path)
+        handler.setFormatter(lg.Formatter("%(levelname)s %(message)s"))
+        install_queue(self.logger, handler)
+        self.logger.info("vache %s traitée", 12)
+        self.logger.debug("ignoré")
+        self.flush()
+        self.assertEqual(read(self.path), ["INFO vache 12 traitée"])
+
+    def test_size_rotation(self):
+        handler = make_file_handler(self.path, "size", max_bytes=200, backup_count=2)
+        install_queue(self.logger, handler)
+        for i in range(50):
+            self.logger.info("ligne %d %s", i, "x" * 20)
+        self.flush()
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertTrue(os.path.exists(f"{self.path}.2"))
+        self.assertFalse(os.path.exists(f"{self.path}.3"))
+
+    def test_unknown_rotation(self):
+        with self.assertRaises(ValueError):
+            make_file_handler(self.path, "weekly")
+
+    def test_json_format(self):
+        handler = make_file_handler(self.path)
+        handler.setFormatter(JSONFormatter())
+        install_queue(self.logger, handler)
+        try:
+            raise KeyError("dlc")
+        except KeyError:
+            self.logger.exception("échec %s", "stock")
+        self.flush()
+        entry = json.loads(read(self.path)[0])
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["logger"], "test.logs")
+        self.assertEqual(entry["message"], "échec stock")
+        self.assertIn("KeyError", entry["exception"])
+
+    def test_http_304_filtered(self):
+        install_queue(self.logger, make_file_handler(self.path)).addFilter(HTTP304Filter())
+        self.logger.info('"GET /herd HTTP/1.1" 304 -')
+        self.logger.info('"GET /herd HTTP/1.1" 200 -')
+        self.flush()
+        self.assertEqual(len(read(self.path)), 1)
+        self.assertIn(" 200 ", read(self.path)[0])
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork indisponible")
+    def test_restart_after_fork(self):
+        install_queue(self.logger, make_file_handler(self.path))
+        with warnings.catch_warnings():
+            # les threads d'écriture des journaux ne survivent pas au fork
+            warnings.simplefilter("ignore", DeprecationWarning)
+            pid = os.fork()
+        if pid == 0:
+            logs.restart_after_fork()
+            self.logger.info("depuis le worker")
+            logs.stop_listeners()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(read(self.path), ["depuis le worker"])
+
+
+class InitLoggingTests(unittest.TestCase):
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels("web_app.models=debug, werkzeug=WARNING,"),
+                         {"web_app.models": "DEBUG", "werkzeug": "WARNING"})
+        self.assertEqual(parse_levels(None), {})
+        self.assertEqual(parse_levels({"a": "INFO"}), {"a": "INFO"})
+
+    def test_per_module_levels(self):
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__)
+            app.config.update(LOG_FILE=os.path.join(directory, "app.log"),
+                              LOG_LEVELS="test.verbose=DEBUG,test.quiet=ERROR")
+            root_level = lg.getLogger().level
+            try:
+                init_logging(app)
+                self.assertTrue(lg.getLogger("test.verbose").isEnabledFor(lg.DEBUG))
+                self.assertFalse(lg.getLogger("test.quiet").isEnabledFor(lg.WARNING))
+            finally:
+                logs._remove_queue("root")
+                lg.getLogger().setLevel(root_level)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.models import init_db_test
+from web_app.models.cow import Cow, CowUtils
+from web_app.models.lot import Lot, LotUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.prescription import Prescription
+from web_app.models.type_dict import Traitement
+from web_app.models.user import UserUtils
+
+
+class LotTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com", password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        self.today = date.today()
+        PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+            self.user_id, self.today.year, remaining_stock={}, total_enter={},
+            total_used={}, total_used_calf={}, total_out_dlc={}, total_out={}))
+        self.user = ConnectedUser(UserUtils.get_user(self.user_id))
+        # deux lots de doliprane, le plus tardif saisi en premier
+        self.user.prescription_utils.add_prescription(
+            self.today, {"doliprane": 10, "spasfon": 4},
+            {"doliprane": self.today + timedelta(days=90), "spasfon": self.today + timedelta(days=10)})
+        self.user.prescription_utils.add_prescription(
+            self.today, {"doliprane": 5}, {"doliprane": self.today + timedelta(days=20)})
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def remaining(self, medicine_id: int) -> list[int]:
+        return [lot.remaining for lot in LotUtils.get_lots(self.user_id, medicine_id)]
+
+    def test_prescription_lines_become_lots(self):
+        lots = Lot.query.filter_by(user_id=self.user_id).order_by(Lot.id).all()
+        self.assertEqual([(0, 10, 10), (1, 4, 4), (0, 5, 5)],
+                         [(lot.medicine_id, lot.quantity, lot.remaining) for lot in lots])
+        self.assertEqual([5, 10], self.remaining(0))
+
+    def test_cares_consume_first_expired_first(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        care = Traitement(date_traitement=self.today.isoformat(),
+                          medicaments={"doliprane": 7, "spasfon": 1}, annotation="", id=0)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT") and "FROM lot" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.user.cow_utils.add_cow_care(1, care)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(1, len(statements))
+        self.assertEqual([8], self.remaining(0))
+        self.assertEqual([3], self.remaining(1))
+
+        self.user.cow_utils.update_cow_care(1, 0, {**care, "medicaments": {"doliprane": 3, "spasfon": 1}})
+        self.assertEqual([2, 10], self.remaining(0))
+
+        self.user.cow_utils.delete_cow_care(1, 0)
+        self.assertEqual([5, 10], self.remaining(0))
+        self.assertEqual([4], self.remaining(1))
+
+    def test_failed_care_write_leaves_lots_and_stock(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        care = Traitement(date_traitement=self.today.isoformat(),
+                          medicaments={"doliprane": 7}, annotation="", id=0)
+
+        original = db.session.commit
+
+        def failing_commit():
+            # seule l'écriture du traitement échoue
+            if any(isinstance(instance, Cow) for instance in db.session.dirty):
+                raise OperationalError("UPDATE cow", {}, Exception("disk I/O error"))
+            original()
+
+        db.session.commit = failing_commit
+        try:
+            with self.assertRaises(OperationalError):
+                self.user.cow_utils.add_cow_care(1, care)
+        finally:
+            db.session.commit = original
+        db.session.rollback()
+
+        self.assertEqual([5, 10], self.remaining(0))
+        self.assertEqual({"0": 15, "1": 4}, PharmacieUtils.get_pharmacie_year(
+            self.user_id, self.today.year).remaining_stock)
+        self.assertEqual([], CowUtils.get_cow(self.user_id, 1).cow_cares)
+
+        self.user.cow_utils.add_cow_care(1, care)
+        self.assertEqual([8], self.remaining(0))
+        self.assertEqual({"0": 8, "1": 4}, PharmacieUtils.get_pharmacie_year(
+            self.user_id, self.today.year).remaining_stock)
+
+    def test_stock_without_lot_is_left_to_the_pharmacy(self):
+        moved = LotUtils.apply_stock_delta(self.user_id, {"1": -6})
+        self.assertEqual([-4], list(moved.values()))
+        self.assertEqual([], self.remaining(1))
+
+    def test_expiring_report_and_dlc_exit(self):
+        self.assertEqual([], self.user.get_expiring_lots(5))
+        expiring = self.user.get_expiring_lots(30)
+        self.assertEqual([("spasfon", 4), ("doliprane", 5)],
+                         [(lot["medicament"], lot["remaining"]) for lot in expiring])
+        self.assertEqual((self.today + timedelta(days=10)).isoformat(), expiring[0]["expiry"])
+
+        self.user.prescription_utils.add_dlc_left(self.today, {"spasfon": 4})
+        self.assertEqual(["doliprane"], [lot["medicament"] for lot in self.user.get_expiring_lots(30)])
+        # l'annulation de la sortie rend le lot
+        dlc = Prescription.query.filter_by(user_id=self.user_id, dlc_left=True).one()
+        self.user.prescription_utils.remove_prescription(dlc.id)
+        self.assertEqual([4], self.remaining(1))
+
+    def test_removed_prescription_drops_its_lots(self):
+        prescription = Prescription.query.filter_by(user_id=self.user_id).order_by(Prescription.id).first()
+        self.user.prescription_utils.remove_prescription(prescription.id)
+        self.assertEqual([5], self.remaining(0))
+        self.assertEqual([], self.remaining(1))
+
+    def test_removed_prescription_moves_its_consumption(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        self.user.cow_utils.add_cow_care(1, Traitement(
+            date_traitement=self.today.isoformat(), medicaments={"doliprane": 7},
+            annotation="", id=0))
+        self.assertEqual([8], self.remaining(0))
+        # deuxième prescription (5 doliprane), dont le lot est vide
+        prescription = Prescription.query.filter_by(user_id=self.user_id).order_by(
+            Prescription.id.desc()).first()
+        self.user.prescription_utils.remove_prescription(prescription.id)
+
+        self.assertEqual([3], self.remaining(0))
+        self.assertEqual({"0": 3, "1": 4}, PharmacieUtils.get_pharmacie_year(
+            self.user_id, self.today.year).remaining_stock)
+
+    def test_expiring_endpoint(self):
+        client = app.test_client()
+        client.post("/login", data={"email": "user@mail.com", "password": "pwd"})
+        client.post("/pharmacy/add-prescriptions", data={
+            "date": self.today.isoformat(), "medication": ["spasfon"], "dose": ["2"],
+            "expiry": [(self.today - timedelta(days=1)).isoformat()]})
+        result = client.get("/pharmacy/get-expiring-lots", query_string={"days": 15}).get_json()
+        self.assertTrue(result["success"], result)
+        self.assertEqual([2, 4], [lot["remaining"] for lot in result["message"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date
+
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.medicine import Medicine, MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.prescription import Prescription
+from web_app.models.type_dict import Traitement
+from web_app.models.user import UserUtils
+from web_app.seed import seed_farms
+
+
+class MedicineCatalogTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        for email in ("a@mail.com", "b@mail.com"):
+            UserUtils.add_user(email=email, password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("a@mail.com").id
+        self.other_id = UserUtils.get_user_by_email("b@mail.com").id
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_ids_are_dense_per_user(self):
+        self.assertEqual(0, MedicineUtils.add_medicine(self.user_id, "doliprane", "ml"))
+        self.assertEqual(1, MedicineUtils.add_medicine(self.user_id, "spasfon", "cp"))
+        self.assertEqual(0, MedicineUtils.add_medicine(self.user_id, "doliprane", "g"))
+        self.assertEqual(0, MedicineUtils.add_medicine(self.other_id, "spasfon", "cp"))
+
+        catalog = MedicineUtils.get_catalog(self.user_id)
+        self.assertEqual(["doliprane", "spasfon"], catalog.names)
+        self.assertEqual({"doliprane": "ml", "spasfon": "cp"}, catalog.units_by_name())
+        self.assertEqual({"spasfon": "cp"}, UserUtils.get_pharma_list(self.other_id))
+
+    def test_catalog_conversions(self):
+        for name in ("doliprane", "spasfon", "metacam"):
+            MedicineUtils.add_medicine(self.user_id, name, "ml")
+        catalog = MedicineUtils.get_catalog(self.user_id)
+
+        stored = catalog.encode({"metacam": 4, "doliprane": 1})
+        self.assertEqual({"2": 4, "0": 1}, stored)
+        self.assertEqual({"metacam": 4, "doliprane": 1}, catalog.decode(stored))
+        with self.assertRaises(ValueError):
+            catalog.encode({"aspirine": 1})
+
+    def test_catalog_is_cached_until_a_medicine_is_added(self):
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        self.assertEqual(1, len(MedicineUtils.get_catalog(self.user_id)))
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        self.assertEqual(2, len(MedicineUtils.get_catalog(self.user_id)))
+
+    def test_quantities_are_stored_by_id(self):
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        year = date.today().year
+        PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+            self.user_id, year, remaining_stock={}, total_enter={}, total_used={},
+            total_used_calf={}, total_out_dlc={}, total_out={}))
+        user = ConnectedUser(UserUtils.get_user(self.user_id))
+
+        user.prescription_utils.add_prescription(date.today(), {"spasfon": 6})
+        self.assertEqual({"1": 6}, Prescription.query.one().care)
+        self.assertEqual({"1": 6}, PharmacieUtils.get_pharmacie_year(self.user_id, year).remaining_stock)
+        self.assertEqual({"1": 6}, user.sum_pharmacie_in(year))
+        self.assertEqual({"spasfon": 6},
+                         user.prescription_utils.get_all_prescriptions_cares()[0]["prescription"])
+        with self.assertRaises(ValueError):
+            user.prescription_utils.add_prescription(date.today(), {"aspirine": 1})
+
+    def test_herd_list_names_the_medicines(self):
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        CowUtils.add_cow(user_id=self.user_id, cow_id=12)
+        CowUtils.add_cow_care(self.user_id, 12, Traitement(
+            date_traitement="2025-01-02", medicaments={"1": 2}, annotation="", id=0))
+        client = app.test_client()
+        client.post("/login", data={"email": "a@mail.com", "password": "pwd"})
+
+        for url in ("/herd/list", "/herd/list/filter?id_filter=2"):
+            cows = client.get(url).get_json()
+            self.assertEqual([{"spasfon": 2}],
+                             [care["medicaments"] for care in cows[0]["cow_cares"]], url)
+        self.assertEqual({"1": 2}, CowUtils.get_care_by_id(self.user_id, 12)[0]["medicaments"])
+
+    def test_seed_builds_the_catalog(self):
+        user_id, = seed_farms(cows=5, calves=1, years=1, until=date(2025, 6, 30))
+        catalog = MedicineUtils.get_catalog(user_id)
+        self.assertEqual(Medicine.query.filter_by(user_id=user_id).count(), len(catalog))
+        for prescription in Prescription.query.filter_by(user_id=user_id):
+            self.assertTrue(set(catalog.decode(prescription.care)) <= set(catalog.names))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import tempfile
+import unittest
+import warnings
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from web_app import app, db
+from web_app.metrics import EXITED_SNAPSHOT, MetricsRegistry, registry
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter("requests_total", "Requêtes.", ("route",))
+        self.latency = self.registry.histogram("latency_seconds", "Latence.",
+                                               ("route",), buckets=(0.1, 1.0))
+
+    def test_histogram_rendering(self):
+        for value in (0.05, 0.1, 0.5, 3.0):
+            self.latency.observe(("/herd/list",), value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{route="/herd/list",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="/herd/list",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/herd/list",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{route="/herd/list"} 4', text)
+        self.assertIn('latency_seconds_sum{route="/herd/list"} 3.65', text)
+
+    def test_label_escaping(self):
+        self.requests.inc(('/a"b\\c',))
+        self.assertIn('requests_total{route="/a\\"b\\\\c"} 1', self.registry.render())
+
+    def test_aggregation_across_workers(self):
+        self.requests.inc(("/cow",), 2)
+        self.latency.observe(("/cow",), 0.5)
+        gauge = {("size",): 5.0}
+        self.registry.callback("gauge", "pool", "Pool.", ("state",), lambda: gauge)
+
+        with tempfile.TemporaryDirectory() as directory:
+            # instantanés de deux autres workers, dont un terminé
+            for pid in (os.getppid(), 2 ** 22 + 7):
+                snapshot = self.registry.snapshot()
+                snapshot["pid"] = pid
+                with open(os.path.join(directory, f"metrics-{pid}.json"), "w") as file:
+                    json.dump(snapshot, file)
+
+            merged = self.registry.collect(directory)
+
+        self.assertEqual(6, merged["requests_total"]["samples"][("/cow",)])
+        self.assertEqual(3, merged["latency_seconds"]["samples"][("/cow",)][-1])
+        # jauge du worker terminé ignorée
+        self.assertEqual(10, merged["pool"]["samples"][("size",)])
+
+    def test_exited_workers_are_folded(self):
+        self.requests.inc(("/cow",), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            for pid in (2 ** 22 + 7, 2 ** 22 + 8):
+                snapshot = self.registry.snapshot()
+                snapshot["pid"] = pid
+                with open(os.path.join(directory, f"metrics-{pid}.json"), "w") as file:
+                    json.dump(snapshot, file)
+
+            for _ in range(2):
+                merged = self.registry.collect(directory)
+                self.assertEqual(6, merged["requests_total"]["samples"][("/cow",)])
+                self.assertEqual([EXITED_SNAPSHOT],
+                                 [name for name in os.listdir(directory) if name.endswith(".json")])
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.client = app.test_client()
+
+    def test_route_metrics_exported(self):
+        self.client.get("/login")
+        response = self.client.get("/metrics")
+        self.assertEqual(200, response.status_code)
+        text = response.get_data(as_text=True)
+        self.assertIn('http_requests_total{blueprint="auth",route="/login",'
+                      'method="GET",status="200"}', text)
+        self.assertIn('http_request_duration_seconds_bucket{blueprint="auth",'
+                      'route="/login",method="GET",le="+Inf"}', text)
+        self.assertIn("# TYPE cache_requests_total counter", text)
+        self.assertIn('db_pool_connections{state="checkedout"}', text)
+
+    def test_remote_access_forbidden(self):
+        response = self.client.get("/metrics",
+                                   environ_base={"REMOTE_ADDR": "203.0.113.5"})
+        self.assertEqual(403, response.status_code)
+
+    def test_forwarded_address_is_not_trusted(self):
+        # environnement produit par ProxyFix pour "X-Forwarded-For: 127.0.0.1"
+        response = self.client.get("/metrics", environ_base={
+            "REMOTE_ADDR": "127.0.0.1",
+            "werkzeug.proxy_fix.orig": {"REMOTE_ADDR": "203.0.113.5"}})
+        self.assertEqual(403, response.status_code)
+
+    def test_client_behind_local_proxy_is_forbidden(self):
+        wsgi_app = app.wsgi_app
+        app.wsgi_app = ProxyFix(wsgi_app, x_for=1)
+        try:
+            response = self.client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.5"},
+                                       environ_base={"REMOTE_ADDR": "127.0.0.1"})
+            self.assertEqual(403, response.status_code)
+            response = self.client.get("/metrics", headers={"X-Forwarded-For": "127.0.0.1"},
+                                       environ_base={"REMOTE_ADDR": "127.0.0.1"})
+            self.assertEqual(200, response.status_code)
+        finally:
+            app.wsgi_app = wsgi_app
+
+    def test_pool_gauge_follows_disposed_pool(self):
+        with app.app_context():
+            db.engine.connect().close()
+            db.engine.dispose(close=False)
+        usage = registry.metrics["db_pool_connections"].samples()
+        self.assertEqual(0, usage[("checkedin",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date
+
+from sqlalchemy import inspect, insert, text
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.migration import migrate_database
+from web_app.models import init_db_test
+from web_app.models.cow import Cow, CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.prescription import Prescription, PrescriptionUtils
+from web_app.models.user import UserUtils
+
+
+class MigrationTests(unittest.TestCase):
+    """Migre une base au schéma d'avant le catalogue : médicaments listés
+    dans `users.medic_list` et quantités enregistrées par nom."""
+
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com", password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        db.session.remove()
+
+        with db.engine.begin() as connection:
+            for table in ("stock_alert", "lot", "medicine"):
+                connection.execute(text(f"DROP TABLE {table}"))
+            for index in ("ix_cow_user_milk_withdrawal", "ix_cow_user_meat_withdrawal"):
+                connection.execute(text(f"DROP INDEX {index}"))
+            for column in ("version", "milk_withdrawal_until", "meat_withdrawal_until"):
+                connection.execute(text(f"ALTER TABLE cow DROP COLUMN {column}"))
+            connection.execute(text("ALTER TABLE users ADD COLUMN medic_list JSON"))
+            connection.execute(text("UPDATE users SET medic_list = :medic_list"),
+                               {"medic_list": '{"doliprane": "ml", "spasfon": "cp"}'})
+            connection.execute(insert(Cow.__table__).values(
+                user_id=self.user_id, cow_id=1, born_date=date(2020, 1, 1), in_farm=True,
+                cow_cares=[{"date_traitement": "2025-01-02", "annotation": "",
+                            "medicaments": {"doliprane": 2, "aspirine": 1}}]))
+            connection.execute(insert(Prescription.__table__).values(
+                user_id=self.user_id, date=date(2025, 1, 1), care={"spasfon": 3},
+                dlc_left=False))
+            connection.execute(insert(Pharmacie.__table__).values(
+                user_id=self.user_id, year=2025, total_enter={"spasfon": 3},
+                total_used={"doliprane": 2, "aspirine": 1}, total_used_calf={},
+                total_out_dlc={}, total_out={},
+                remaining_stock={"doliprane": 10, "spasfon": 5}))
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_quantities_are_keyed_by_catalog_id(self):
+        self.assertIn("medicine catalog of 1 user(s)", migrate_database())
+
+        catalog = MedicineUtils.get_catalog(self.user_id)
+        self.assertEqual(["doliprane", "spasfon", "aspirine"], catalog.names)
+        self.assertEqual(["ml", "cp", ""], catalog.units)
+        self.assertEqual({"0": 2, "2": 1},
+                         CowUtils.get_care_by_id(self.user_id, 1)[0]["medicaments"])
+        self.assertEqual([{"1": 3}], [prescription.care for prescription
+                                      in PrescriptionUtils.get_all_prescriptions(self.user_id)])
+        pharmacie = PharmacieUtils.get_pharmacie_year(self.user_id, 2025)
+        self.assertEqual({"0": 10, "1": 5}, pharmacie.remaining_stock)
+        self.assertEqual({"0": 2, "2": 1}, pharmacie.total_used)
+
+        user = ConnectedUser(UserUtils.get_user(self.user_id))
+        self.assertEqual({"doliprane": 10, "spasfon": 5},
+                         user.catalog.decode(pharmacie.remaining_stock))
+        self.assertEqual(1, CowUtils.get_cow(self.user_id, 1).version)
+        self.assertNotIn("medic_list",
+                         [column["name"] for column in inspect(db.engine).get_columns("users")])
+
+    def test_migration_is_idempotent(self):
+        migrate_database()
+        self.assertEqual([], migrate_database())
+        self.assertEqual(3, len(MedicineUtils.get_catalog(self.user_id).names))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.prescription import PrescriptionUtils
+from web_app.models.user import UserUtils
+
+
+class PharmacyDashboardTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        UserUtils.add_medic_in_pharma_list(self.user_id, medic="doliprane", mesur="ml")
+        self.today = date.today()
+        for year in (self.today.year - 1, self.today.year):
+            PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+                self.user_id, year, remaining_stock={}, total_enter={}, total_used={},
+                total_used_calf={}, total_out_dlc={}, total_out={}))
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "user@mail.com",
+                                         "password": "pwd"})
+        for days in range(5):
+            self.add("/pharmacy/add-prescriptions", self.today - timedelta(days=days), 10)
+        self.add("/pharmacy/add-dlc-left", self.today, 3)
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def add(self, url: str, day: date, dose: int) -> None:
+        response = self.client.post(url, data={"date": day.isoformat(),
+                                               "medication": "doliprane",
+                                               "dose": dose})
+        self.assertTrue(response.get_json()["success"], response.get_json())
+
+    def get_dashboard(self, **params):
+        response = self.client.get("/pharmacy/get-dashboard", query_string=params)
+        self.assertEqual(200, response.status_code)
+        result = response.get_json()
+        self.assertTrue(result["success"], result)
+        return result["message"]
+
+    def test_page_is_newest_first(self):
+        page = PrescriptionUtils.get_prescriptions_page(self.user_id, dlc_left=False,
+                                                        page=2, per_page=2)
+        self.assertEqual((5, True), (page["total"], page["has_more"]))
+        self.assertEqual([(self.today - timedelta(days=days)).isoformat() for days in (2, 3)],
+                         [item["date_prescription"] for item in page["items"]])
+
+    def test_dashboard(self):
+        dashboard = self.get_dashboard(per_page=3)
+        self.assertEqual({"doliprane": 47}, dashboard["stock"])
+        self.assertEqual(50, dashboard["totals"]["total_enter"]["doliprane"])
+        self.assertEqual(3, dashboard["totals"]["total_out_dlc"]["doliprane"])
+        self.assertEqual(3, len(dashboard["prescriptions"]["items"]))
+        self.assertTrue(dashboard["prescriptions"]["has_more"])
+        self.assertEqual([True], [item["dlc_left"] for item in dashboard["dlc"]["items"]])
+
+        more = self.get_dashboard(section="prescriptions", page=2, per_page=3)
+        self.assertEqual(["prescriptions"], list(more))
+        self.assertEqual(2, len(more["prescriptions"]["items"]))
+        self.assertFalse(more["prescriptions"]["has_more"])
+
+    def test_dashboard_is_cached_per_version(self):
+        self.get_dashboard()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "FROM prescription" in statement or "FROM pharmacie" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.get_dashboard()
+            self.assertEqual([], statements)
+
+            self.add("/pharmacy/add-prescriptions", self.today, 5)
+            statements.clear()
+            self.assertEqual(52, self.get_dashboard()["stock"]["doliprane"])
+            self.assertNotEqual([], statements)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+
+class PharmacyHistoryTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com",
+                           password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        doliprane = str(MedicineUtils.add_medicine(self.user_id, "doliprane", "ml"))
+        spasfon = str(MedicineUtils.add_medicine(self.user_id, "spasfon", "cp"))
+        start = date(2024, 1, 1)
+        for cow_id in range(1, 6):
+            CowUtils.add_cow(user_id=self.user_id, cow_id=cow_id)
+            cow = CowUtils.get_cow(self.user_id, cow_id)
+            cow.cow_cares = [
+                {"date_traitement": (start + timedelta(days=7 * n + cow_id)).isoformat(),
+                 "medicaments": {doliprane if n % 2 else spasfon: 1},
+                 "annotation": "", "id": n}
+                for n in range(8)]
+        db.session.commit()
+        for n in range(12):
+            day = start + timedelta(days=5 * n)
+            if n % 3:
+                PrescriptionUtils.add_prescription(self.user_id, day, {doliprane: 10})
+            else:
+                PrescriptionUtils.add_dlc_left(self.user_id, day, {spasfon: 2})
+        self.user = ConnectedUser(UserUtils.get_user(self.user_id))
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def pages(self, limit: int, **filters) -> list[dict]:
+        events, cursor = [], None
+        while True:
+            page = self.user.get_history_pharmacie_page(limit=limit, cursor=cursor, **filters)
+            self.assertLessEqual(len(page["events"]), limit)
+            events += page["events"]
+            if (cursor := page["next_cursor"]) is None:
+                return events
+
+    def test_history_is_merged_by_date(self):
+        history = self.user.get_history_pharmacie()
+        self.assertEqual(5 * 8 + 12, len(history))
+        dates = [event["date"] for event in history]
+        self.assertEqual(sorted(dates, reverse=True), dates)
+
+    def test_pages_follow_the_full_history(self):
+        history = self.user.get_history_pharmacie()
+        for limit in (1, 7, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(history, self.pages(limit))
+
+    def test_filters(self):
+        events = self.pages(6, medic="spasfon", event_types={"care", "dlc left"})
+        self.assertEqual(5 * 4 + 4, len(events))
+        self.assertTrue(all("spasfon" in event["medicaments"] for event in events))
+        self.assertEqual({"dlc left"}, {event["event_type"] for event in events
+                                        if not event["event_type"].startswith("care")})
+
+        with self.assertRaises(ValueError):
+            self.user.get_history_pharmacie_page(event_types={"vaccin"})
+        with self.assertRaises(ValueError):
+            self.user.get_history_pharmacie_page(cursor="pas un curseur")
+
+    def test_endpoint(self):
+        client = app.test_client()
+        client.post("/login", data={"email": "user@mail.com", "password": "pwd"})
+        result = client.get("/pharmacy/get-history",
+                            query_string={"limit": 3, "type": "prescription"}).get_json()
+        self.assertTrue(result["success"], result)
+        self.assertEqual(["prescription"] * 3,
+                         [event["event_type"] for event in result["message"]["events"]])
+        self.assertIsNotNone(result["message"]["next_cursor"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import json
+import pstats
+import tempfile
+import unittest
+
+from flask import Flask
+
+from web_app.profiling import init_profiling
+
+
+def make_app(**config) -> Flask:
+    app = Flask(__name__)
+    app.config.update(PROFILE_ENABLED=True, PROFILE_TOKEN="secret", **config)
+    init_profiling(app)
+
+    @app.route("/slow")
+    def slow():
+        return str(sum(i * i for i in range(20000)))
+
+    @app.route("/fast")
+    def fast():
+        return "ok"
+
+    return app
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def index(self) -> list[dict]:
+        with open(os.path.join(self.directory.name, "index.json")) as file:
+            return json.load(file)
+
+    def test_disabled_registers_no_hook(self):
+        app = Flask(__name__)
+        init_profiling(app)
+        self.assertEqual({}, dict(app.before_request_funcs))
+        self.assertEqual({}, dict(app.after_request_funcs))
+
+    def test_admin_header(self):
+        client = make_app(PROFILE_DIR=self.directory.name).test_client()
+        self.assertNotIn("X-Profile-Id", client.get("/slow").headers)
+        self.assertNotIn("X-Profile-Id",
+                         client.get("/slow", headers={"X-Profile-Token": "bad"}).headers)
+
+        response = client.get("/slow", headers={"X-Profile-Token": "secret"})
+        name = response.headers["X-Profile-Id"]
+        stats = pstats.Stats(os.path.join(self.directory.name, name))
+        self.assertTrue(any(func[2] == "slow" for func in stats.stats))  # type: ignore
+        self.assertEqual([name], [entry["file"] for entry in self.index()])
+
+    def test_index_keeps_slowest(self):
+        client = make_app(PROFILE_DIR=self.directory.name, PROFILE_SAMPLE_RATE=1.0,
+                          PROFILE_INDEX_SIZE=2).test_client()
+        for path in ("/fast", "/slow", "/fast", "/slow"):
+            client.get(path)
+
+        entries = self.index()
+        self.assertEqual(["slow", "slow"], [entry["endpoint"] for entry in entries])
+        profiles = [f for f in os.listdir(self.directory.name) if f.endswith(".prof")]
+        self.assertEqual(sorted(e["file"] for e in entries), sorted(profiles))
+
+
+if __name__ == "__main__":
+    unittest.main()
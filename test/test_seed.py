@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+from datetime import date, timedelta
+import unittest
+import warnings
+
+from web_app import app
+from web_app.fonction import parse_date
+from web_app.models import init_db_test
+from web_app.models.alert import AlertUtils
+from web_app.models.cow import Cow
+from web_app.models.lot import Lot
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import PharmacieUtils
+from web_app.models.prescription import Prescription
+from web_app.seed import MAX_CARES_PER_YEAR, seed_farms
+
+UNTIL = date(2025, 6, 30)
+
+
+def dump() -> list:
+    return [(cow.user_id, cow.cow_id, cow.born_date, cow.cow_cares, cow.reproduction)
+            for cow in Cow.query.order_by(Cow.user_id, Cow.cow_id)]
+
+
+class SeedTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_counts(self):
+        user_ids = seed_farms(farms=2, cows=30, calves=5, years=4,
+                              prescriptions=6, dlc_exits=1, until=UNTIL)
+        self.assertEqual(2, len(user_ids))
+        for user_id in user_ids:
+            self.assertEqual(35, Cow.query.filter_by(user_id=user_id).count())
+            self.assertEqual(5, Cow.query.filter_by(user_id=user_id, is_calf=True).count())
+            prescriptions = Prescription.query.filter_by(user_id=user_id)
+            self.assertEqual(5 * 6, prescriptions.filter_by(dlc_left=False).count())
+            self.assertEqual(5, prescriptions.filter_by(dlc_left=True).count())
+
+    def test_deterministic(self):
+        seed_farms(cows=20, years=3, seed=42, until=UNTIL)
+        first = dump()
+        init_db_test()
+        seed_farms(cows=20, years=3, seed=42, until=UNTIL)
+        self.assertEqual(first, dump())
+        init_db_test()
+        seed_farms(cows=20, years=3, seed=43, until=UNTIL)
+        self.assertNotEqual(first, dump())
+
+    def test_model_invariants(self):
+        seed_farms(cows=50, years=5, cares_per_year=3, cycles=6, until=UNTIL)
+        for cow in Cow.query:
+            days = sorted(parse_date(c["date_traitement"]) for c in cow.cow_cares)
+            for i, day in enumerate(days):
+                window = [d for d in days[:i + 1] if day - d < timedelta(days=365)]
+                self.assertLessEqual(len(window), MAX_CARES_PER_YEAR)
+            self.assertTrue(all(day <= UNTIL for day in days))
+            # au plus une reproduction en cours, toujours la dernière
+            for reproduction in cow.reproduction[:-1]:
+                self.assertTrue(reproduction["calving"] or reproduction["ultrasound"] is False)
+
+    def test_lots_withdrawals_and_alerts(self):
+        user_id, = seed_farms(cows=100, calves=20, years=3, until=UNTIL)
+        lots = Lot.query.filter_by(user_id=user_id).all()
+        prescriptions = Prescription.query.filter_by(user_id=user_id, dlc_left=False).all()
+        self.assertEqual(sum(len(prescription.care) for prescription in prescriptions), len(lots))
+        # consommation FEFO : des lots entamés ou vides, d'autres encore pleins
+        self.assertTrue(any(lot.remaining < lot.quantity for lot in lots))
+        self.assertTrue(any(lot.remaining == lot.quantity for lot in lots))
+
+        catalog = MedicineUtils.get_catalog(user_id)
+        self.assertTrue(any(catalog.milk_withdrawals) and any(catalog.meat_withdrawals))
+        self.assertTrue(any(threshold is not None for threshold in catalog.thresholds))
+        for cow in Cow.query.filter_by(user_id=user_id):
+            ends = [care["fin_retrait_lait"] for care in cow.cow_cares if care["fin_retrait_lait"]]
+            self.assertEqual(max(ends, default=None),
+                             cow.milk_withdrawal_until and cow.milk_withdrawal_until.isoformat())
+
+        stock = PharmacieUtils.get_pharmacie_year(user_id, UNTIL.year).remaining_stock
+        low = {medicine_id for medicine_id, threshold in enumerate(catalog.thresholds)
+               if threshold is not None and stock.get(str(medicine_id), 0) <= threshold}
+        self.assertTrue(low)
+        self.assertEqual(low, {alert.medicine_id for alert in AlertUtils.get_open_alerts(user_id)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import importlib.util
+import runpy
+import socket
+import subprocess
+import tempfile
+import time
+import unittest
+import urllib.request
+from types import SimpleNamespace
+from unittest import mock
+
+from web_app import app, db
+from web_app.cache import SQLiteCache, cache
+
+ROOT = os.path.join(os.path.dirname(__file__), "../")
+
+
+class ResetAfterForkTests(unittest.TestCase):
+
+    def test_pool_is_emptied_without_closing_parent_connections(self):
+        from web_app.server import reset_after_fork
+        with app.app_context():
+            connection = db.engine.connect()
+            pool = db.engine.pool
+            reset_after_fork(app)
+            # l'ancienne connexion reste utilisable par son propriétaire
+            self.assertEqual(connection.exec_driver_sql("select 1").scalar(), 1)
+            connection.close()
+            self.assertIsNot(db.engine.pool, pool)
+
+    def test_cache_statistics_are_reset(self):
+        from web_app.server import reset_after_fork
+        cache.get("missing")
+        reset_after_fork(app)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_sqlite_cache_reopens_its_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteCache(os.path.join(directory, "cache.db"))
+            backend.set("key", b"value")
+            inherited = backend._conn
+            backend.reset()
+            self.assertIsNot(backend._conn, inherited)
+            self.assertEqual(backend.get("key"), b"value")
+            inherited.close()
+
+
+class GunicornConfigTests(unittest.TestCase):
+
+    def run_config(self) -> dict:
+        with mock.patch.dict(os.environ):
+            os.environ.pop("METRICS_DIR", None)
+            settings = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+        self.addCleanup(settings["on_exit"], None)
+        return settings
+
+    def test_settings_come_from_config(self):
+        settings = self.run_config()
+        from config import config
+        self.assertTrue(settings["preload_app"])
+        self.assertEqual(settings["workers"], config.WSGI_WORKERS)
+        self.assertEqual(settings["threads"], config.WSGI_THREADS)
+        self.assertEqual(settings["max_requests"], config.WSGI_MAX_REQUESTS)
+        self.assertTrue(callable(settings["post_fork"]))
+
+    def test_memory_cache_is_refused_with_several_workers(self):
+        settings = self.run_config()
+        with mock.patch.multiple(settings["_app_config"], CACHE_TYPE="memory",
+                                 LOG_ROTATION="watched"):
+            with self.assertRaisesRegex(RuntimeError, "CACHE_TYPE"):
+                settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=2)))
+            settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+
+
+    def test_worker_log_rotation_is_refused_with_several_workers(self):
+        settings = self.run_config()
+        for rotation in ("size", "time"):
+            with mock.patch.multiple(settings["_app_config"], CACHE_TYPE="sqlite",
+                                     LOG_ROTATION=rotation):
+                with self.assertRaisesRegex(RuntimeError, "LOG_ROTATION"):
+                    settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=2)))
+                settings["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+
+    def test_metrics_directory_is_created(self):
+        settings = self.run_config()
+        self.assertTrue(os.path.isdir(settings["_metrics_dir"]))
+        settings["on_exit"](None)
+        self.assertFalse(os.path.exists(settings["_metrics_dir"]))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@unittest.skipUnless(importlib.util.find_spec("gunicorn"), "gunicorn non installé")
+class GunicornTests(unittest.TestCase):
+    """Lance le serveur de production avec deux workers recyclés toutes les
+    trois requêtes."""
+
+    def test_workers_serve_and_recycle(self):
+        port = free_port()
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ,
+                       DATABASE_URL=f"sqlite:///{os.path.join(directory, 'app.db')}",
+                       CACHE_URL=os.path.join(directory, "cache.db"),
+                       METRICS_DIR=os.path.join(directory, "metrics"),
+                       WEB_CONCURRENCY="2", WSGI_MAX_REQUESTS="3",
+                       WSGI_MAX_REQUESTS_JITTER="0",
+                       WSGI_BIND=f"127.0.0.1:{port}")
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                 "wsgi:application"],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True)
+            try:
+                statuses = []
+                deadline = time.monotonic() + 20
+                while len(statuses) < 10 and time.monotonic() < deadline:
+                    try:
+                        with urllib.request.urlopen(f"http://127.0.0.1:{port}/login",
+                                                    timeout=5) as response:
+                            statuses.append(response.status)
+                    except OSError:
+                        time.sleep(0.2)
+            finally:
+                server.terminate()
+                output = server.communicate(timeout=30)[0]
+            self.assertEqual(statuses, [200] * 10, output)
+            self.assertIn("Autorestarting worker", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
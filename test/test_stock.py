@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date
+
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieAttr, PharmacieUtils
+from web_app.models.stock import StockVector
+from web_app.models.type_dict import Traitement
+from web_app.models.user import UserUtils
+
+
+class StockVectorTests(unittest.TestCase):
+    def test_round_trip(self):
+        stored = {"3": 2, "0": 5}
+        vector = StockVector.from_stored(stored)
+        self.assertEqual([5, 0, 0, 2], vector.values.tolist())
+        self.assertEqual(stored, vector.to_stored())
+        self.assertEqual({}, StockVector.from_stored({}).to_stored())
+
+    def test_arithmetic_keeps_negatives(self):
+        stock = StockVector([5, 1])
+        used = StockVector([2, 3, 1])
+        self.assertEqual(StockVector([3, -2, -1]), stock - used)
+        self.assertEqual(StockVector([7, 4, 1]), stock + used)
+        self.assertEqual(StockVector([-5, -1]), -stock)
+        self.assertFalse((stock - used).is_valid())
+        self.assertTrue(stock.is_valid())
+
+    def test_shortfalls_only_cover_removed_medicines(self):
+        stock = StockVector([5, -1, 0])
+        self.assertEqual({}, stock.shortfalls(StockVector([-5, 2])))
+        self.assertEqual({0: 1, 2: 3}, stock.shortfalls(StockVector([-6, 0, -3])))
+
+
+class PharmacieStockTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com", password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "spasfon", "cp")
+        self.year = date.today().year
+        for year in range(self.year - 2, self.year + 1):
+            PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+                self.user_id, year, remaining_stock={"0": 10}, total_enter={},
+                total_used={}, total_used_calf={}, total_out_dlc={}, total_out={}))
+        self.user = ConnectedUser(UserUtils.get_user(self.user_id))
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def stocks(self) -> list[dict[str, int]]:
+        return [dict(PharmacieUtils.get_pharmacie_year(self.user_id, year).remaining_stock)
+                for year in range(self.year - 2, self.year + 1)]
+
+    def test_modification_cascades_to_following_years(self):
+        PharmacieUtils.modify_pharmacie_year(self.user_id, self.year - 2,
+                                             PharmacieAttr.total_used_calf, {"0": 4})
+        self.assertEqual([{"0": 6}] * 3, self.stocks())
+        pharmacie = PharmacieUtils.get_pharmacie_year(self.user_id, self.year - 2)
+        self.assertEqual(({"0": 4}, {"0": 4}, {"0": 4}),
+                         (pharmacie.total_used_calf, pharmacie.total_used, pharmacie.total_out))
+
+    def test_shortfall_is_refused_without_partial_write(self):
+        with self.assertRaises(ValueError) as context:
+            PharmacieUtils.modify_pharmacie_year(self.user_id, self.year - 1,
+                                                 PharmacieAttr.total_out_dlc, {"0": 11, "1": 1})
+        self.assertIn("doliprane (manque 1)", str(context.exception))
+        self.assertEqual([{"0": 10}] * 3, self.stocks())
+        self.assertFalse(PharmacieUtils.validat_quantity(self.user_id, {"1": -1}, self.year - 1))
+        self.assertTrue(PharmacieUtils.validat_quantity(self.user_id, {"0": -10}, self.year - 1))
+
+    def test_missing_year_is_refused(self):
+        db.session.delete(PharmacieUtils.get_pharmacie_year(self.user_id, self.year - 1))
+        db.session.commit()
+        with self.assertRaises(ValueError) as context:
+            PharmacieUtils.modify_pharmacie_year(self.user_id, self.year - 2,
+                                                 PharmacieAttr.total_used, {"0": 4})
+        self.assertEqual(f"{self.year - 1} doesn't exist.", str(context.exception))
+        self.assertEqual({"0": 10}, PharmacieUtils.get_pharmacie_year(
+            self.user_id, self.year - 2).remaining_stock)
+
+    def test_care_updates_credit_the_stock(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        care = Traitement(date_traitement=date.today().isoformat(),
+                          medicaments={"doliprane": 6}, annotation="", id=0)
+        self.user.cow_utils.add_cow_care(1, care)
+        self.assertEqual({"0": 4}, self.stocks()[-1])
+
+        self.user.cow_utils.update_cow_care(1, 0, {**care, "medicaments": {"doliprane": 2}})
+        self.assertEqual({"0": 8}, self.stocks()[-1])
+
+        self.user.cow_utils.delete_cow_care(1, 0)
+        self.assertEqual({"0": 10}, self.stocks()[-1])
+
+    def test_remaining_stock_reports_shortfalls(self):
+        CowUtils.add_cow(user_id=self.user_id, cow_id=1)
+        cow = CowUtils.get_cow(self.user_id, 1)
+        cow.cow_cares = [{"date_traitement": date.today().isoformat(),
+                          "medicaments": {"0": 12}, "annotation": "", "id": 0}]
+        db.session.commit()
+        self.assertEqual({"0": -2}, self.user.remaining_pharmacie_stock(self.year))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from web_app import app, db
+from web_app.models import init_db_test
+from web_app.models.cow import Cow, CowUtils
+from web_app.models.type_dict import Traitement
+from web_app.storage import retry_on_lock
+from test_fonction import init_user
+
+
+class SQLiteProfileTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_pragmas(self):
+        with db.engine.connect() as connection:
+            def pragma(name):
+                return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+            self.assertEqual("wal", pragma("journal_mode"))
+            self.assertEqual(1, pragma("synchronous"))  # NORMAL
+            self.assertEqual(1, pragma("foreign_keys"))
+            self.assertEqual(5000, pragma("busy_timeout"))
+            self.assertEqual(-64000, pragma("cache_size"))
+
+    def test_retry_on_lock(self):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("UPDATE", {}, Exception("database is locked"))
+            return "done"
+
+        self.assertEqual("done", write())
+        self.assertEqual(3, len(calls))
+
+    def test_no_retry_on_other_errors(self):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            raise OperationalError("UPDATE", {}, Exception("no such table: cow"))
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(1, len(calls))
+
+
+class OptimisticConcurrencyTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        init_user(1)
+        CowUtils.add_cow(user_id=1, cow_id=1)
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    @staticmethod
+    def care(day: str) -> Traitement:
+        return Traitement(date_traitement=day, medicaments={"Doliprane": 1},
+                          annotation="")
+
+    def concurrent_add_care(self, day: str) -> None:
+        """Ajoute un traitement depuis une autre session, comme le ferait un
+        second worker."""
+        with Session(db.engine) as other:
+            cow = other.get(Cow, {"user_id": 1, "cow_id": 1})
+            cow.cow_cares.append(self.care(day))
+            other.commit()
+
+    def test_version_incremented(self):
+        version = CowUtils.get_cow(1, 1).version
+        CowUtils.add_cow_care(1, 1, self.care("2025-01-01"))
+        self.assertEqual(version + 1, CowUtils.get_cow(1, 1).version)
+
+    def test_concurrent_edit_is_not_lost(self):
+        cow = CowUtils.get_cow(1, 1)
+        self.assertEqual([], cow.cow_cares)  # état lu avant l'autre écriture
+
+        self.concurrent_add_care("2025-01-01")
+        CowUtils.add_care(cow, self.care("2025-01-02"))
+
+        db.session.expire_all()
+        self.assertEqual(["2025-01-01", "2025-01-02"],
+                         [care["date_traitement"]
+                          for care in CowUtils.get_cow(1, 1).cow_cares])
+
+    def test_bounded_retry(self):
+        cow = CowUtils.get_cow(1, 1)
+        self.assertEqual([], cow.cow_cares)
+        attempts = []
+
+        def always_conflicting(*args):
+            attempts.append(1)
+            raise StaleDataError("concurrent update")
+
+        original = db.session.commit
+        db.session.commit = always_conflicting
+        try:
+            with self.assertRaises(StaleDataError):
+                CowUtils.add_care(cow, self.care("2025-01-02"))
+        finally:
+            db.session.commit = original
+        self.assertEqual(app.config["OPTIMISTIC_LOCK_RETRIES"] + 1, len(attempts))
+
+    def dates(self) -> list[str]:
+        db.session.expire_all()
+        return [care["date_traitement"] for care in CowUtils.get_cow(1, 1).cow_cares]
+
+    def test_index_still_on_target_is_retried(self):
+        CowUtils.add_cow_care(1, 1, self.care("2025-01-01"))
+        cow = CowUtils.get_cow(1, 1)
+        self.assertEqual(1, len(cow.cow_cares))  # état lu avant l'autre écriture
+
+        self.concurrent_add_care("2025-01-02")
+        CowUtils.delete_cow_care(1, 1, 0)
+        self.assertEqual(["2025-01-02"], self.dates())
+
+    def test_index_moved_by_concurrent_write_is_not_retried(self):
+        CowUtils.add_cow_care(1, 1, self.care("2025-01-02"))
+        cow = CowUtils.get_cow(1, 1)
+        self.assertEqual(1, len(cow.cow_cares))  # état lu avant l'autre écriture
+
+        with Session(db.engine) as other:
+            concurrent = other.get(Cow, {"user_id": 1, "cow_id": 1})
+            concurrent.cow_cares.insert(0, self.care("2025-01-01"))
+            other.commit()
+        with self.assertRaises(StaleDataError):
+            CowUtils.update_cow_care(1, 1, 0, self.care("2025-03-01"))
+        self.assertEqual(["2025-01-01", "2025-01-02"], self.dates())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os
+import sys
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "../"))
+
+import unittest
+import warnings
+
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from web_app import app, db
+from web_app.connnected_user_web.connected_user import ConnectedUser
+from web_app.models import init_db_test
+from web_app.models.cow import CowUtils
+from web_app.models.medicine import MedicineUtils
+from web_app.models.pharmacie import Pharmacie, PharmacieUtils
+from web_app.models.type_dict import Traitement
+from web_app.models.user import UserUtils
+
+
+class WithdrawalTests(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter("ignore")
+        self.app_context = app.app_context()
+        self.app_context.push()
+        init_db_test()
+        UserUtils.add_user(email="user@mail.com", password=generate_password_hash("pwd"))
+        self.user_id = UserUtils.get_user_by_email("user@mail.com").id
+        MedicineUtils.add_medicine(self.user_id, "doliprane", "ml")
+        MedicineUtils.add_medicine(self.user_id, "metacam", "ml")
+        MedicineUtils.set_withdrawal(self.user_id, "metacam", milk_days=5, meat_days=15)
+        self.today = date.today()
+        PharmacieUtils.updateOrDefault_pharmacie_year(self.user_id, Pharmacie(
+            self.user_id, self.today.year, remaining_stock={"0": 100, "1": 100},
+            total_enter={}, total_used={}, total_used_calf={}, total_out_dlc={}, total_out={}))
+        for cow_id in (1, 2, 3):
+            CowUtils.add_cow(user_id=self.user_id, cow_id=cow_id)
+        self.user = ConnectedUser(UserUtils.get_user(self.user_id))
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def care(self, days_ago: int, **medicaments: int) -> Traitement:
+        return Traitement(date_traitement=(self.today - timedelta(days=days_ago)).isoformat(),
+                          medicaments=medicaments, annotation="", id=0)
+
+    def under_withdrawal(self) -> list[tuple[int, date | None, date | None]]:
+        return [(cow.cow_id, cow.milk_withdrawal_until, cow.meat_withdrawal_until)
+                for cow in self.user.cow_utils.get_under_withdrawal()]
+
+    def test_care_stores_withdrawal_ends(self):
+        self.user.cow_utils.add_cow_care(1, self.care(2, metacam=1, doliprane=1))
+        care = CowUtils.get_care_by_id(self.user_id, 1)[0]
+        self.assertEqual((self.today + timedelta(days=3)).isoformat(), care["fin_retrait_lait"])
+        self.assertEqual((self.today + timedelta(days=13)).isoformat(), care["fin_retrait_viande"])
+
+        self.user.cow_utils.add_cow_care(2, self.care(0, doliprane=1))
+        self.assertIsNone(CowUtils.get_care_by_id(self.user_id, 2)[0]["fin_retrait_lait"])
+
+    def test_under_withdrawal_list_follows_care_writes(self):
+        self.user.cow_utils.add_cow_care(1, self.care(10, metacam=1))
+        self.user.cow_utils.add_cow_care(2, self.care(1, metacam=1))
+        self.user.cow_utils.add_cow_care(3, self.care(30, metacam=1))
+        self.assertEqual([(1, self.today - timedelta(days=5), self.today + timedelta(days=5)),
+                          (2, self.today + timedelta(days=4), self.today + timedelta(days=14))],
+                         self.under_withdrawal())
+
+        self.user.cow_utils.update_cow_care(2, 0, self.care(1, doliprane=1))
+        self.user.cow_utils.delete_cow_care(1, 0)
+        self.assertEqual([], self.under_withdrawal())
+
+    def test_period_change_refreshes_existing_cares(self):
+        self.user.cow_utils.add_cow_care(3, self.care(1, doliprane=1))
+        self.assertEqual([], self.under_withdrawal())
+        self.user.cow_utils.set_withdrawal("doliprane", milk_days=2, meat_days=0)
+        self.assertEqual([(3, self.today + timedelta(days=1), None)], self.under_withdrawal())
+        with self.assertRaises(ValueError):
+            self.user.cow_utils.set_withdrawal("aspirine", milk_days=2, meat_days=0)
+
+    def test_endpoint(self):
+        self.user.cow_utils.add_cow_care(2, self.care(0, metacam=1))
+        CowUtils.remove_cow(self.user_id, 2)
+        self.user.cow_utils.add_cow_care(1, self.care(0, metacam=1))
+        client = app.test_client()
+        client.post("/login", data={"email": "user@mail.com", "password": "pwd"})
+        result = client.get("/herd/under-withdrawal").get_json()
+        self.assertTrue(result["success"], result)
+        self.assertEqual([1], [cow["cow_id"] for cow in result["message"]])
+        self.assertEqual((self.today + timedelta(days=5)).isoformat(),
+                         result["message"][0]["milk_withdrawal_until"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 from datetime import timedelta
+import click
 from flask import Flask, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -13,9 +14,47 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object("config.config")
 
+    # One-pass JSON serialization (dates, rows, models), orjson when installed
+    from .json_provider import FarmJSONProvider
+    app.json = FarmJSONProvider(app)
+
+    # Application log written by a background thread, with rotation
+    from .logs import init_logging
+    init_logging(app)
+
     # Initialize extensions with app
     db.init_app(app)
 
+    from .storage import init_sqlite_profile
+    init_sqlite_profile(app)
+
+    from .cache import cache
+    cache.init_app(app)
+
+    # Track data versions used as ETag validators by conditional GETs
+    from .conditional import register_version_listeners
+    register_version_listeners()
+
+    # Per-request timing, SQL statement count and slow request/query log
+    from .instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    # Prometheus metrics (per-route latency histograms) exported at /metrics
+    from .metrics import init_metrics
+    init_metrics(app)
+
+    # gzip negotiated by Accept-Encoding, streamed bodies included
+    from .compression import init_compression
+    init_compression(app)
+
+    # Content-hashed static URLs served with immutable cache headers
+    from .assets import init_assets
+    init_assets(app)
+
+    # On-demand cProfile of live requests (no hook at all when disabled)
+    from .profiling import init_profiling
+    init_profiling(app)
+
     # Configure Flask-Login
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'  # type: ignore
@@ -73,6 +112,8 @@ def create_app():
     app.jinja_env.globals.update(remaining_care_on_year=remaining_care_on_year)
     app.jinja_env.globals.update(new_available_care=new_available_care)
 
+    register_commands(app)
+
     return app
 
 # Tell the app it is behind a reverse proxy (better for production)
@@ -87,10 +128,66 @@ def create_proxy_app():
     return app
 
 
-app = create_app()
-
-
-@app.cli.command("init_db")
-def init_db():
-    from .models import init_db
-    init_db()
+def __getattr__(name: str):
+    """Crée l'application au premier accès à `web_app.app`.
+
+    Importer le paquet (modèles, scripts, tests) ne construit plus
+    l'application : `flask --app web_app` et les serveurs WSGI appellent
+    `create_app()`, `from web_app import app` reste possible.
+    """
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def register_commands(app: Flask) -> None:
+    """Enregistre les commandes `flask init_db`, `flask migrate`,
+    `flask seed` et `flask stock-digest`."""
+
+    @app.cli.command("init_db")
+    def init_db():
+        from .models import init_db
+        init_db()
+
+    @app.cli.command("migrate")
+    def migrate():
+        """Met à niveau une base existante vers le schéma courant, sans perte
+        de données (catalogue de médicaments compris)."""
+        from .migration import migrate_database
+        changes = migrate_database()
+        click.echo("\n".join(changes) or "Database already up to date")
+
+    @app.cli.command("seed")
+    @click.option("--farms", default=1, show_default=True, help="Nombre de fermes.")
+    @click.option("--cows", default=100, show_default=True, help="Vaches par ferme.")
+    @click.option("--calves", default=20, show_default=True, help="Veaux par ferme.")
+    @click.option("--years", default=3, show_default=True, help="Années d'historique.")
+    @click.option("--cares-per-year", default=2, show_default=True,
+                  help="Traitements par vache et par an (3 au plus).")
+    @click.option("--cycles", default=3, show_default=True,
+                  help="Cycles de reproduction par vache.")
+    @click.option("--prescriptions", default=12, show_default=True,
+                  help="Ordonnances par ferme et par an.")
+    @click.option("--dlc-exits", default=2, show_default=True,
+                  help="Sorties pour péremption par ferme et par an.")
+    @click.option("--seed", default=0, show_default=True, help="Graine aléatoire.")
+    @click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Date de fin de l'historique (aujourd'hui par défaut).")
+    @click.option("--reset", is_flag=True, help="Réinitialise la base avant.")
+    def seed(reset: bool, until, **kwargs):
+        """Génère des fermes synthétiques pour les tests de charge."""
+        from .seed import seed_farms
+        if reset:
+            from .models import init_db
+            init_db()
+        user_ids = seed_farms(until=until.date() if until else None, **kwargs)
+        click.echo(f"{len(user_ids)} farms generated: users {user_ids[0]}..{user_ids[-1]}")
+
+    @app.cli.command("stock-digest")
+    def stock_digest():
+        """Envoie par courriel le résumé des nouvelles alertes de stock bas
+        (à planifier, par exemple une fois par jour)."""
+        from .digest import send_stock_digest
+        click.echo(f"{send_stock_digest(app)} digest(s) sent")
@@ -1,5 +1,4 @@
 import logging as lg
-import pandas as pd
 
 from datetime import datetime
 from flask import (
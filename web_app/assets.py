@@ -0,0 +1,87 @@
+import hashlib
+import os
+from typing import Any
+
+from flask import Flask, Response, request
+
+VERSION_ARG = "v"
+
+
+class AssetManifest:
+    """Empreintes du contenu des fichiers statiques, sans étape de build.
+
+    Chaque fichier est associé aux premiers caractères du hachage de son
+    contenu. Les empreintes sont calculées une fois au démarrage ; en mode
+    debug, un fichier modifié (date ou taille) est haché de nouveau.
+    """
+
+    def __init__(self, folder: str, reload: bool = False) -> None:
+        self.folder = folder
+        self.reload = reload
+        self.hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+    def build(self) -> dict[str, str]:
+        """Hache tous les fichiers du dossier statique et renvoie le
+        manifeste {chemin relatif: empreinte}."""
+        for directory, _, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.relpath(os.path.join(directory, name), self.folder)
+                self.get(path.replace(os.sep, "/"))
+        return {path: digest for path, (_, digest) in sorted(self.hashes.items())}
+
+    def get(self, filename: str) -> str | None:
+        """Renvoie l'empreinte d'un fichier statique, ou None s'il n'existe
+        pas."""
+        if (known := self.hashes.get(filename)) and not self.reload:
+            return known[1]
+        path = os.path.join(self.folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if known and known[0] == signature:
+            return known[1]
+        with open(path, "rb") as file:
+            digest = hashlib.file_digest(file, "sha256").hexdigest()[:12]
+        self.hashes[filename] = (signature, digest)
+        return digest
+
+
+def init_assets(app: Flask) -> None:
+    """Ajoute l'empreinte du contenu aux URL des fichiers statiques et les
+    sert avec un cache long et immuable.
+
+    `url_for('static', filename=...)` produit `/static/<fichier>?v=<empreinte>`
+    dans tous les templates. Une requête portant l'empreinte courante reçoit
+    `Cache-Control: public, max-age=ASSETS_MAX_AGE, immutable` : le navigateur
+    ne la revalide plus. Un déploiement qui modifie un fichier change son
+    empreinte, donc son URL. Les URL sans empreinte, ou avec une empreinte
+    périmée (imports CSS, pages en cache), restent revalidées.
+    """
+    if not app.config.get("ASSETS_FINGERPRINT", True) or app.static_folder is None:
+        return
+    manifest = AssetManifest(app.static_folder, reload=app.debug)
+    if not app.debug:
+        manifest.build()
+    app.extensions["assets"] = manifest
+    max_age = app.config.get("ASSETS_MAX_AGE", 365 * 24 * 3600)
+
+    @app.url_defaults
+    def add_asset_version(endpoint: str, values: dict[str, Any]) -> None:
+        if endpoint == "static" and VERSION_ARG not in values \
+                and (digest := manifest.get(values.get("filename", ""))):
+            values[VERSION_ARG] = digest
+
+    @app.after_request
+    def cache_versioned_asset(response: Response) -> Response:
+        if request.endpoint != "static" or response.status_code not in (200, 304):
+            return response
+        version = request.args.get(VERSION_ARG)
+        filename = (request.view_args or {}).get("filename", "")
+        if version and version == manifest.get(filename):
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
@@ -0,0 +1,448 @@
+import os
+import pickle
+import socket
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """Interface commune des backends de cache.
+
+    Les valeurs manipulées sont des octets ; la sérialisation est assurée par
+    `Cache`. Toutes les opérations doivent être sûres entre threads.
+    """
+
+    def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        """Enregistre la valeur uniquement si la clé est absente. Renvoie True
+        si la valeur a été enregistrée. L'opération est atomique."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """Incrémente atomiquement un compteur entier (créé à 0 si absent) et
+        renvoie sa nouvelle valeur."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Supprime toutes les entrées du cache."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Abandonne les ressources héritées du processus parent (connexions,
+        sockets). Appelé dans chaque worker juste après le fork."""
+
+
+class MemoryCache(CacheBackend):
+    """Cache LRU propre au processus, borné en nombre d'entrées."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+        self._lock = Lock()
+
+    def _get_unlocked(self, key: str) -> bytes | None:
+        if (item := self._data.get(key)) is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set_unlocked(self, key: str, value: bytes, ttl: float | None) -> None:
+        expires = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._get_unlocked(key)
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._set_unlocked(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        with self._lock:
+            if self._get_unlocked(key) is not None:
+                return False
+            self._set_unlocked(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._get_unlocked(key) or 0) + 1
+            self._set_unlocked(key, str(value).encode(), None)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def reset(self) -> None:
+        # le verrou hérité a pu être copié verrouillé par un autre thread
+        self._lock = Lock()
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stocké dans un fichier SQLite local, partagé par tous les
+    processus d'une même machine."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = Lock()
+        self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)")
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    @staticmethod
+    def _expires(ttl: float | None) -> float | None:
+        return time.time() + ttl if ttl else None
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) "
+                "VALUES (?, ?, ?)", (key, value, self._expires(ttl)))
+
+    def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                    (key, time.time()))
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO cache (key, value, expires) "
+                    "VALUES (?, ?, ?)", (key, value, self._expires(ttl)))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, '1', NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+                "RETURNING value", (key,)).fetchone()
+        return int(row[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def reset(self) -> None:
+        # une connexion SQLite ne doit pas être utilisée après un fork : elle
+        # est remplacée sans être fermée, le parent la possède encore
+        self._lock = Lock()
+        self._connect()
+
+
+class RedisCache(CacheBackend):
+    """Client minimal du protocole Redis (RESP2), sans dépendance externe.
+
+    Seules les commandes utilisées par le cache sont implémentées. La
+    connexion est rétablie automatiquement après une erreur réseau.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._lock = Lock()
+        self._sock: socket.socket | None = None
+        self._file: Any = None
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port),
+                                              timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", str(self.db))
+
+    def close(self) -> None:
+        """Ferme la connexion courante (elle sera rouverte au besoin)."""
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+    def _read_reply(self) -> Any:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connexion Redis fermée")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RuntimeError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            return None if size < 0 else self._file.read(size + 2)[:-2]
+        if kind == b"*":
+            size = int(payload)
+            return None if size < 0 else [self._read_reply() for _ in range(size)]
+        raise RuntimeError(f"réponse Redis inattendue : {line!r}")
+
+    def _call(self, *parts: str | bytes) -> Any:
+        chunks = [f"*{len(parts)}\r\n".encode()]
+        for part in parts:
+            data = part.encode() if isinstance(part, str) else part
+            chunks.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        assert self._sock is not None
+        self._sock.sendall(b"".join(chunks))
+        return self._read_reply()
+
+    def _command(self, *parts: str | bytes) -> Any:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call(*parts)
+                except (OSError, ConnectionError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    @staticmethod
+    def _ttl_args(ttl: float | None) -> tuple[str, ...]:
+        return ("PX", str(int(ttl * 1000))) if ttl else ()
+
+    def get(self, key: str) -> bytes | None:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self._command("SET", key, value, *self._ttl_args(ttl))
+
+    def add(self, key: str, value: bytes, ttl: float | None = None) -> bool:
+        return self._command("SET", key, value, *self._ttl_args(ttl), "NX") is not None
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def incr(self, key: str) -> int:
+        return self._command("INCR", key)
+
+    def clear(self) -> None:
+        # la base Redis configurée doit être dédiée à l'application
+        self._command("FLUSHDB")
+
+    def reset(self) -> None:
+        self._lock = Lock()
+        self.close()
+
+
+def make_backend(cache_type: str, url: str | None = None) -> CacheBackend:
+    """Construit le backend de cache correspondant à la configuration.
+
+    Arguments:
+        * cache_type (str): "memory", "sqlite" ou "redis"
+        * url (str | None): Chemin du fichier SQLite ou URL redis://
+
+    Lance:
+        * ValueError si le type de cache est inconnu
+    """
+    if cache_type == "memory":
+        return MemoryCache()
+    if cache_type == "sqlite":
+        return SQLiteCache(url or "cache.db")
+    if cache_type == "redis":
+        return RedisCache(url or "redis://localhost:6379/0")
+    raise ValueError(f"type de cache inconnu : {cache_type}")
+
+
+class Cache:
+    """Façade de cache partagée par l'application.
+
+    Les clés sont préfixées par l'espace de noms de l'utilisateur, les valeurs
+    sont sérialisées avec pickle et les calculs coûteux sont protégés contre
+    l'effet de ruée (un seul calcul concurrent par clé, y compris entre
+    processus lorsque le backend est partagé).
+    """
+
+    backend: CacheBackend
+    default_timeout: float
+    lock_timeout: float
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self.backend = MemoryCache()
+        self.default_timeout = 300
+        self.lock_timeout = 10
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app: Any) -> None:
+        """Configure le backend à partir de la configuration Flask
+        (CACHE_TYPE, CACHE_URL, CACHE_DEFAULT_TIMEOUT)."""
+        self.backend = make_backend(app.config.get("CACHE_TYPE", "memory"),
+                                    app.config.get("CACHE_URL"))
+        self.default_timeout = app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+        app.extensions["cache"] = self
+
+    @staticmethod
+    def namespace(user_id: int | None) -> str:
+        """Renvoie le préfixe de clé propre à un utilisateur."""
+        return "global" if user_id is None else f"u{user_id}"
+
+    def _key(self, user_id: int | None, key: str) -> str:
+        return f"{self.namespace(user_id)}:{key}"
+
+    def get(self, key: str, user_id: int | None = None) -> Any:
+        """Renvoie la valeur associée à la clé, ou None si elle est absente ou
+        expirée."""
+        if (raw := self.backend.get(self._key(user_id, key))) is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any, user_id: int | None = None,
+            ttl: float | None = None) -> None:
+        """Enregistre une valeur ; `ttl` vaut par défaut CACHE_DEFAULT_TIMEOUT."""
+        self.backend.set(self._key(user_id, key), pickle.dumps(value),
+                         self.default_timeout if ttl is None else ttl)
+
+    def delete(self, key: str, user_id: int | None = None) -> None:
+        self.backend.delete(self._key(user_id, key))
+
+    def clear(self) -> None:
+        """Vide le cache, par exemple après une réinitialisation de la base."""
+        self.backend.clear()
+
+    def reset_after_fork(self) -> None:
+        """Prépare le cache pour un nouveau worker : connexions du backend
+        rouvertes à la demande, statistiques remises à zéro."""
+        self.backend.reset()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       user_id: int | None = None,
+                       ttl: float | None = None) -> Any:
+        """Renvoie la valeur en cache ou la calcule, en garantissant qu'un
+        seul appelant calcule une même clé à la fois.
+
+        Les autres appelants attendent la fin du calcul (au plus
+        `lock_timeout` secondes) avant de calculer eux-mêmes la valeur.
+        """
+        full_key = self._key(user_id, key)
+        if (raw := self.backend.get(full_key)) is not None:
+            self.hits += 1
+            return pickle.loads(raw)
+        self.misses += 1
+
+        lock_key = f"{full_key}:lock"
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.backend.add(lock_key, b"1", self.lock_timeout):
+            time.sleep(0.02)
+            if (raw := self.backend.get(full_key)) is not None:
+                return pickle.loads(raw)
+            if time.monotonic() >= deadline:
+                return compute()
+        try:
+            value = compute()
+            self.backend.set(full_key, pickle.dumps(value),
+                             self.default_timeout if ttl is None else ttl)
+            return value
+        finally:
+            self.backend.delete(lock_key)
+
+    def get_version(self, user_id: int, scope: str) -> int:
+        """Renvoie la version d'un domaine de données d'un utilisateur.
+
+        Une version absente est initialisée à une valeur aléatoire, afin
+        qu'une perte du cache ne fasse jamais réapparaître une ancienne
+        version.
+        """
+        key = self._key(user_id, f"version:{scope}")
+        if (raw := self.backend.get(key)) is None:
+            self.backend.add(key, str(int.from_bytes(os.urandom(6))).encode())
+            raw = self.backend.get(key)
+        return int(raw or 0)
+
+    def bump_version(self, user_id: int, scope: str) -> int:
+        """Incrémente la version d'un domaine de données d'un utilisateur."""
+        self.get_version(user_id, scope)
+        return self.backend.incr(self._key(user_id, f"version:{scope}"))
+
+    def memoize(self, *scopes: str, ttl: float | None = None) -> Callable:
+        """Décorateur mettant en cache le résultat d'une fonction par
+        utilisateur, invalidé dès qu'un des domaines fournis change.
+
+        L'utilisateur est lu dans l'argument nommé `user_id`, ou à défaut dans
+        le premier argument : entier, ou instance portant un attribut
+        `user_id` ou `id` (méthodes).
+        """
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                user_id = kwargs.get("user_id")
+                key_args = args
+                if user_id is None and args:
+                    if isinstance(args[0], int):
+                        user_id = args[0]
+                    else:
+                        # méthode : l'utilisateur est porté par l'instance
+                        user_id = getattr(args[0], "user_id",
+                                          getattr(args[0], "id", None))
+                        key_args = args[1:]
+                versions = ",".join(str(self.get_version(user_id, scope))
+                                    for scope in scopes)
+                key = (f"memo:{func.__module__}.{func.__qualname__}:"
+                       f"{versions}:{key_args!r}:{sorted(kwargs.items())!r}")
+                return self.get_or_compute(key, lambda: func(*args, **kwargs),
+                                           user_id=user_id, ttl=ttl)
+            return wrapper
+        return decorator
+
+
+cache = Cache()
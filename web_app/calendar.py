@@ -1,9 +1,13 @@
 from datetime import datetime
-from icalendar import Calendar, Event
+from typing import TYPE_CHECKING
+
+# icalendar n'est chargé qu'à la création des événements : import coûteux
+if TYPE_CHECKING:
+    from icalendar import Event
 
 from .models.cow import Cow
 
-def create_drying_event(date_obj: datetime, cows_ids: list[int]) -> Event:
+def create_drying_event(date_obj: datetime, cows_ids: list[int]) -> "Event":
     """Créée un événement iCalendar pour le tarissement des vaches.
 
     Cette fonction créée un événement iCalendar à la date fourni en argument
@@ -16,6 +20,8 @@ def create_drying_event(date_obj: datetime, cows_ids: list[int]) -> Event:
     Renvoie:
         * icalendar.Event
     """
+    from icalendar import Event
+
     event = Event()
     event.add("summary", f"{len(cows_ids)} Tarissement")
     event.add("dtstart", date_obj)
@@ -31,7 +37,7 @@ def create_drying_event(date_obj: datetime, cows_ids: list[int]) -> Event:
 
     return event
 
-def create_calving_preparation_event(date_obj: datetime, cows_ids: list[int]) -> Event:
+def create_calving_preparation_event(date_obj: datetime, cows_ids: list[int]) -> "Event":
     """Créée un événement iCalendar pour le tarissement des vaches.
 
     Cette fonction créée un événement iCalendar à la date fourni en argument
@@ -45,6 +51,8 @@ def create_calving_preparation_event(date_obj: datetime, cows_ids: list[int]) ->
     Renvoie:
         * icalendar.Event
     """
+    from icalendar import Event
+
     event = Event()
     event.add("summary", f"{len(cows_ids)} Préparation au vêlage")
     event.add("dtstart", date_obj)
@@ -60,7 +68,7 @@ def create_calving_preparation_event(date_obj: datetime, cows_ids: list[int]) ->
 
     return event
 
-def create_calving_event(date_obj: datetime, cows_ids: list[int]) -> Event:
+def create_calving_event(date_obj: datetime, cows_ids: list[int]) -> "Event":
     """Créée un événement iCalendar pour le vêlage des vaches.
 
     Cette fonction créée un événement iCalendar à la date fourni en argument
@@ -74,6 +82,8 @@ def create_calving_event(date_obj: datetime, cows_ids: list[int]) -> Event:
     Renvoie:
         * icalendar.Event
     """
+    from icalendar import Event
+
     event = Event()
     event.add("summary", f"{len(cows_ids)} Vêlage")
     event.add("dtstart", date_obj)
@@ -89,7 +99,7 @@ def create_calving_event(date_obj: datetime, cows_ids: list[int]) -> Event:
 
     return event
 
-def event_to_fullcalendar(event : Event, color: str):
+def event_to_fullcalendar(event : "Event", color: str):
     return {
         "title": str(event.get("summary")),
 
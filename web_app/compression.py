@@ -0,0 +1,86 @@
+import gzip
+import zlib
+from typing import Any, Iterable, Iterator
+
+from flask import Flask, Response, request
+
+# Formats textuels, très répétitifs, qui gagnent à être compressés. Les
+# formats déjà compressés (xlsx, zip, images...) n'en font pas partie.
+DEFAULT_MIMETYPES: tuple[str, ...] = (
+    "application/json", "application/javascript", "text/javascript",
+    "text/html", "text/css", "text/plain", "text/csv", "text/calendar",
+    "image/svg+xml",
+)
+
+
+def _settings(app: Flask, blueprint: str | None) -> dict[str, Any]:
+    """Réglages de compression de la requête : ceux de l'application,
+    remplacés par ceux du blueprint dans `COMPRESS_BLUEPRINTS`."""
+    settings = {
+        "enabled": True,
+        "level": app.config.get("COMPRESS_LEVEL", 6),
+        "min_size": app.config.get("COMPRESS_MIN_SIZE", 500),
+        "mimetypes": app.config.get("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES),
+    }
+    settings.update(app.config.get("COMPRESS_BLUEPRINTS", {}).get(blueprint or "", {}))
+    return settings
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    """Compresse au fil de l'eau un corps de réponse itérable, sans le
+    charger entièrement en mémoire."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+def init_compression(app: Flask) -> None:
+    """Compresse en gzip les réponses textuelles lorsque le client l'accepte
+    (`Accept-Encoding`).
+
+    Les réponses plus petites que `COMPRESS_MIN_SIZE` octets sont envoyées
+    telles quelles ; les réponses en flux (exports, fichiers) sont compressées
+    au fil de l'eau. Seuls les types de `COMPRESS_MIMETYPES` sont concernés.
+    `COMPRESS_BLUEPRINTS` remplace ces réglages pour un blueprint, par exemple
+    `{"auth": {"enabled": False}, "herd": {"level": 9}}` (le blueprint ""
+    désigne les fichiers statiques).
+    """
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        settings = _settings(app, request.blueprint)
+        if (not settings["enabled"] or response.status_code != 200
+                or response.mimetype not in settings["mimetypes"]
+                or "Content-Encoding" in response.headers):
+            return response
+        # la représentation dépend de l'en-tête, y compris pour les caches
+        response.vary.add("Accept-Encoding")
+        if not request.accept_encodings["gzip"]:
+            return response
+
+        if response.is_streamed:
+            if response.content_length is not None \
+                    and response.content_length < settings["min_size"]:
+                return response
+            if callable(close := getattr(response.response, "close", None)):
+                response.call_on_close(close)
+            response.response = gzip_stream(response.iter_encoded(), settings["level"])
+            response.direct_passthrough = False
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < settings["min_size"]:
+                return response
+            response.set_data(gzip.compress(data, settings["level"], mtime=0))
+
+        response.content_encoding = "gzip"
+        # les plages d'octets porteraient sur le contenu compressé
+        response.headers.pop("Accept-Ranges", None)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
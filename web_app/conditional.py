@@ -0,0 +1,139 @@
+import hashlib
+import re
+from datetime import date
+from functools import wraps
+from typing import Any, Callable
+
+from flask import Response, make_response, request, session
+from flask_login import current_user  # type: ignore
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import cache
+
+# Correspondance table SQL -> domaine de données versionné
+SCOPE_BY_TABLE: dict[str, str] = {
+    "cow": "cow",
+    "lot": "lot",
+    "medicine": "medicine",
+    "pharmacie": "pharmacie",
+    "prescription": "prescription",
+    "stock_alert": "alert",
+    "users": "user",
+}
+
+
+# Réponse d'échec renvoyée avec le statut 200 ({"success": false, ...}) ;
+# "success" est toujours la première clé des charges de ce dépôt
+_FAILURE_PREFIX = re.compile(rb'\{\s*"success"\s*:\s*false')
+
+
+def _is_failure(response: Response) -> bool:
+    """Indique si une réponse 200 porte une charge d'échec, en n'examinant que
+    le début du corps."""
+    if response.is_streamed or not response.is_json:
+        return False
+    return _FAILURE_PREFIX.match(response.get_data()[:64]) is not None
+
+
+def _scope_of(obj: Any) -> tuple[int, str] | None:
+    """Renvoie le couple (utilisateur, domaine) d'une instance ORM, ou None si
+    l'instance n'appartient à aucun domaine versionné."""
+    scope = SCOPE_BY_TABLE.get(getattr(obj, "__tablename__", ""))
+    if scope is None:
+        return None
+    user_id = obj.id if scope == "user" else getattr(obj, "user_id", None)
+    return None if user_id is None else (user_id, scope)
+
+
+def _collect_dirty_scopes(session: Session, flush_context: Any, instances: Any) -> None:
+    pending: set[tuple[int, str]] = session.info.setdefault("dirty_scopes", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if key := _scope_of(obj):
+            pending.add(key)
+
+
+def _bump_dirty_scopes(session: Session) -> None:
+    for user_id, scope in session.info.pop("dirty_scopes", set()):
+        cache.bump_version(user_id, scope)
+
+
+def _drop_dirty_scopes(session: Session, previous_transaction: Any) -> None:
+    session.info.pop("dirty_scopes", None)
+
+
+def register_version_listeners() -> None:
+    """Branche le suivi des versions sur les sessions SQLAlchemy.
+
+    Les instances modifiées sont relevées à chaque flush ; les versions
+    correspondantes, stockées dans le cache partagé, ne sont incrémentées
+    qu'une fois la transaction validée. Une écriture faite hors de l'ORM doit
+    appeler `cache.bump_version` explicitement.
+    """
+    if event.contains(Session, "before_flush", _collect_dirty_scopes):
+        return
+    event.listen(Session, "before_flush", _collect_dirty_scopes)
+    event.listen(Session, "after_commit", _bump_dirty_scopes)
+    event.listen(Session, "after_soft_rollback", _drop_dirty_scopes)
+
+
+def compute_etag(user_id: int, scopes: tuple[str, ...]) -> str:
+    """Calcule un validateur faible pour la requête courante à partir des
+    versions des domaines dont dépend la réponse.
+
+    Arguments:
+        * user_id (int): Identifiant de l'utilisateur connecté
+        * scopes (tuple[str, ...]): Domaines de données lus par la vue
+
+    Renvoie:
+        * str: L'ETag de la réponse
+    """
+    versions = ",".join(f"{scope}:{cache.get_version(user_id, scope)}"
+                        for scope in scopes)
+    # la date du jour couvre les réponses dépendant de l'année en cours
+    raw = f"{date.today()}|{user_id}|{versions}|{request.full_path}"
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def conditional_response(*scopes: str) -> Callable:
+    """Décorateur de vue JSON gérant les requêtes GET conditionnelles.
+
+    La vue décorée reçoit un ETag dérivé des versions des domaines fournis.
+    Si le client présente ce même ETag (`If-None-Match`), une réponse 304 est
+    renvoyée sans exécuter la vue, donc sans interroger ni sérialiser les
+    données.
+
+    Les charges d'échec (`{"success": False, ...}`), renvoyées avec le statut
+    200, ne reçoivent pas d'ETag : une erreur passagère n'est pas servie en
+    304 jusqu'au prochain changement de version.
+
+    Arguments:
+        * scopes (str): Domaines de données lus par la vue
+
+    Renvoie:
+        * Callable: Le décorateur à appliquer sous `route`
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # L'identifiant est lu dans la session signée pour ne pas
+            # déclencher le chargement de l'utilisateur en base
+            if (user_id := session.get("_user_id")) is None:
+                if current_user.is_anonymous:
+                    return view(*args, **kwargs)
+                user_id = current_user.id
+
+            etag = compute_etag(int(user_id), scopes)
+            if request.if_none_match.contains_weak(etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(etag, weak=True)
+                not_modified.headers["Cache-Control"] = "private, no-cache"
+                return not_modified
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not _is_failure(response):
+                response.set_etag(etag, weak=True)
+                response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
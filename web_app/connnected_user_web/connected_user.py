@@ -2,27 +2,40 @@ import csv
 from enum import Enum
 import io
 from flask_login import UserMixin
-import openpyxl
-from openpyxl.styles import Font, PatternFill
 
 
 from web_app.connnected_user_web.connected_user_dependences_web.CowUtils_user import CowUtilsUser
 from web_app.connnected_user_web.connected_user_dependences_web.PrescriptionUtils_user import PrescriptionUtilsUser
-from web_app.fonction import date_to_str, day_delta, new_available_care, parse_date, remaining_care_on_year
+from web_app.fonction import date_to_str, day_delta, my_strftime, new_available_care, parse_date, remaining_care_on_year
+from ..cache import cache
+from ..history import (
+    HISTORY_EVENT_TYPES,
+    HistoryKey,
+    batched_source,
+    decode_cursor,
+    merge_sources,
+    take_page
+)
 from ..models.type_dict import (
+    Lot_export_format,
     Pharma_list_event,
     Prescription_export_format,
     Setting,
+    Stock_alert_format,
     Traitement,
     Traitement_signe
 )
 
+from ..models.alert import AlertUtils
+from ..models.lot import LotUtils
+from ..models.medicine import MedicineCatalog, MedicineUtils
 from ..models.user import Users, UserUtils
 from ..models.cow import CowUtils, Cow
 from ..models.prescription import PrescriptionUtils, Prescription
 from ..models.pharmacie import PharmacieUtils, Pharmacie
-from collections import Counter
-from datetime import date
+from ..models.stock import StockVector
+from datetime import date, timedelta
+from typing import Iterator
 import logging as lg
 #  TODO retire les usage de CowUtils et PrescriptionUtils dans les fonctions de ConnectedUser et délégue à CowUtilsUser et PrescriptionUtilsUser
 
@@ -30,7 +43,6 @@ class ConnectedUser(UserMixin):
     email: str
     password: str
     setting: Setting
-    medic_list : dict
     id: int
     
     cow_utils : "CowUtilsUser"
@@ -43,7 +55,6 @@ class ConnectedUser(UserMixin):
         self.password = user.password
         self.setting = user.setting
         self.id = user.id
-        self.medic_list = user.medic_list
         self.cow_utils = CowUtilsUser(self)
         self.prescription_utils = PrescriptionUtilsUser(self)
         
@@ -66,6 +77,17 @@ class ConnectedUser(UserMixin):
         self.setting["calving_preparation_time"] = calving_preparation
         self.cow_utils.reload_all_reproduction()
 
+    @property
+    def catalog(self) -> MedicineCatalog:
+        """Catalogue de médicaments de l'utilisateur, mis en cache jusqu'au
+        prochain ajout."""
+        return MedicineUtils.get_catalog(self.id)
+
+    @property
+    def medic_list(self) -> dict[str, str]:
+        """Médicaments de la pharmacie et leurs unités, {<nom>: <unité>}."""
+        return self.catalog.units_by_name()
+
     def add_medic_in_pharma_list(self, medic: str, mesur: str) -> None:
         """Ajoute un médicament à la liste de pharmacie de l'utilisateur connecté.
 
@@ -79,6 +101,42 @@ class ConnectedUser(UserMixin):
         """
         UserUtils.add_medic_in_pharma_list(
             self.id, medic=medic, mesur=mesur)
+
+    def set_reorder_threshold(self, medic: str, threshold: int | None) -> None:
+        """Sets the reorder threshold of a medicine and updates its low stock alert against the current stock.
+
+        Args:
+            medic (str): The medicine name.
+            threshold (int | None): The threshold, None to stop tracking the medicine.
+
+        Raises:
+            ValueError: If the medicine is not in the pharmacy or the threshold is negative.
+        """
+        medicine_id = MedicineUtils.set_threshold(user_id=self.id, name=medic, threshold=threshold)
+        if threshold is None:
+            AlertUtils.resolve(user_id=self.id, medicine_id=medicine_id)
+            return
+        try:
+            pharmacie = PharmacieUtils.get_pharmacie_year(user_id=self.id, year=date.today().year)
+        except ValueError:
+            # pas encore de stock pour l'année
+            return
+        AlertUtils.refresh(user_id=self.id, stock=pharmacie.remaining_stock,
+                           medicine_ids=[medicine_id])
+
+    def get_stock_alerts(self) -> list[Stock_alert_format]:
+        """Lists the open low stock alerts, maintained on every stock movement.
+
+        Returns:
+            list[Stock_alert_format]: The alerts, medicines designated by name.
+        """
+        catalog = self.catalog
+        return [Stock_alert_format(medicament=catalog.names[alert.medicine_id],
+                                   unit=catalog.units[alert.medicine_id],
+                                   stock=alert.stock,
+                                   threshold=alert.threshold,
+                                   raised_at=my_strftime(alert.raised_at.date()))
+                for alert in AlertUtils.get_open_alerts(user_id=self.id)]
     
     def nb_cares_years(self, cow_id: int) -> int:
         """Compte le nombre de traitements administrés à une vache au cours de
@@ -109,7 +167,7 @@ class ConnectedUser(UserMixin):
             list[str]: A list of medication names.
         """
 
-        return list(UserUtils.get_pharma_list(user_id=self.id))
+        return list(self.catalog.names)
 
     def get_pharma_len(self) -> int:
         """Returns the number of medication available in the pharmacy.
@@ -133,15 +191,13 @@ class ConnectedUser(UserMixin):
             year (int): The year to sum medication prescriptions for.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their total prescribed quantities for the year.
+            dict[str, int]: A dictionary mapping medication IDs to their total prescribed quantities for the year.
         """
-
-        res = {f"{x}": 0 for x in self.get_pharma_list()}
+        total = StockVector.zeros(len(self.catalog))
         prescription: Prescription
         for prescription in PrescriptionUtils.get_year_prescription(user_id=self.id, year=year):
-            for medic, quantity in prescription.care.items():
-                res[medic] += quantity
-        return res
+            total.add_stored(prescription.care)
+        return total.to_stored()
 
     def sum_pharmacie_used(self, year: int) -> dict[str, int]:
         """Sums the quantities of each medication actually used (administered to cows) in a given year.
@@ -152,14 +208,13 @@ class ConnectedUser(UserMixin):
             year (int): The year to sum medication usage for.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their total used quantities for the year.
+            dict[str, int]: A dictionary mapping medication IDs to their total used quantities for the year.
         """
-        res = {f"{x}": 0 for x in self.get_pharma_list()}
+        total = StockVector.zeros(len(self.catalog))
         cow_care: Traitement
         for cow_care in CowUtils.get_care_on_year(user_id=self.id, year=year):
-            for medic, quantity in cow_care["medicaments"].items():
-                res[medic] += quantity
-        return res
+            total.add_stored(cow_care["medicaments"])
+        return total.to_stored()
 
     def sum_calf_used(self, year: int) -> dict[str, int]:
         """Sums the quantities of each medication used for calves in a given year.
@@ -170,15 +225,13 @@ class ConnectedUser(UserMixin):
             year (int): The year to sum medication usage for calves.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their total used quantities for calves in the year.
+            dict[str, int]: A dictionary mapping medication IDs to their total used quantities for calves in the year.
         """
-        res = {str(x): 0 for x in self.get_pharma_list()}
+        total = StockVector.zeros(len(self.catalog))
         cow_care: Traitement
         for cow_care in CowUtils.get_calf_care_on_year(user_id=self.id, year=year):
-            lg.info(cow_care)
-            for medic, quantity in cow_care["medicaments"].items():
-                res[medic] += quantity
-        return res
+            total.add_stored(cow_care["medicaments"])
+        return total.to_stored()
 
     def sum_dlc_left(self, year: int) -> dict[str, int]:
         """Sums the quantities of each medication removed due to expired shelf life (DLC) in a given year.
@@ -189,14 +242,13 @@ class ConnectedUser(UserMixin):
             year (int): The year to sum medication removals for expired DLC.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their total quantities removed due to expired DLC for the year.
+            dict[str, int]: A dictionary mapping medication IDs to their total quantities removed due to expired DLC for the year.
         """
-        res = {f"{x}": 0 for x in self.get_pharma_list()}
+        total = StockVector.zeros(len(self.catalog))
         cow_care: Prescription
         for cow_care in PrescriptionUtils.get_dlc_left_on_year(user_id=self.id, year=year):
-            for medic, quantity in cow_care.care.items():
-                res[medic] += quantity
-        return res
+            total.add_stored(cow_care.care)
+        return total.to_stored()
 
     def sum_pharmacie_left(self, year: int) -> dict[str, int]:
         """Sums all medications taken out of the pharmacy cabinet in a given year.
@@ -207,63 +259,163 @@ class ConnectedUser(UserMixin):
             year (int): The year to sum all medication removals from the pharmacy.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their total quantities taken out of the pharmacy for the year.
+            dict[str, int]: A dictionary mapping medication IDs to their total quantities taken out of the pharmacy for the year.
         """
+        return (StockVector.from_stored(self.sum_pharmacie_used(year=year))
+                + StockVector.from_stored(self.sum_dlc_left(year=year))).to_stored()
 
-        return dict(Counter(self.sum_pharmacie_used(year=year)) + Counter(self.sum_dlc_left(year=year)))
-
+    @cache.memoize("cow", "prescription", "pharmacie", "user")
     def remaining_pharmacie_stock(self, year: int) -> dict[str, int]:
         """Calculates the remaining stock of each medication in the pharmacy for a given year.
 
-        This function computes the current year's stock by adding the medications prescribed this year and the previous year's remaining stock, then subtracting all medications taken out of the pharmacy this year.
+        This function computes the current year's stock by adding the medications prescribed this year and the previous year's remaining stock, then subtracting all medications taken out of the pharmacy this year. A shortfall is kept as a negative quantity.
 
         Args:
             year (int): The year for which to calculate the remaining pharmacy stock.
 
         Returns:
-            dict[str, int]: A dictionary mapping medication names to their remaining quantities for the year.
+            dict[str, int]: A dictionary mapping medication IDs to their remaining quantities for the year.
         """
-        return dict(
-            Counter(self.sum_pharmacie_in(year=year))
-            + Counter(PharmacieUtils.get_pharmacie_year(user_id=self.id,
-                      year=year - 1).remaining_stock)
-            - Counter(self.sum_pharmacie_left(year=year))
-        )
+        return (
+            StockVector.from_stored(self.sum_pharmacie_in(year=year))
+            + StockVector.from_stored(PharmacieUtils.get_pharmacie_year(user_id=self.id,
+                                      year=year - 1).remaining_stock)
+            - StockVector.from_stored(self.sum_pharmacie_left(year=year))
+        ).to_stored()
+
+    @cache.memoize("prescription", "pharmacie")
+    def pharmacy_dashboard(self, year: int, page: int = 1, per_page: int = 20,
+                           section: str | None = None) -> dict:
+        """Builds the medicine cabinet dashboard in one pass.
+
+        The stock and the per-medicine year totals are read from the yearly pharmacy record, which is kept up to date on every entry and exit. Prescriptions and DLC exits are read as paginated windows, newest first. The result is cached until the prescriptions or the pharmacy record change.
+
+        Args:
+            year (int): The year of the stock and totals.
+            page (int): The page of the prescription and DLC windows, from 1.
+            per_page (int): The number of entries per window.
+            section (str | None): "prescriptions" or "dlc" to only return that window.
+
+        Returns:
+            dict: The "stock", "totals", "prescriptions" and "dlc" entries, or only the requested window.
+        """
+        windows = {"prescriptions": False, "dlc": True}
+        if section is not None:
+            windows = {section: windows[section]}
+        dashboard = {
+            name: self.prescription_utils.get_prescriptions_page(
+                dlc_left=dlc_left, page=page, per_page=per_page)
+            for name, dlc_left in windows.items()
+        }
+        if section is not None:
+            return dashboard
+
+        totals = ("total_enter", "total_used", "total_used_calf", "total_out_dlc", "total_out")
+        try:
+            pharmacie = PharmacieUtils.get_pharmacie_year(user_id=self.id, year=year)
+        except ValueError:
+            # pas encore de bilan pour l'année
+            return {"stock": {}, "totals": {name: {} for name in totals}, **dashboard}
+        catalog = self.catalog
+        return {"stock": catalog.decode(pharmacie.remaining_stock),
+                "totals": {name: catalog.decode(getattr(pharmacie, name)) for name in totals},
+                **dashboard}
+
+    def get_expiring_lots(self, days: int, today: date | None = None) -> list[Lot_export_format]:
+        """Lists the lots still in stock that expire within the given number of days, expired lots included, soonest first.
+
+        Args:
+            days (int): The number of days from today.
+            today (date | None): The reference date, today by default.
+
+        Returns:
+            list[Lot_export_format]: The expiring lots, medicines designated by name.
+        """
+        until = (today or date.today()) + timedelta(days=days)
+        names = self.catalog.names
+        return [Lot_export_format(id=lot.id,
+                                  medicament=names[lot.medicine_id],
+                                  expiry=my_strftime(lot.expiry),
+                                  quantity=lot.quantity,
+                                  remaining=lot.remaining)
+                for lot in LotUtils.get_expiring(user_id=self.id, until=until)]
 
     def get_history_pharmacie(self) -> list[Pharma_list_event]:
         """Builds a chronological history of all pharmacy-related events.
 
-        This function combines care and prescription records, labels them, and returns a list sorted by date in descending order.
+        This function streams the care and prescription records through `iter_history_pharmacie` and returns them as a list sorted by date in descending order.
 
         Returns:
             list[tuple[date, dict[str:int], str]]: A list of tuples containing the date, medication dictionary, and event type label.
         """
+        # chaque lot refait le tri des soins en base : de grands lots pour tout lire
+        return [event for _, event in self.iter_history_pharmacie(batch=10_000)]
 
-        # Récupère les données
-        cares_raw: list[Traitement_signe] = CowUtils.get_all_care(
-            user_id=self.id) or []
-        prescriptions_raw: list[Prescription_export_format] = PrescriptionUtils.get_all_prescriptions_cares(
-            user_id=self.id) or []
-
-        care_data: list[Pharma_list_event] = [
-            Pharma_list_event(date=care_raw["traitement"]["date_traitement"],
-                              medicaments=care_raw["traitement"]["medicaments"],
-                              event_type=f"care {care_raw['cow_id']}")
-            for care_raw in cares_raw
-        ]
-        prescription_data: list[Pharma_list_event] = [
-            Pharma_list_event(date=prescription["date_prescription"],
-                              medicaments=prescription["prescription"],
-                              event_type="dlc left" if prescription["dlc_left"] else "prescription")
+    def iter_history_pharmacie(self, cursor: str | None = None, medic: str | None = None,
+                               event_types: set[str] | None = None,
+                               batch: int = 500) -> Iterator[tuple[HistoryKey, Pharma_list_event]]:
+        """Streams pharmacy-related events, newest first, through a k-way merge of the care and prescription sources.
 
-            for prescription in prescriptions_raw
-        ]
+        Each source is read in batches ordered by the database and resumed after the last key read, so memory stays bounded by one batch per source whatever the length of the history. Medications are stored by catalog ID and named as the events are emitted.
 
-        # Fusionne et trie par date décroissante
-        full_history = care_data + prescription_data
-        full_history.sort(key=lambda x: parse_date(x["date"]), reverse=True)
+        Args:
+            cursor (str | None): Cursor returned with a previous page; the stream resumes after it.
+            medic (str | None): Only keep the events involving this medication.
+            event_types (set[str] | None): Sources to read among "care", "prescription" and "dlc left"; all of them by default.
+            batch (int): The number of rows read per query.
+
+        Returns:
+            Iterator[tuple[HistoryKey, Pharma_list_event]]: (key, event) pairs, by decreasing key.
+
+        Raises:
+            ValueError: If the cursor or an event type is invalid.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        event_types = set(HISTORY_EVENT_TYPES if event_types is None else event_types)
+        if unknown := event_types - set(HISTORY_EVENT_TYPES):
+            raise ValueError(f"unknown event types {sorted(unknown)}")
+
+        catalog = self.catalog
+        if medic is not None:
+            if medic not in catalog.ids:
+                return iter(())
+            medic = catalog.key_of(medic)
+
+        def keep(event: Pharma_list_event) -> bool:
+            return medic is None or medic in event["medicaments"]
+
+        sources = []
+        if "care" in event_types:
+            sources.append(batched_source(
+                lambda after, limit: CowUtils.get_care_events(self.id, after, limit, medic),
+                batch, after, keep))
+        if prescription_types := event_types - {"care"}:
+            # une seule lecture de la table lorsque les deux types sont demandés
+            dlc_left = None if len(prescription_types) == 2 else "dlc left" in prescription_types
+            sources.append(batched_source(
+                lambda after, limit: PrescriptionUtils.get_prescription_events(
+                    self.id, after, limit, dlc_left, medic),
+                batch, after, keep))
+        return ((key, Pharma_list_event(**{**event, "medicaments": catalog.decode(event["medicaments"])}))
+                for key, event in merge_sources(sources))
+
+    def get_history_pharmacie_page(self, limit: int = 50, cursor: str | None = None,
+                                   medic: str | None = None,
+                                   event_types: set[str] | None = None) -> dict:
+        """Returns one page of the pharmacy history, newest first.
 
-        return full_history
+        Args:
+            limit (int): The number of events in the page.
+            cursor (str | None): Cursor returned with the previous page.
+            medic (str | None): Only keep the events involving this medication.
+            event_types (set[str] | None): Event types to keep among "care", "prescription" and "dlc left".
+
+        Returns:
+            dict: The page "events" and the "next_cursor" of the following page, None on the last page.
+        """
+        events, next_cursor = take_page(
+            self.iter_history_pharmacie(cursor, medic, event_types, batch=limit + 1), limit)
+        return {"events": events, "next_cursor": next_cursor}
 
     def update_pharmacie_year(self, year: int) -> Pharmacie:
         """Updates or creates the pharmacy record for a given year with all relevant medication statistics.
@@ -277,26 +429,26 @@ class ConnectedUser(UserMixin):
             Pharmacie: The updated or newly created pharmacy record for the year.
         """
 
-        total_enter = self.sum_pharmacie_in(year=year)
+        total_enter = StockVector.from_stored(self.sum_pharmacie_in(year=year))
         total_used_calf = self.sum_calf_used(year=year)
-        total_out_dlc = self.sum_dlc_left(year=year)
-        total_used = self.sum_pharmacie_used(year=year)
-        total_out = dict(Counter(total_used) + Counter(total_out_dlc))
-        remaining_stock = dict(
-            Counter(total_enter)
-            + Counter(PharmacieUtils.get_pharmacie_year(user_id=self.id,
-                      year=year - 1).remaining_stock)
-            - Counter(total_out)
+        total_out_dlc = StockVector.from_stored(self.sum_dlc_left(year=year))
+        total_used = StockVector.from_stored(self.sum_pharmacie_used(year=year))
+        total_out = total_used + total_out_dlc
+        remaining_stock = (
+            total_enter
+            + StockVector.from_stored(PharmacieUtils.get_pharmacie_year(user_id=self.id,
+                                      year=year - 1).remaining_stock)
+            - total_out
         )
         pharmacie = Pharmacie(
             user_id=self.id,
             year=year,
-            total_enter=total_enter,
-            total_used=total_used,
+            total_enter=total_enter.to_stored(),
+            total_used=total_used.to_stored(),
             total_used_calf=total_used_calf,
-            total_out_dlc=total_out_dlc,
-            total_out=total_out,
-            remaining_stock=remaining_stock,
+            total_out_dlc=total_out_dlc.to_stored(),
+            total_out=total_out.to_stored(),
+            remaining_stock=remaining_stock.to_stored(),
         )
         return PharmacieUtils.updateOrDefault_pharmacie_year(user_id=self.id, default=pharmacie)
 
@@ -328,11 +480,13 @@ class ConnectedUser(UserMixin):
         # Récupère les données de l'année précédente
         prev_pharmacie = PharmacieUtils.get_pharmacie_year(
             user_id=self.id, year=year - 1)
-        remaining_stock_last_year = getattr(
-            prev_pharmacie, "remaining_stock", {})
+        # les quantités sont enregistrées par identifiant du catalogue
+        catalog = self.catalog
+        remaining_stock_last_year = catalog.decode(getattr(
+            prev_pharmacie, "remaining_stock", {}))
 
         # Obtenir tous les médicaments à partir des données
-        all_meds = sorted(self.get_pharma_list())
+        all_meds = sorted(catalog.names)
         output = io.StringIO()
         writer = csv.writer(output)
 
@@ -347,7 +501,7 @@ class ConnectedUser(UserMixin):
         # === AJOUT : lignes des prescriptions par date ===
         # Construire dict : date -> med -> qty
         prescriptions_per_date: dict[date, dict[str, int]] = {
-            prescription.date: prescription.care
+            prescription.date: catalog.decode(prescription.care)
             for prescription in PrescriptionUtils.get_year_prescription(user_id=self.id, year=year)
         }
 
@@ -369,13 +523,13 @@ class ConnectedUser(UserMixin):
         # Autres champs
         for field in fields[1:]:  # on saute 'remaining_stock_last_year' car déjà écrit
             row = [field]
-            field_data = getattr(pharmacie, field, {})
+            field_data = catalog.decode(getattr(pharmacie, field, {}))
             row.extend(field_data.get(med, 0)
                        for med in all_meds)  # TODO Verif le get
             writer.writerow(row)
 
         result = output.getvalue()
-        print("CSV généré (pivoté + année précédente + prescriptions par date):\n", result)
+        lg.debug("CSV généré (pivoté + année précédente + prescriptions par date):\n%s", result)
         return result
 
     def remaining_care_to_excel(self) -> io.BytesIO:
@@ -386,6 +540,10 @@ class ConnectedUser(UserMixin):
         Returns:
             bytes: The Excel file content as a bytes object.
         """
+        # openpyxl n'est chargé qu'à l'export : import coûteux
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill
+
         wb = openpyxl.Workbook()
         ws = wb.active
         ws.title = "Traitements Restants"  # type: ignore
@@ -1,4 +1,5 @@
-from collections import Counter, defaultdict
+from collections import defaultdict
+from functools import partial
 from io import BytesIO
 import io
 import logging as lg
@@ -8,12 +9,13 @@ from typing import TYPE_CHECKING, Any
 
 from datetime import date, datetime
 
-from icalendar import Calendar
-
+from web_app.cache import cache
 from web_app.calendar import create_calving_event, create_calving_preparation_event, create_drying_event, event_to_fullcalendar
-from web_app.fonction import parse_date, to_negativ_dict
+from web_app.fonction import my_strftime, parse_date
 from web_app.models.cow import Cow, CowUtils
+from web_app.models.medicine import MedicineUtils
 from web_app.models.pharmacie import PharmacieAttr, PharmacieUtils
+from web_app.models.stock import StockVector
 from web_app.models.type_dict import Note, Reproduction, Traitement, Traitement_signe
 
 
@@ -174,33 +176,35 @@ class CowUtilsUser:
         """Ajoute un traitement à une vache et met à jour les stocks de médicaments.
 
         Cette fonction vérifie la disponibilité des médicaments nécessaires,
-        met à jour les stocks en pharmacie si le traitement est valide, puis
-        enregistre le traitement pour la vache spécifiée.
+        met à jour les stocks en pharmacie si le traitement est valide, en
+        prenant sur les lots du premier périmé au dernier, puis enregistre le
+        traitement pour la vache spécifiée.
 
         Arguments:
             * cow_id (int): Identifiant de la vache à traiter
-            * cow_care (Traitement): Données du traitement à appliquer à la vache
+            * cow_care (Traitement): Données du traitement à appliquer à la
+            vache, médicaments désignés par leur nom
 
         Renvoie:
             * tuple[int, date | None]: Informations retournées par `CowUtils.add_cow_care`,
             le nombre de traitements restants et la date de disponibilité d'un nouveau traitement.
         """
         year: int = parse_date(cow_care["date_traitement"]).year
+        cow_care = self.stored_care(cow_care)
 
-        stock_delta = to_negativ_dict(cow_care["medicaments"])
-        print("--->add_cow_care:", stock_delta)
+        stock_delta = (-StockVector.from_stored(cow_care["medicaments"])).to_stored()
+        lg.debug("add_cow_care: stock delta %s", stock_delta)
         # verifi le validité des stock apres traitement
         if PharmacieUtils.validat_quantity(user_id=self.user_id,
                                            stock_delta=stock_delta,
                                            year_to_verify=year):
 
-            # MAJ les stock
-            PharmacieUtils.modify_pharmacie_year(user_id=self.user_id,
-                                                 year=year,
-                                                 attr=PharmacieAttr.total_used,
-                                                 care_delta=cow_care["medicaments"])
-            # ajout du traitement
-            return CowUtils.add_cow_care(user_id=self.user_id, cow_id=cow_id, cow_care=cow_care)
+            # ajout du traitement et MAJ les stock, en une transaction
+            return CowUtils.add_cow_care(
+                user_id=self.user_id, cow_id=cow_id, cow_care=cow_care,
+                stock_change=partial(PharmacieUtils.change_pharmacie_year, user_id=self.user_id,
+                                     year=year, attr=PharmacieAttr.total_used,
+                                     care_delta=cow_care["medicaments"]))
         else:
             raise ValueError("pas sufisament de madicament")
 
@@ -216,13 +220,15 @@ class CowUtilsUser:
         Arguments:
             * cow_id (int): Identifiant de la vache dont le traitement doit être mis à jour
             * care_index (int): Indice du traitement dans la liste des soins de la vache
-            * new_care (Traitement): Nouveau traitement à appliquer à la vache
+            * new_care (Traitement): Nouveau traitement à appliquer à la
+            vache, médicaments désignés par leur nom
 
         Lance:
             * ValueError: Si la mise à jour du traitement conduirait à un stock de médicaments négatif
         """
 
         if cow := self.get_cow(cow_id=cow_id):
+            new_care = self.stored_care(new_care)
             old_care = cow.cow_cares[care_index]
             old_year = parse_date(old_care["date_traitement"]).year
             new_year = parse_date(new_care["date_traitement"]).year
@@ -237,19 +243,18 @@ class CowUtilsUser:
                     "Not implemented yet: La date du traitement ne peut pas être modifiée pour garantir la cohérence des stocks annuels.")
 
             year = old_year
-            care_delta = dict(
-                Counter(new_care["medicaments"]) - Counter(old_care["medicaments"]))
+            delta = (StockVector.from_stored(new_care["medicaments"])
+                     - StockVector.from_stored(old_care["medicaments"]))
+            care_delta = delta.to_stored()
 
-            stock_delta = dict(- Counter(care_delta))
+            stock_delta = (-delta).to_stored()
             if PharmacieUtils.validat_quantity(user_id=self.user_id, stock_delta=stock_delta, year_to_verify=year):
-                if cow.is_calf_care(new_care):
-                    PharmacieUtils.modify_pharmacie_year(
-                        user_id=self.user_id, year=year, attr=PharmacieAttr.total_used_calf, care_delta=care_delta)
-                else:
-                    PharmacieUtils.modify_pharmacie_year(
-                        user_id=self.user_id, year=year, attr=PharmacieAttr.total_used, care_delta=care_delta)
+                attr = (PharmacieAttr.total_used_calf if cow.is_calf_care(new_care)
+                        else PharmacieAttr.total_used)
                 CowUtils.update_cow_care(
-                    user_id=self.user_id, cow_id=cow_id, care_index=care_index, new_care=new_care)
+                    user_id=self.user_id, cow_id=cow_id, care_index=care_index, new_care=new_care,
+                    stock_change=partial(PharmacieUtils.change_pharmacie_year, user_id=self.user_id,
+                                         year=year, attr=attr, care_delta=care_delta))
             else:
                 raise ValueError("Stock en negatif apres opperation")
 
@@ -267,17 +272,78 @@ class CowUtilsUser:
         if cow := self.get_cow(cow_id=cow_id):
             care = cow.cow_cares[care_index]
             year = parse_date(care["date_traitement"]).year
-            stock_delta = care["medicaments"]
-            care_delta = dict(- Counter(care["medicaments"]))
-            if cow.is_calf_care(traitement=care):
-                PharmacieUtils.modify_pharmacie_year(
-                    user_id=self.user_id, year=year, attr=PharmacieAttr.total_used_calf, care_delta=care_delta)
-            else:
-                PharmacieUtils.modify_pharmacie_year(
-                    user_id=self.user_id, year=year, attr=PharmacieAttr.total_used, care_delta=care_delta)
-
+            care_delta = (-StockVector.from_stored(care["medicaments"])).to_stored()
+            attr = (PharmacieAttr.total_used_calf if cow.is_calf_care(traitement=care)
+                    else PharmacieAttr.total_used)
             CowUtils.delete_cow_care(
-                user_id=self.user_id, cow_id=cow_id, care_index=care_index)
+                user_id=self.user_id, cow_id=cow_id, care_index=care_index,
+                stock_change=partial(PharmacieUtils.change_pharmacie_year, user_id=self.user_id,
+                                     year=year, attr=attr, care_delta=care_delta))
+
+    def stored_care(self, care: Traitement) -> Traitement:
+        """Renvoie une copie d'un traitement saisi dont les médicaments,
+        désignés par leur nom, sont enregistrés par identifiant du catalogue,
+        avec les fins de délai d'attente calculées.
+
+        Lance:
+            * ValueError si un médicament n'est pas dans la pharmacie
+        """
+        care = Traitement(**{**care, "medicaments": self.user.catalog.encode(care["medicaments"])})
+        return Traitement(**{**care, **self.withdrawal_fields(care)})
+
+    def withdrawal_fields(self, care: Traitement) -> dict[str, str | None]:
+        """Calcule les fins de délai d'attente lait et viande d'un traitement
+        enregistré, d'après les délais du catalogue.
+
+        Renvoie:
+            * dict[str, str | None]: Les champs `fin_retrait_lait` et
+            `fin_retrait_viande` du traitement
+        """
+        milk, meat = self.user.catalog.withdrawal_ends(
+            parse_date(care["date_traitement"]), care["medicaments"])
+        return {"fin_retrait_lait": my_strftime(milk) if milk else None,
+                "fin_retrait_viande": my_strftime(meat) if meat else None}
+
+    def set_withdrawal(self, medic: str, milk_days: int, meat_days: int) -> None:
+        """Règle les délais d'attente d'un médicament et recalcule les fins de
+        délai des traitements qui le contiennent.
+
+        Arguments:
+            * medic (str): Nom du médicament
+            * milk_days (int): Délai d'attente lait, en jours
+            * meat_days (int): Délai d'attente viande, en jours
+
+        Lance:
+            * ValueError si le médicament n'est pas dans la pharmacie ou si un
+            délai est négatif
+        """
+        medicine_id = MedicineUtils.set_withdrawal(user_id=self.user_id, name=medic,
+                                                   milk_days=milk_days, meat_days=meat_days)
+        CowUtils.refresh_cares_withdrawal(user_id=self.user_id, medic=str(medicine_id),
+                                          withdrawal_fields=self.withdrawal_fields)
+
+    def get_under_withdrawal(self, today: date | None = None) -> list[Cow]:
+        """Récupère les vaches présentes dont le lait ou la viande sont sous
+        délai d'attente, pour la liste de traite du jour.
+
+        Arguments:
+            * today (date | None): Date de référence, aujourd'hui par défaut
+
+        Renvoie:
+            * list[Cow]: Vaches en délai d'attente, par identifiant croissant
+        """
+        return CowUtils.get_under_withdrawal(user_id=self.user_id, today=today or date.today())
+
+    def named_care(self, care: Traitement) -> Traitement:
+        """Renvoie une copie d'un traitement enregistré dont les médicaments
+        sont désignés par leur nom, pour l'affichage."""
+        return Traitement(**{**care, "medicaments": self.user.catalog.decode(care["medicaments"])})
+
+    def named_cow(self, cow: Cow) -> dict[str, Any]:
+        """Renvoie la représentation JSON d'une vache (`Cow.to_json`) dont les
+        traitements désignent les médicaments par leur nom, pour les listes
+        de l'API."""
+        return {**cow.to_json(), "cow_cares": [self.named_care(care) for care in cow.cow_cares]}
 
     def get_all_care(self) -> list[Traitement_signe]:
         """Récupère l'ensemble des traitements signés pour l'utilisateur courant.
@@ -541,6 +607,8 @@ class CowUtilsUser:
         }
 
     def export_calandar(self) -> io.BytesIO:
+        from icalendar import Calendar
+
         cal = Calendar()
         cal.add("prodid", "-//BioFarm Monitor//FR")
         cal.add("version", "2.0")
@@ -564,6 +632,7 @@ class CowUtilsUser:
 
         return io.BytesIO(cal.to_ical())
 
+    @cache.memoize("cow")
     def reproduction_fullcalendar(self):
 
         event_list = self.get_calandar_list()
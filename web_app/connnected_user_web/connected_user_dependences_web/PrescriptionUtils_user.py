@@ -1,12 +1,12 @@
-from collections import Counter
 from typing import TYPE_CHECKING
 
-from web_app.fonction import my_strftime, to_negativ_dict
+from web_app.fonction import my_strftime
 
 from datetime import date, datetime
 
 from web_app.models.pharmacie import PharmacieAttr, PharmacieUtils
 from web_app.models.prescription import Prescription, PrescriptionUtils
+from web_app.models.stock import StockVector
 from web_app.models.type_dict import Prescription_export_format
 
 
@@ -21,28 +21,35 @@ class PrescriptionUtilsUser:
         self.connected_user = connected_user
         self.user_id = connected_user.id
 
-    def add_prescription(self, date: date, care_items: dict[str, int]) -> None:
+    def add_prescription(self, date: date, care_items: dict[str, int],
+                         expiries: dict[str, date] | None = None) -> None:
         """Ajoute une nouvelle prescription et met à jour la pharmacie de l'utilisateur.
 
         Cette fonction enregistre une prescription à la date fournie pour les
-        traitements indiqués, puis incrémente les entrées de pharmacie
-        correspondantes pour l'année concernée.
+        traitements indiqués, chaque ligne formant un lot, puis incrémente les
+        entrées de pharmacie correspondantes pour l'année concernée.
 
         Arguments:
             * date (date): Date de la prescription à enregistrer
             * care_items (dict[str, int]): Dictionnaire des traitements
-            prescrits et de leurs quantités
+            prescrits, désignés par leur nom, et de leurs quantités
+            * expiries (dict[str, date] | None): Dates de péremption des lots,
+            par nom de traitement
         """
+        catalog = self.connected_user.catalog
+        care_items = catalog.encode(care_items)
+        expiries = {catalog.key_of(name): expiry for name, expiry in (expiries or {}).items()}
         PrescriptionUtils.add_prescription(
-            user_id=self.connected_user.id, date=date, care_items=care_items)
+            user_id=self.connected_user.id, date=date, care_items=care_items, expiries=expiries)
         PharmacieUtils.modify_pharmacie_year(
             user_id=self.user_id, year=date.year, attr=PharmacieAttr.total_enter, care_delta=care_items)
 
     def remove_prescription(self, prescription_id: int) -> None:
         # TODO doc remove_prescription
         prescription = PrescriptionUtils.get_prescription_by_id(user_id=self.user_id, prescription_id=prescription_id)
-        stock_delta = to_negativ_dict(prescription.care)
-        if PharmacieUtils.validat_quantity(user_id=self.user_id,stock_delta=stock_delta,year_to_verify=prescription.date.year):
+        stock_delta = (-StockVector.from_stored(prescription.care)).to_stored()
+        # annuler une sortie pour DLC remet en stock : rien à vérifier
+        if prescription.dlc_left or PharmacieUtils.validat_quantity(user_id=self.user_id,stock_delta=stock_delta,year_to_verify=prescription.date.year):
             PrescriptionUtils.remove_prescription(user_id=self.user_id,prescription_id=prescription_id)
             if prescription.dlc_left :
                 PharmacieUtils.modify_pharmacie_year(user_id=self.user_id, year=prescription.date.year, attr=PharmacieAttr.total_out_dlc, care_delta=stock_delta)
@@ -58,18 +65,19 @@ class PrescriptionUtilsUser:
         Cette fonction vérifie que les quantités à retirer pour cause de DLC
         dépassée sont disponibles en stock, enregistre l'opération comme
         prescription de retrait, puis décrémente les stocks de la pharmacie
-        pour l'année en cours.
+        pour l'année en cours et les lots, du premier périmé au dernier.
 
         Arguments:
             * date (date): Date à laquelle les traitements sont retirés pour DLC dépassée
-            * care_items (dict[str, int]): Dictionnaire des traitements retirés
-            et de leurs quantités
+            * care_items (dict[str, int]): Dictionnaire des traitements retirés,
+            désignés par leur nom, et de leurs quantités
 
         Lance:
             * ValueError: Si le stock restant serait négatif après le retrait
             des traitements indiqués
         """
-        stock_delta = to_negativ_dict(care_items)
+        care_items = self.connected_user.catalog.encode(care_items)
+        stock_delta = (-StockVector.from_stored(care_items)).to_stored()
         year = datetime.now().year
         if not PharmacieUtils.validat_quantity(user_id=self.user_id, year_to_verify=year, stock_delta=stock_delta):
             raise ValueError("Stock insuffisant pour retirer le medicament")
@@ -104,7 +112,7 @@ class PrescriptionUtilsUser:
             * list[Prescription_export_format]: Liste des prescriptions de
             l'utilisateur dans un format dédié à l'export.
         """
-        return [presciption for presciption in PrescriptionUtils.get_all_prescriptions_cares(user_id=self.user_id)
+        return [self.named(presciption) for presciption in PrescriptionUtils.get_all_prescriptions_cares(user_id=self.user_id)
                 if not presciption["dlc_left"]]
 
     def get_all_dlc_cares(self) -> list[Prescription_export_format]:
@@ -118,9 +126,35 @@ class PrescriptionUtilsUser:
             * list[Prescription_export_format]: Liste des sortie pour dlc de
             l'utilisateur dans un format dédié à l'export.
         """
-        return [presciption for presciption in PrescriptionUtils.get_all_prescriptions_cares(user_id=self.user_id)
+        return [self.named(presciption) for presciption in PrescriptionUtils.get_all_prescriptions_cares(user_id=self.user_id)
                 if presciption["dlc_left"]]
 
+    def get_prescriptions_page(self, dlc_left: bool, page: int = 1,
+                               per_page: int = 20) -> dict:
+        """Récupère une page des prescriptions, ou des sorties pour DLC, de
+        l'utilisateur connecté, les plus récentes en premier.
+
+        Arguments:
+            * dlc_left (bool): True pour les sorties pour DLC
+            * page (int): Numéro de page, à partir de 1
+            * per_page (int): Nombre d'entrées par page
+
+        Renvoie:
+            * dict: Les entrées de la page (`items`), `page`, `per_page`,
+            `total` et `has_more`.
+        """
+        result = PrescriptionUtils.get_prescriptions_page(
+            user_id=self.user_id, dlc_left=dlc_left, page=page, per_page=per_page)
+        result["items"] = [self.named(item) for item in result["items"]]
+        return result
+
+    def named(self, prescription: Prescription_export_format) -> Prescription_export_format:
+        """Désigne par leur nom les médicaments d'une prescription au format
+        d'export, enregistrés par identifiant du catalogue."""
+        prescription["prescription"] = self.connected_user.catalog.decode(
+            prescription["prescription"])
+        return prescription
+
     def get_year_prescription(self, year: int) -> list[Prescription]:
         """Récupère toutes les prescriptions d'une année donnée pour l'utilisateur connecté.
 
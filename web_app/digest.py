@@ -0,0 +1,69 @@
+import logging as lg
+from itertools import groupby
+from operator import attrgetter
+
+from flask import Flask
+
+from .models.alert import AlertUtils, StockAlert
+from .models.medicine import MedicineUtils
+from .models.user import UserUtils
+
+DIGEST_SUBJECT = "BioFarm Monitor : stocks à réapprovisionner"
+
+
+def format_digest(user_id: int, alerts: list[StockAlert]) -> str:
+    """Rédige le corps du résumé des alertes de stock bas d'un utilisateur.
+
+    Arguments:
+        * user_id (int): Identifiant de l'utilisateur
+        * alerts (list[StockAlert]): Alertes à résumer
+
+    Renvoie:
+        * str: Le texte du courriel
+    """
+    catalog = MedicineUtils.get_catalog(user_id)
+    lines = [f"- {catalog.names[alert.medicine_id]} : {alert.stock} "
+             f"{catalog.units[alert.medicine_id]} en stock (seuil {alert.threshold})"
+             for alert in alerts]
+    return "Les médicaments suivants sont à réapprovisionner :\n\n" + "\n".join(lines) + "\n"
+
+
+def send_stock_digest(app: Flask) -> int:
+    """Envoie à chaque utilisateur un courriel résumant ses nouvelles alertes
+    de stock bas, avec les réglages Flask-Mail de `config`.
+
+    Flask-Mail est une dépendance optionnelle (pip install Flask-Mail) : sans
+    elle, ou sans expéditeur configuré, rien n'est envoyé. Les alertes
+    envoyées sont marquées et ne figurent plus dans les résumés suivants ;
+    celles dont l'envoi échoue y restent.
+
+    Arguments:
+        * app (Flask): L'application, dont la configuration fournit les
+        réglages MAIL_*
+
+    Renvoie:
+        * int: Nombre de courriels envoyés
+    """
+    try:
+        from flask_mail import Mail, Message
+    except ImportError:
+        lg.warning("Flask-Mail n'est pas installé : résumé des alertes non envoyé")
+        return 0
+    if not app.config.get("MAIL_DEFAULT_SENDER"):
+        lg.warning("MAIL_DEFAULT_SENDER n'est pas configuré : résumé des alertes non envoyé")
+        return 0
+
+    mail = Mail(app)
+    sent = 0
+    for user_id, group in groupby(AlertUtils.get_unnotified_alerts(), key=attrgetter("user_id")):
+        alerts = list(group)
+        user = UserUtils.get_user(user_id)
+        try:
+            mail.send(Message(subject=DIGEST_SUBJECT, recipients=[user.email],
+                              body=format_digest(user_id, alerts)))
+        except Exception as e:
+            lg.error(f"(user :{user_id}) : stock digest not sent : {e}")
+            continue
+        AlertUtils.mark_notified([alert.id for alert in alerts])
+        sent += 1
+    return sent
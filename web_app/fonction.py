@@ -25,14 +25,6 @@ def last(lst: list[T]) -> T | None:
     return lst[-1] if lst else None
 
 
-def addition_dict(d1: dict, d2: dict)-> dict:
-    return {cle: d1.get(cle, 0) + d2.get(cle, 0)
-            for cle in set(d1) | set(d2)}
-
-def to_negativ_dict(d1: dict)-> dict:
-    return {clef: -d1[clef] for clef in set(d1)}
-
-
 def my_strftime(date_obj: date | str) -> str:
     """Convertit une date (objet date ou chaîne de caractères) en une chaîne de
     caractères au format "AAAA-MM-JJ".
@@ -197,6 +189,49 @@ def new_available_care(cow: Cow) -> date | None:
         return None
 
 
+def display_to_storage_index(history: list, index: int) -> int:
+    """Convertit la position d'une entrée d'historique telle qu'affichée (la
+    plus récente en premier) en indice dans la liste stockée en base.
+
+    Lance:
+        * IndexError si la position ne correspond à aucune entrée.
+    """
+    if not 0 <= index < len(history):
+        raise IndexError(f"index {index} out of range")
+    return len(history) - index - 1
+
+
+def history_page(history: list[dict], page: int = 1, per_page: int = 20) -> dict:
+    """Découpe une page d'un historique (soins, reproductions), la plus
+    récente entrée en premier.
+
+    L'historique n'est que lu : la liste suivie par l'ORM n'est ni inversée
+    ni modifiée, chaque entrée de la page est une copie portant sa position
+    d'affichage (`index`), celle attendue par les vues de modification et de
+    suppression.
+
+    Arguments:
+        * history (list): Historique stocké, du plus ancien au plus récent
+        * page (int): Numéro de page, à partir de 1
+        * per_page (int): Nombre d'entrées par page
+
+    Renvoie:
+        * dict: Les entrées de la page (`items`), `page`, `per_page`,
+        `total` et `has_more`.
+    """
+    total = len(history)
+    start = (page - 1) * per_page
+    stop = min(start + per_page, total)
+    return {
+        "items": [{**history[total - index - 1], "index": index}
+                  for index in range(start, stop)],
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "has_more": stop < total,
+    }
+
+
 def reload_reproduction_with(old: Reproduction, new: Reproduction, settings: Setting) -> Reproduction:
     """Recharge les données de reproduction d'une vache en tenant compte de
     l'historique des inséminations.
@@ -224,7 +259,8 @@ def reload_reproduction_with(old: Reproduction, new: Reproduction, settings: Set
     if len(new["insemination"]) > 1 and new["ultrasound"]:
         raise ValueError("Validation sur double insémination impossible.")
     if old["insemination"] != new["insemination"] and new["ultrasound"]:
-        print(old["insemination"], " -> ", new["insemination"])
+        lg.debug("reload_reproduction_with: insemination %s -> %s",
+                 old["insemination"], new["insemination"])
         new["calving_date"] = sum_date_to_str(new["insemination"][0], 280)
         new["dry"] = substract_date_to_str(
             new["calving_date"], settings["dry_time"])
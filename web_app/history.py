@@ -0,0 +1,116 @@
+import base64
+import heapq
+import json
+from itertools import islice
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import ColumnElement, and_, or_, tuple_
+
+from .models.type_dict import Pharma_list_event
+
+# Clé de tri d'un événement : (date "AAAA-MM-JJ", rang de la source, puis
+# identifiants propres à la source). Les événements sont émis par clé
+# décroissante ; à date égale, les soins (rang 1) précèdent les prescriptions
+# (rang 0).
+HistoryKey = tuple[str, int, int, int]
+HistoryItem = tuple[HistoryKey, Pharma_list_event]
+
+# Types d'événements de l'historique de la pharmacie
+HISTORY_EVENT_TYPES: tuple[str, ...] = ("care", "prescription", "dlc left")
+
+
+def encode_cursor(key: HistoryKey) -> str:
+    """Encode la clé du dernier événement d'une page en curseur opaque."""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> HistoryKey:
+    """Décode un curseur produit par `encode_cursor`.
+
+    Lance:
+        * ValueError si le curseur est invalide.
+    """
+    try:
+        day, rank, first, second = json.loads(base64.urlsafe_b64decode(cursor))
+        return (str(day), int(rank), int(first), int(second))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor {cursor!r}") from e
+
+
+def keyset_before(cursor: tuple | None, rank: int, date: ColumnElement,
+                  *ids: ColumnElement) -> ColumnElement | None:
+    """Condition SQL sélectionnant les lignes d'une source situées après le
+    curseur dans l'ordre décroissant de l'historique.
+
+    Arguments:
+        * cursor (tuple | None): Clé du dernier événement déjà émis, sa date
+        convertie au type de la colonne `date`
+        * rank (int): Rang de la source dans la clé de tri
+        * date (ColumnElement): Date de l'événement
+        * ids (ColumnElement): Colonnes départageant les événements d'une même
+        date, dans l'ordre de la clé
+
+    Renvoie:
+        * ColumnElement | None: La condition, ou None sans curseur.
+    """
+    if cursor is None:
+        return None
+    day, cursor_rank, *cursor_ids = cursor
+    if rank < cursor_rank:
+        return date <= day
+    if rank > cursor_rank:
+        return date < day
+    return or_(date < day,
+               and_(date == day, tuple_(*ids) < tuple_(*cursor_ids[:len(ids)])))
+
+
+def batched_source(fetch: Callable[[HistoryKey | None, int], list[HistoryItem]],
+                   batch: int, cursor: HistoryKey | None = None,
+                   keep: Callable[[Pharma_list_event], bool] | None = None
+                   ) -> Iterator[HistoryItem]:
+    """Parcourt une source par lots successifs, chacun repris après la clé
+    du dernier événement lu (pagination par clé, sans OFFSET).
+
+    Arguments:
+        * fetch (Callable): fetch(after, limit) renvoie au plus `limit`
+        couples (clé, événement) de clé inférieure à `after`, par clé
+        décroissante
+        * batch (int): Nombre de lignes lues par requête
+        * cursor (HistoryKey | None): Clé à partir de laquelle reprendre
+        * keep (Callable | None): Filtre appliqué après lecture, pour les
+        conditions que la base ne peut pas évaluer
+    """
+    after = cursor
+    while True:
+        rows = fetch(after, batch)
+        for item in rows:
+            if keep is None or keep(item[1]):
+                yield item
+        if len(rows) < batch:
+            return
+        after = rows[-1][0]
+
+
+def merge_sources(sources: Iterable[Iterator[HistoryItem]]) -> Iterator[HistoryItem]:
+    """Fusionne des sources triées par clé décroissante (fusion k-voies) :
+    seul l'événement en tête de chaque source est comparé."""
+    return heapq.merge(*sources, key=itemgetter(0), reverse=True)
+
+
+def take_page(stream: Iterator[HistoryItem],
+              limit: int) -> tuple[list[Pharma_list_event], str | None]:
+    """Lit une page d'un flux d'événements.
+
+    Arguments:
+        * stream (Iterator[HistoryItem]): Flux trié par clé décroissante
+        * limit (int): Taille de la page
+
+    Renvoie:
+        * tuple[list[Pharma_list_event], str | None]: Les événements de la
+        page et le curseur de la page suivante, None sur la dernière page.
+    """
+    items = list(islice(stream, limit + 1))
+    page = items[:limit]
+    cursor = encode_cursor(page[-1][0]) if len(items) > limit else None
+    return [event for _, event in page], cursor
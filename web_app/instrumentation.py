@@ -0,0 +1,132 @@
+import json
+import logging as lg
+import time
+from typing import Any
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
+
+from . import db
+from .logs import install_queue, make_file_handler
+
+# Journal structuré (une ligne JSON par évènement) des requêtes lentes
+perf_logger = lg.getLogger("web_app.perf")
+
+
+class RequestStats:
+    """Mesures accumulées pendant le traitement d'une requête HTTP."""
+
+    __slots__ = ("started", "queries", "db_time", "rows")
+
+    def __init__(self) -> None:
+        self.started: float = time.perf_counter()
+        """Instant de début de la requête (perf_counter)."""
+        self.queries: int = 0
+        """Nombre d'instructions SQL exécutées."""
+        self.db_time: float = 0.0
+        """Temps passé dans la base de données, en secondes."""
+        self.rows: int = 0
+        """Nombre d'instances ORM chargées depuis la base."""
+
+    @property
+    def elapsed(self) -> float:
+        """Temps écoulé depuis le début de la requête, en secondes."""
+        return time.perf_counter() - self.started
+
+
+def current_stats() -> RequestStats | None:
+    """Renvoie les mesures de la requête en cours, ou None hors requête."""
+    return g.get("_request_stats") if has_request_context() else None
+
+
+def _log(event_name: str, **fields: Any) -> None:
+    perf_logger.warning(json.dumps({"event": event_name, **fields},
+                                   default=repr, ensure_ascii=False))
+
+
+def _register_engine_events(engine: Engine, config: dict[str, Any]) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn: Any, cursor: Any, statement: str, parameters: Any,
+                    context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn: Any, cursor: Any, statement: str, parameters: Any,
+                  context: Any, executemany: bool) -> None:
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        if stats := current_stats():
+            stats.queries += 1
+            stats.db_time += duration
+        if duration * 1000 >= config.get("PERF_SLOW_QUERY_MS", 100):
+            _log("slow_query",
+                 endpoint=request.endpoint if has_request_context() else None,
+                 duration_ms=round(duration * 1000, 2),
+                 statement=statement,
+                 parameters=repr(parameters)[:500])
+
+    @event.listens_for(engine, "handle_error")
+    def drop_failed_query(context: Any) -> None:
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
+
+
+def _count_loaded_row(session: Session, instance: Any) -> None:
+    if stats := current_stats():
+        stats.rows += 1
+
+
+def init_instrumentation(app: Flask) -> None:
+    """Mesure chaque requête : durée totale, temps passé en base, nombre
+    d'instructions SQL et d'instances chargées.
+
+    Les mesures sont renvoyées au client dans l'en-tête `Server-Timing`. Les
+    requêtes plus longues que `PERF_SLOW_REQUEST_MS`, ou exécutant plus de
+    `PERF_MAX_QUERIES` instructions SQL (motif N+1), ainsi que les
+    instructions plus longues que `PERF_SLOW_QUERY_MS` sont écrites dans le
+    journal structuré `PERF_LOG_FILE`.
+    """
+    if log_file := app.config.get("PERF_LOG_FILE"):
+        handler = make_file_handler(log_file, app.config.get("LOG_ROTATION", "size"),
+                                    app.config.get("LOG_MAX_BYTES", 10 * 2**20),
+                                    app.config.get("LOG_BACKUP_COUNT", 5),
+                                    app.config.get("LOG_ROTATE_WHEN", "midnight"))
+        handler.setFormatter(lg.Formatter("%(asctime)s %(message)s"))
+        install_queue(perf_logger, handler)
+        perf_logger.propagate = False
+
+    with app.app_context():
+        engine = db.engine
+    _register_engine_events(engine, app.config)
+    if not event.contains(Session, "loaded_as_persistent", _count_loaded_row):
+        event.listen(Session, "loaded_as_persistent", _count_loaded_row)
+
+    @app.before_request
+    def start_request_stats() -> None:
+        g._request_stats = RequestStats()
+
+    @app.after_request
+    def report_request_stats(response: Response) -> Response:
+        if (stats := current_stats()) is None:
+            return response
+        elapsed_ms = stats.elapsed * 1000
+        db_ms = stats.db_time * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_ms:.1f};desc="{stats.queries} queries", '
+            f"app;dur={elapsed_ms:.1f}")
+
+        fields = dict(endpoint=request.endpoint,
+                      method=request.method,
+                      status=response.status_code,
+                      duration_ms=round(elapsed_ms, 2),
+                      db_ms=round(db_ms, 2),
+                      queries=stats.queries,
+                      rows=stats.rows)
+        if (elapsed_ms >= app.config.get("PERF_SLOW_REQUEST_MS", 500)
+                or stats.queries > app.config.get("PERF_MAX_QUERIES", 50)):
+            _log("slow_request", **fields)
+        elif perf_logger.isEnabledFor(lg.DEBUG):
+            # le JSON n'est construit que si le journal le garde
+            perf_logger.debug(json.dumps({"event": "request", **fields}))
+        return response
@@ -0,0 +1,93 @@
+import json
+from datetime import date
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Row
+
+try:  # sérialiseur accéléré optionnel (pip install orjson)
+    import orjson
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    orjson = None
+
+# Arguments de `dumps` que la sérialisation orjson sait respecter
+_ORJSON_KWARGS = frozenset({"default", "separators", "indent"})
+
+
+def _default(o: Any) -> Any:
+    """Convertit les objets que le module json ne sait pas sérialiser.
+
+    Les dates sont écrites au format ISO ('YYYY-MM-DD'), comme dans les
+    colonnes JSON des modèles ; les projections de requêtes (`Row`) deviennent
+    des dictionnaires ; les modèles exposant `to_json` (Cow) sont convertis
+    sans schéma intermédiaire. Les autres types sont confiés au fournisseur
+    par défaut de Flask.
+    """
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, Row):
+        return o._asdict()
+    if callable(to_json := getattr(o, "to_json", None)):
+        return to_json()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    return DefaultJSONProvider.default(o)
+
+
+class FarmJSONProvider(DefaultJSONProvider):
+    """Fournisseur JSON de l'application.
+
+    Les réponses volumineuses (troupeau, reproductions, historiques des
+    ordonnances) sont sérialisées en une seule passe : dates, enregistrements
+    `type_dict`, projections et modèles sont convertis pendant l'écriture.
+    Si orjson est installé, il remplace le module json ; les options qu'il ne
+    gère pas, ou les valeurs qu'il refuse (entiers hors 64 bits), repassent
+    par le module json.
+
+    Les clés ne sont pas triées et les caractères accentués ne sont pas
+    échappés : les réponses sont plus courtes et plus rapides à produire.
+    """
+
+    default = staticmethod(_default)  # type: ignore[assignment]
+    ensure_ascii = False
+    sort_keys = False
+
+    def _orjson_option(self, indent: int | None) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, **kwargs: Any) -> bytes:
+        """Sérialise en JSON encodé en UTF-8, sans passer par une chaîne
+        intermédiaire lorsque orjson est disponible."""
+        if orjson is not None and kwargs.keys() <= _ORJSON_KWARGS \
+                and kwargs.get("indent") in (None, 2):
+            try:
+                return orjson.dumps(obj, default=kwargs.get("default", self.default),
+                                    option=self._orjson_option(kwargs.get("indent")))
+            except orjson.JSONEncodeError:
+                pass
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self.dumps_bytes(obj, indent=2)
+        else:
+            body = self.dumps_bytes(obj, separators=(",", ":"))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,171 @@
+import atexit
+import copy
+import json
+import logging as lg
+import logging.handlers
+import queue
+from datetime import datetime
+from typing import Any
+
+# File d'attente et thread d'écriture de chaque journal : (handler posé sur
+# le logger, listener qui écrit dans les fichiers)
+_pipelines: dict[str, tuple["QueueHandler", logging.handlers.QueueListener]] = {}
+
+
+class HTTP304Filter(lg.Filter):
+    def filter(self, record):
+        # Ignore les logs contenant " 304 " (code HTTP 304)
+        return " 304 " not in record.getMessage()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Dépose les enregistrements dans la file, message déjà formaté.
+
+    Contrairement au handler standard, la trace d'une exception est conservée
+    à part (`exc_text`) au lieu d'être ajoutée au message : le formateur JSON
+    peut ainsi la placer dans son propre champ.
+    """
+
+    def prepare(self, record: lg.LogRecord) -> lg.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or lg.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(lg.Formatter):
+    """Formate chaque enregistrement sur une ligne JSON (horodatage, niveau,
+    logger, message et, le cas échéant, la trace de l'exception)."""
+
+    def format(self, record: lg.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def make_file_handler(path: str, rotation: str = "size", max_bytes: int = 10 * 2**20,
+                      backup_count: int = 5, when: str = "midnight") -> lg.Handler:
+    """Construit le handler d'écriture d'un fichier journal.
+
+    Arguments:
+        * path (str): Chemin du fichier journal
+        * rotation (str): "size" (rotation à `max_bytes`), "time" (rotation
+        selon `when`) ou "watched" (rotation laissée à logrotate, le fichier
+        est rouvert s'il est déplacé)
+        * max_bytes (int): Taille maximale avant rotation
+        * backup_count (int): Nombre d'anciens fichiers conservés
+        * when (str): Période de rotation (voir `TimedRotatingFileHandler`)
+
+    Lance:
+        * ValueError si le mode de rotation est inconnu
+    """
+    if rotation == "size":
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    if rotation == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backup_count, encoding="utf-8")
+    if rotation == "watched":
+        return logging.handlers.WatchedFileHandler(path, encoding="utf-8")
+    raise ValueError(f"mode de rotation inconnu : {rotation}")
+
+
+def install_queue(logger: lg.Logger, *handlers: lg.Handler) -> QueueHandler:
+    """Remplace l'écriture synchrone d'un logger par une file d'attente : le
+    thread appelant ne fait que déposer l'enregistrement, un thread dédié
+    (`QueueListener`) l'écrit avec `handlers`.
+
+    Un second appel pour le même logger remplace la file précédente, après
+    avoir écrit ses derniers enregistrements.
+    """
+    _remove_queue(logger.name)
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    listener = logging.handlers.QueueListener(queue_handler.queue, *handlers,
+                                              respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _pipelines[logger.name] = (queue_handler, listener)
+    return queue_handler
+
+
+def _remove_queue(name: str) -> None:
+    if (pipeline := _pipelines.pop(name, None)) is None:
+        return
+    queue_handler, listener = pipeline
+    lg.getLogger(name).removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def restart_after_fork() -> None:
+    """Relance les threads d'écriture dans un worker : un fork ne copie pas
+    les threads, les enregistrements s'accumuleraient sans être écrits."""
+    for name, (queue_handler, listener) in _pipelines.items():
+        queue_handler.queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(queue_handler.queue, *listener.handlers,
+                                                  respect_handler_level=True)
+        listener.start()
+        _pipelines[name] = (queue_handler, listener)
+
+
+@atexit.register
+def stop_listeners() -> None:
+    """Écrit les enregistrements en attente et arrête les threads d'écriture."""
+    for name in list(_pipelines):
+        _remove_queue(name)
+
+
+def parse_levels(value: str | dict[str, str] | None) -> dict[str, str]:
+    """Lit les niveaux par module, sous forme de dictionnaire ou de chaîne
+    `"web_app.models=DEBUG,werkzeug=WARNING"`."""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+    levels = {}
+    for item in value.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def init_logging(app: Any) -> None:
+    """Configure le journal de l'application (`LOG_FILE`).
+
+    Les enregistrements passent par une file d'attente et sont écrits par un
+    thread dédié : les requêtes ne bloquent plus sur l'écriture du fichier.
+    Le fichier tourne selon `LOG_ROTATION` ; `LOG_FORMAT` vaut "text" ou
+    "json" ; `LOG_LEVEL` fixe le niveau global et `LOG_LEVELS` celui de
+    modules particuliers. Les requêtes HTTP 304 ne sont pas journalisées.
+    """
+    if not (path := app.config.get("LOG_FILE")):
+        return
+    handler = make_file_handler(path, app.config.get("LOG_ROTATION", "size"),
+                                app.config.get("LOG_MAX_BYTES", 10 * 2**20),
+                                app.config.get("LOG_BACKUP_COUNT", 5),
+                                app.config.get("LOG_ROTATE_WHEN", "midnight"))
+    handler.setFormatter(JSONFormatter() if app.config.get("LOG_FORMAT") == "json"
+                         else lg.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+    root = lg.getLogger()
+    root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+    # le filtre est appliqué avant la mise en file, sur le thread appelant
+    install_queue(root, handler).addFilter(HTTP304Filter())
+    for name, level in parse_levels(app.config.get("LOG_LEVELS")).items():
+        lg.getLogger(name).setLevel(level)
@@ -0,0 +1,366 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from flask import Flask, Response, abort, g, request
+
+try:
+    import fcntl
+except ImportError:  # Windows : serveur de développement, un seul processus
+    fcntl = None  # type: ignore
+
+# Bornes (en secondes) des histogrammes de latence
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                      0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+# Adresses autorisées à lire /metrics sans jeton
+LOOPBACK: frozenset[str] = frozenset({"127.0.0.1", "::1"})
+
+# Cumul des compteurs et histogrammes des workers terminés, dans METRICS_DIR
+EXITED_SNAPSHOT = "exited.json"
+
+
+class Counter:
+    """Compteur monotone, décliné par combinaison d'étiquettes."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> dict[Labels, Any]:
+        return dict(self.values)
+
+
+class Histogram:
+    """Histogramme à bornes fixes. Chaque série conserve le nombre
+    d'observations par intervalle, leur somme et leur nombre."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values: dict[Labels, list[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        if (series := self.values.get(labels)) is None:
+            # un intervalle par borne, +Inf, puis somme et nombre
+            series = self.values[labels] = [0.0] * (len(self.buckets) + 3)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> dict[Labels, Any]:
+        return {labels: list(series) for labels, series in self.values.items()}
+
+
+class CallbackMetric:
+    """Métrique dont les valeurs sont lues à la demande (statistiques du
+    cache, occupation du pool de connexions...)."""
+
+    def __init__(self, kind: str, name: str, help: str,
+                 labelnames: tuple[str, ...],
+                 function: Callable[[], dict[Labels, float]]) -> None:
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.function = function
+
+    def samples(self) -> dict[Labels, Any]:
+        return self.function()
+
+
+class MetricsRegistry:
+    """Registre des métriques d'un processus.
+
+    Les mises à jour restent en mémoire. Lorsqu'un répertoire partagé est
+    configuré, chaque worker y écrit périodiquement un instantané
+    (`metrics-<pid>.json`) et l'export additionne les instantanés de tous les
+    workers : compteurs et histogrammes de tous les processus, jauges des
+    seuls processus encore vivants. Les instantanés des workers terminés
+    (recyclés) sont repliés dans un cumul unique puis supprimés.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Counter | Histogram | CallbackMetric] = {}
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))  # type: ignore
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))  # type: ignore
+
+    def callback(self, kind: str, name: str, help: str,
+                 labelnames: tuple[str, ...],
+                 function: Callable[[], dict[Labels, float]]) -> CallbackMetric:
+        return self._register(CallbackMetric(kind, name, help, labelnames, function))  # type: ignore
+
+    def _register(self, metric: Any) -> Any:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Renvoie l'état du registre sous une forme sérialisable en JSON."""
+        with self.lock:
+            return {"pid": os.getpid(), "metrics": {
+                metric.name: {
+                    "kind": metric.kind,
+                    "help": metric.help,
+                    "labelnames": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", ())),
+                    "samples": [[list(labels), value]
+                                for labels, value in metric.samples().items()],
+                }
+                for metric in self.metrics.values()}}
+
+    def flush(self, directory: str) -> None:
+        """Écrit l'instantané du processus dans le répertoire partagé."""
+        _write_json(os.path.join(directory, f"metrics-{os.getpid()}.json"), self.snapshot())
+
+    def collect(self, directory: str | None = None) -> dict[str, Any]:
+        """Additionne l'instantané courant et ceux des autres workers."""
+        snapshots = [self.snapshot()]
+        if directory:
+            snapshots.extend(_worker_snapshots(directory))
+
+        merged: dict[str, Any] = {}
+        for snapshot in snapshots:
+            alive = snapshot["pid"] == os.getpid() or (
+                snapshot["pid"] is not None and _pid_alive(snapshot["pid"]))
+            _merge(merged, snapshot["metrics"], gauges=alive)
+        return merged
+
+    def render(self, directory: str | None = None) -> str:
+        """Exporte les métriques agrégées au format texte de Prometheus."""
+        lines: list[str] = []
+        for name, metric in sorted(self.collect(directory).items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric["labelnames"]
+            for labels, value in sorted(metric["samples"].items()):
+                base = list(zip(labelnames, labels))
+                if metric["kind"] != "histogram":
+                    lines.append(f"{name}{_format_labels(base)} {_format_value(value)}")
+                    continue
+                cumulative = 0.0
+                for bound, count in zip([*metric["buckets"], float("inf")], value):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels([*base, ('le', le)])} "
+                                 f"{_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(base)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(base)} {_format_value(value[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(merged: dict[str, Any], metrics: dict[str, Any], gauges: bool) -> None:
+    """Ajoute les échantillons d'un instantané aux métriques agrégées, sans
+    les jauges si `gauges` est faux."""
+    for name, metric in metrics.items():
+        if metric["kind"] == "gauge" and not gauges:
+            continue
+        target = merged.setdefault(name, {**metric, "samples": {}})
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if isinstance(value, list):
+                previous = target["samples"].get(key, [0.0] * len(value))
+                target["samples"][key] = [a + b for a, b in zip(previous, value)]
+            else:
+                target["samples"][key] = target["samples"].get(key, 0.0) + value
+
+
+def _worker_snapshots(directory: str) -> list[dict[str, Any]]:
+    """Lit les instantanés des autres workers du répertoire partagé.
+
+    Les instantanés des workers terminés sont ajoutés au cumul
+    `EXITED_SNAPSHOT` puis supprimés, pour que le coût d'un export et la
+    taille du répertoire ne croissent pas avec les recyclages. Le cumul est
+    renvoyé avec les instantanés des workers vivants.
+    """
+    with _locked(directory):
+        live, exited = [], []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            if (snapshot := _read_json(path)) is None or snapshot["pid"] == os.getpid():
+                continue
+            if _pid_alive(snapshot["pid"]):
+                live.append(snapshot)
+            else:
+                exited.append((path, snapshot))
+
+        total_path = os.path.join(directory, EXITED_SNAPSHOT)
+        total = _read_json(total_path) or {"pid": None, "metrics": {}}
+        if exited:
+            folded: dict[str, Any] = {}
+            _merge(folded, total["metrics"], gauges=False)
+            for _, snapshot in exited:
+                _merge(folded, snapshot["metrics"], gauges=False)
+            total = {"pid": None, "metrics": {
+                name: {**metric, "samples": [[list(labels), value]
+                                             for labels, value in metric["samples"].items()]}
+                for name, metric in folded.items()}}
+            _write_json(total_path, total)
+            for path, _ in exited:
+                os.remove(path)
+        return [*live, total]
+
+
+@contextmanager
+def _locked(directory: str) -> Iterator[None]:
+    """Réserve le répertoire partagé le temps d'un repli, pour qu'un même
+    instantané ne soit pas cumulé par deux workers."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Any) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as file:
+        json.dump(data, file)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _format_labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"'
+                          for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "Requêtes HTTP traitées.",
+    ("blueprint", "route", "method", "status"))
+LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Durée de traitement des requêtes HTTP.",
+    ("blueprint", "route", "method"))
+
+
+def init_metrics(app: Flask) -> None:
+    """Enregistre les requêtes de chaque route dans le registre et expose
+    l'endpoint `/metrics` au format Prometheus.
+
+    Avec plusieurs workers, `METRICS_DIR` doit désigner un répertoire commun :
+    chaque worker y écrit son instantané au plus toutes les
+    `METRICS_FLUSH_INTERVAL` secondes. L'endpoint n'est accessible que depuis
+    la machine locale (pair de la socket et client transmis par le proxy),
+    ou avec l'en-tête `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    directory = app.config.get("METRICS_DIR")
+    flush_interval = app.config.get("METRICS_FLUSH_INTERVAL", 5)
+    token = app.config.get("METRICS_TOKEN")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(registry.flush, directory)
+
+    _register_callbacks(app)
+    next_flush = [0.0]
+
+    @app.before_request
+    def start_metrics_timer() -> None:
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response: Response) -> Response:
+        if (start := g.get("_metrics_start")) is None or request.endpoint in ("metrics", "static"):
+            return response
+        duration = time.perf_counter() - start
+        blueprint = request.blueprint or ""
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        with registry.lock:
+            REQUESTS.inc((blueprint, route, request.method, str(response.status_code)))
+            LATENCY.observe((blueprint, route, request.method), duration)
+        if directory and (now := time.monotonic()) >= next_flush[0]:
+            next_flush[0] = now + flush_interval
+            registry.flush(directory)
+        return response
+
+    def metrics() -> Response:
+        # derrière un proxy inverse local, le pair de la socket est toujours
+        # 127.0.0.1 : le client résolu par ProxyFix (X-Forwarded-For ajouté
+        # par le proxy) doit aussi être local
+        environ = request.environ.get("werkzeug.proxy_fix.orig", request.environ)
+        local = {environ.get("REMOTE_ADDR"), request.remote_addr} <= LOOPBACK
+        if not local and not (token and request.headers.get("Authorization") == f"Bearer {token}"):
+            abort(403)
+        return Response(registry.render(directory),
+                        mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics)
+
+
+def _register_callbacks(app: Flask) -> None:
+    from . import db
+    from .cache import cache
+
+    registry.callback(
+        "counter", "cache_requests_total",
+        "Lectures du cache applicatif, par résultat.", ("result",),
+        lambda: {("hit",): float(cache.hits), ("miss",): float(cache.misses)})
+
+    def pool_usage() -> dict[Labels, float]:
+        # pool relu à chaque export : après le fork, dispose() le remplace
+        with app.app_context():
+            pool = db.engine.pool
+        usage: dict[Labels, float] = {}
+        for state in ("size", "checkedout", "overflow", "checkedin"):
+            if callable(function := getattr(pool, state, None)):
+                usage[(state,)] = float(function())
+        return usage
+
+    registry.callback("gauge", "db_pool_connections",
+                      "Connexions du pool SQLAlchemy, par état.", ("state",),
+                      pool_usage)
@@ -0,0 +1,139 @@
+import json
+import logging as lg
+from typing import Any
+
+from sqlalchemy import Connection, MetaData, Table, inspect, insert, select, text, update
+from sqlalchemy.schema import CreateColumn
+
+from . import db
+from .cache import cache
+from .models.cow import Cow
+from .models.medicine import Medicine
+from .models.pharmacie import Pharmacie
+from .models.prescription import Prescription
+
+# Colonnes de Pharmacie indexées par médicament
+PHARMACIE_COLUMNS: tuple[str, ...] = ("total_enter", "total_used", "total_used_calf",
+                                      "total_out_dlc", "total_out", "remaining_stock")
+
+
+def upgrade_schema(connection: Connection) -> list[str]:
+    """Crée les tables, colonnes et index du schéma courant absents de la
+    base, sans toucher aux données existantes.
+
+    Les colonnes ajoutées sont nullables ou ont une valeur par défaut côté
+    serveur, ce que permet `ALTER TABLE ... ADD COLUMN`.
+
+    Arguments:
+        * connection (Connection): Connexion dans la transaction de migration
+
+    Renvoie:
+        * list[str]: Description des éléments créés
+    """
+    created: list[str] = []
+    existing = set(inspect(connection).get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            table.create(connection)
+            created.append(f"table {table.name}")
+            continue
+        columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                created.append(f"column {table.name}.{column.name}")
+        for index in table.indexes:
+            if index.name not in {ix["name"] for ix in inspect(connection).get_indexes(table.name)}:
+                index.create(connection)
+                created.append(f"index {index.name}")
+    return created
+
+
+def _loads(value: Any) -> Any:
+    # une colonne JSON reflétée peut être lue comme texte selon la base
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def migrate_medicines(connection: Connection) -> int:
+    """Remplace la liste de médicaments `Users.medic_list` par le catalogue
+    `Medicine`, puis réécrit par identifiant les quantités enregistrées par
+    nom : médicaments des soins, contenu des prescriptions et bilans de
+    pharmacie. La colonne `medic_list` est ensuite supprimée.
+
+    Les identifiants suivent l'ordre de `medic_list` ; un nom présent dans
+    les données mais absent de la liste est ajouté au catalogue sans unité.
+    Sans colonne `medic_list`, la base est déjà migrée et rien n'est fait.
+
+    Arguments:
+        * connection (Connection): Connexion dans la transaction de migration
+
+    Renvoie:
+        * int: Nombre d'utilisateurs migrés
+    """
+    users = Table("users", MetaData(), autoload_with=connection)
+    if "medic_list" not in users.c:
+        return 0
+    medicine = Medicine.__table__
+    cow = Cow.__table__
+    prescription = Prescription.__table__
+    pharmacie = Pharmacie.__table__
+
+    rows = connection.execute(select(users.c.id, users.c.medic_list)).all()
+    for user_id, medic_list in rows:
+        ids: dict[str, int] = {name: medicine_id for medicine_id, name in connection.execute(
+            select(medicine.c.medicine_id, medicine.c.name).where(medicine.c.user_id == user_id))}
+
+        def medicine_id(name: str, unit: str = "") -> str:
+            if name not in ids:
+                ids[name] = len(ids)
+                connection.execute(insert(medicine).values(
+                    user_id=user_id, medicine_id=ids[name], name=name, unit=unit))
+            return str(ids[name])
+
+        def rekey(quantities: dict[str, int] | None) -> dict[str, int]:
+            return {medicine_id(name): quantity for name, quantity in (quantities or {}).items()}
+
+        for name, unit in (_loads(medic_list) or {}).items():
+            medicine_id(name, unit or "")
+
+        for cow_id, cares in connection.execute(
+                select(cow.c.cow_id, cow.c.cow_cares).where(cow.c.user_id == user_id)).all():
+            cares = [{**care, "medicaments": rekey(care.get("medicaments"))} for care in cares or []]
+            connection.execute(update(cow).where(cow.c.user_id == user_id, cow.c.cow_id == cow_id)
+                               .values(cow_cares=cares))
+
+        for prescription_id, care in connection.execute(
+                select(prescription.c.id, prescription.c.care)
+                .where(prescription.c.user_id == user_id)).all():
+            connection.execute(update(prescription).where(prescription.c.id == prescription_id)
+                               .values(care=rekey(care)))
+
+        for year, *values in connection.execute(
+                select(pharmacie.c.year, *(pharmacie.c[column] for column in PHARMACIE_COLUMNS))
+                .where(pharmacie.c.user_id == user_id)).all():
+            connection.execute(
+                update(pharmacie).where(pharmacie.c.user_id == user_id, pharmacie.c.year == year)
+                .values({column: rekey(value) for column, value in zip(PHARMACIE_COLUMNS, values)}))
+
+        lg.info(f"(user :{user_id}) : {len(ids)} medicines migrated to the catalog")
+
+    connection.execute(text("ALTER TABLE users DROP COLUMN medic_list"))
+    return len(rows)
+
+
+def migrate_database() -> list[str]:
+    """Met à niveau une base existante vers le schéma courant en une seule
+    transaction : éléments de schéma manquants, puis catalogue de médicaments
+    (voir `upgrade_schema` et `migrate_medicines`). Le cache est vidé.
+
+    Renvoie:
+        * list[str]: Description des changements appliqués
+    """
+    with db.engine.begin() as connection:
+        changes = upgrade_schema(connection)
+        if users := migrate_medicines(connection):
+            changes.append(f"medicine catalog of {users} user(s)")
+    cache.clear()
+    lg.warning(f"Database migrated: {', '.join(changes) or 'already up to date'}")
+    return changes
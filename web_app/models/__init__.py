@@ -5,6 +5,7 @@ from web_app.models.user import UserUtils
 
 
 from .. import db
+from ..cache import cache
 
 def init_db() -> None:
     """Initialise la base de données. Pour ce faire, supprime toutes les tables,
@@ -16,6 +17,7 @@ def init_db() -> None:
     """
     db.drop_all()
     db.create_all()
+    cache.clear()
     UserUtils.add_user(email="adm@mail.com",
                        password=generate_password_hash(password="adm"))
     UserUtils.add_user(email="adm2@mail.com",
@@ -26,4 +28,5 @@ def init_db() -> None:
 def init_db_test() -> None:
     db.drop_all()
     db.create_all()
+    cache.clear()
     lg.warning("Database initialized!")
\ No newline at end of file
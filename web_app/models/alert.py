@@ -0,0 +1,189 @@
+# Standard
+import logging as lg
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .medicine import MedicineUtils
+from .stock import StockVector
+from .. import db
+from ..storage import retry_on_conflict, retry_on_lock
+
+
+class StockAlert(db.Model):
+    """Représente une alerte de stock bas : le stock d'un médicament est
+    descendu au seuil de réapprovisionnement du catalogue ou en dessous.
+
+    Une alerte est ouverte au franchissement du seuil et close lorsque le
+    stock repasse au-dessus ; il y a au plus une alerte ouverte par
+    médicament. Les alertes sont tenues à jour à chaque mouvement de stock,
+    pour les seuls médicaments concernés (voir `AlertUtils.track_stock`).
+    """
+    __tablename__: str = "stock_alert"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    """Identifiant de l'alerte."""
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"),
+                                         nullable=False)
+    """Identifiant de l'utilisateur."""
+
+    medicine_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Identifiant du médicament dans le catalogue de l'utilisateur."""
+
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Dernier stock connu du médicament tant que l'alerte est ouverte."""
+
+    threshold: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Seuil de réapprovisionnement franchi."""
+
+    raised_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    """Date et heure du franchissement du seuil."""
+
+    notified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    """Date et heure d'envoi de l'alerte dans un résumé par courriel."""
+
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    """Date et heure du retour du stock au-dessus du seuil, None si
+    l'alerte est ouverte."""
+
+    # sert la lecture des alertes ouvertes (resolved_at nul) d'un utilisateur ;
+    # l'index unique partiel garantit une seule alerte ouverte par médicament,
+    # même si deux mouvements de stock concurrents la créent
+    __table_args__: tuple[Any, ...] = (
+        Index("ix_stock_alert_user_resolved", user_id, resolved_at, medicine_id),
+        Index("ux_stock_alert_open", user_id, medicine_id, unique=True,
+              sqlite_where=text("resolved_at IS NULL"),
+              postgresql_where=text("resolved_at IS NULL")),
+        {})
+
+    def __init__(self, user_id: int, medicine_id: int, stock: int, threshold: int):
+        """Initialise une alerte ouverte à l'instant présent.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medicine_id (int): Identifiant du médicament
+            * stock (int): Stock du médicament
+            * threshold (int): Seuil franchi
+        """
+        self.user_id = user_id
+        self.medicine_id = medicine_id
+        self.stock = stock
+        self.threshold = threshold
+        self.raised_at = datetime.now()
+
+
+class AlertUtils:
+    """Cette classe est un namespace, ses membres sont statiques.
+
+    Ce namespace regroupe les fonctions de suivi et de lecture des alertes de
+    stock bas.
+    """
+
+    @staticmethod
+    def track_stock(user_id: int, stock: StockVector, medicine_ids: Iterable[int]) -> None:
+        """Met à jour les alertes des médicaments dont le stock vient de
+        changer, sans enregistrer (commit) : l'appelant valide les alertes
+        avec le mouvement de stock. Une alerte ouverte entre-temps par une
+        écriture concurrente fait échouer l'enregistrement sur l'index
+        `ux_stock_alert_open` : l'appelant est décoré de `retry_on_conflict`.
+
+        Seuls les médicaments fournis sont examinés ; sans seuil parmi eux,
+        aucune requête n'est faite.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * stock (StockVector): Stock courant, après le mouvement
+            * medicine_ids (Iterable[int]): Médicaments dont le stock a changé
+        """
+        thresholds = MedicineUtils.get_catalog(user_id).thresholds
+        tracked = {medicine_id: thresholds[medicine_id] for medicine_id in medicine_ids
+                   if medicine_id < len(thresholds) and thresholds[medicine_id] is not None}
+        if not tracked:
+            return
+        opened = {alert.medicine_id: alert for alert in StockAlert.query.filter(
+            StockAlert.user_id == user_id, StockAlert.resolved_at.is_(None),
+            StockAlert.medicine_id.in_(tracked))}
+        for medicine_id, threshold in tracked.items():
+            alert = opened.get(medicine_id)
+            if stock[medicine_id] <= threshold:
+                if alert is None:
+                    db.session.add(StockAlert(user_id=user_id, medicine_id=medicine_id,
+                                              stock=stock[medicine_id], threshold=threshold))
+                    lg.info(f"(user :{user_id}, medicine: {medicine_id}) : low stock alert")
+                else:
+                    alert.stock = stock[medicine_id]
+                    alert.threshold = threshold
+            elif alert is not None:
+                alert.resolved_at = datetime.now()
+
+    @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
+    def refresh(user_id: int, stock: dict[str, int], medicine_ids: Iterable[int]) -> None:
+        """Met à jour les alertes des médicaments fournis d'après le stock
+        courant, après un changement de seuil, et enregistre (commit).
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * stock (dict[str, int]): Stock courant, par identifiant
+            * medicine_ids (Iterable[int]): Médicaments à examiner
+        """
+        AlertUtils.track_stock(user_id, StockVector.from_stored(stock), medicine_ids)
+        db.session.commit()
+
+    @staticmethod
+    @retry_on_lock
+    def resolve(user_id: int, medicine_id: int) -> None:
+        """Clôt l'alerte ouverte d'un médicament, s'il y en a une, et enregistre
+        (commit) la clôture.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medicine_id (int): Identifiant du médicament
+        """
+        for alert in StockAlert.query.filter_by(user_id=user_id, medicine_id=medicine_id,
+                                                resolved_at=None):
+            alert.resolved_at = datetime.now()
+        db.session.commit()
+
+    @staticmethod
+    def get_open_alerts(user_id: int) -> list[StockAlert]:
+        """Récupère les alertes ouvertes d'un utilisateur, par identifiant de
+        médicament.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+
+        Renvoie:
+            * list[StockAlert]: Les alertes ouvertes
+        """
+        return (StockAlert.query.filter_by(user_id=user_id, resolved_at=None)
+                .order_by(StockAlert.medicine_id).all())
+
+    @staticmethod
+    def get_unnotified_alerts() -> list[StockAlert]:
+        """Récupère les alertes ouvertes de tous les utilisateurs qui n'ont pas
+        encore été envoyées dans un résumé par courriel.
+
+        Renvoie:
+            * list[StockAlert]: Les alertes, par utilisateur puis médicament
+        """
+        return (StockAlert.query.filter(StockAlert.resolved_at.is_(None),
+                                        StockAlert.notified_at.is_(None))
+                .order_by(StockAlert.user_id, StockAlert.medicine_id).all())
+
+    @staticmethod
+    @retry_on_lock
+    def mark_notified(alert_ids: list[int]) -> None:
+        """Marque des alertes comme envoyées et enregistre (commit).
+
+        Arguments:
+            * alert_ids (list[int]): Identifiants des alertes envoyées
+        """
+        now = datetime.now()
+        for alert in StockAlert.query.filter(StockAlert.id.in_(alert_ids)):
+            alert.notified_at = now
+        db.session.commit()
@@ -3,23 +3,34 @@ import logging as lg
 from marshmallow import Schema, fields
 from datetime import date
 from copy import deepcopy
+import json
 from sqlalchemy import (
     Boolean,
     Date,
     ForeignKey,
+    Index,
     Integer,
     PrimaryKeyConstraint,
-    JSON,
-    String
+    String,
+    column,
+    func,
+    or_,
+    select,
+    type_coerce
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm.attributes import flag_modified
-from typing import Any
+from typing import Any, Callable
 
-from .type_dict import Note, Reproduction, Traitement, Traitement_signe
+from .type_dict import Note, Pharma_list_event, Reproduction, Traitement, Traitement_signe
 
+from .json_type import gin_index, is_postgresql, json_type
 from .. import db
+from ..storage import retry_on_conflict, retry_on_lock
+from ..cache import cache
+from ..history import HistoryItem, HistoryKey, keyset_before
 
 
 class CowSchema(Schema):
@@ -40,6 +51,8 @@ class CowSchema(Schema):
     reproduction = fields.List(fields.Dict())
     is_calf = fields.Boolean()
     init_as_cow = fields.Boolean()
+    milk_withdrawal_until = fields.Date()
+    meat_withdrawal_until = fields.Date()
 
 
 class Cow(db.Model):
@@ -59,6 +72,9 @@ class Cow(db.Model):
     :var reproduction: list[Reproduction], Historique de reproduction de la vache
     :var is_calf: bool, Indique si la vache est une génisse
     :var init_as_cow: bool, Indique si la vache a été initialisée directement comme vache adulte
+    :var version: int, Numéro de version de la ligne, incrémenté à chaque mise à jour
+    :var milk_withdrawal_until: date | None, Fin du délai d'attente lait en cours
+    :var meat_withdrawal_until: date | None, Fin du délai d'attente viande en cours
     """
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"),
@@ -82,13 +98,14 @@ class Cow(db.Model):
     """represente le sexe, True si femmelle, false si male et None sinon"""
 
     cow_cares: Mapped[list[Traitement]] = mapped_column(
-        MutableList.as_mutable(JSON),
+        MutableList.as_mutable(json_type()),
         default=list,
         nullable=False)
     """Liste de Traitement. Forme un dict {date_traitement: str,
-    medicaments: dict[str, int], annotation: str)."""
+    medicaments: dict[str, int], annotation: str), les médicaments étant
+    désignés par leur identifiant du catalogue."""
 
-    info: Mapped[list[Note]] = mapped_column(MutableList.as_mutable(JSON),
+    info: Mapped[list[Note]] = mapped_column(MutableList.as_mutable(json_type()),
                                              default=list, nullable=False)
     """Notes générales. Forme une liste de Note{date_note: str, information: str}"""
 
@@ -98,7 +115,7 @@ class Cow(db.Model):
     born_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     """Date de naissance de la vache."""
 
-    reproduction: Mapped[list[Reproduction]] = mapped_column(MutableList.as_mutable(JSON),
+    reproduction: Mapped[list[Reproduction]] = mapped_column(MutableList.as_mutable(json_type()),
                                                              default=list, nullable=False)
     """Liste des reproductions de la vache."""
 
@@ -110,10 +127,30 @@ class Cow(db.Model):
         Boolean, default=False, nullable=False)
     """True si la vache est comme vache adult, False sinon."""
 
-    __table_args__: tuple[PrimaryKeyConstraint, dict[str, Any]] = (
+    version: Mapped[int] = mapped_column(Integer, nullable=False,
+                                         server_default="1")
+    """Numéro de version de la ligne. Chaque UPDATE vérifie la version lue
+    (compare-and-swap) : une écriture concurrente lève StaleDataError au lieu
+    d'écraser silencieusement l'autre modification."""
+
+    milk_withdrawal_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    """Fin la plus tardive des délais d'attente lait des traitements, premier
+    jour où le lait peut être livré ; tenue à jour à chaque écriture des
+    traitements (voir `refresh_withdrawal`)."""
+
+    meat_withdrawal_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    """Fin la plus tardive des délais d'attente viande des traitements,
+    premier jour où l'animal peut être vendu pour la viande."""
+
+    __mapper_args__: dict[str, Any] = {"version_id_col": version}
+
+    __table_args__: tuple[Any, ...] = (
         PrimaryKeyConstraint(
             user_id,
             cow_id),
+        # servent la liste des animaux en délai d'attente (parcours d'intervalle)
+        Index("ix_cow_user_milk_withdrawal", user_id, milk_withdrawal_until),
+        Index("ix_cow_user_meat_withdrawal", user_id, meat_withdrawal_until),
         {})
     """restriction d'unicité sur la combinaison de user_id et cow_id, garantissant que chaque vache est unique pour chaque utilisateur."""
 
@@ -152,21 +189,36 @@ class Cow(db.Model):
         self.is_calf = is_calf
         self.init_as_cow = init_as_cow
 
-    def to_json(self):
-        """Convertit l'instance de vache en représentation JSON sérialisée.
+    def to_json(self) -> dict[str, Any]:
+        """Convertit l'instance de vache en représentation JSON.
 
-        Cette méthode utilise le schéma `CowSchema` pour produire un dictionnaire
-        prêt à être transmis via une API ou stocké.
+        Le dictionnaire contient les champs de `CowSchema`, construits
+        directement sans passer par le schéma : la date de naissance reste un
+        objet `date`, écrit au format ISO par le fournisseur JSON de
+        l'application (`FarmJSONProvider`) lors de la sérialisation.
 
         Arguments:
             * None
 
         Renvoie:
-            * dict: La représentation sérialisée de l'instance de vache.
+            * dict: La représentation de l'instance de vache.
         """
-        schema = CowSchema()
-
-        return schema.dump(self)
+        return {
+            "user_id": self.user_id,
+            "cow_id": self.cow_id,
+            "mother_id": self.mother_id,
+            "name": self.name,
+            "sexe": self.sexe,
+            "cow_cares": self.cow_cares,
+            "info": self.info,
+            "in_farm": self.in_farm,
+            "born_date": self.born_date,
+            "reproduction": self.reproduction,
+            "is_calf": self.is_calf,
+            "init_as_cow": self.init_as_cow,
+            "milk_withdrawal_until": self.milk_withdrawal_until,
+            "meat_withdrawal_until": self.meat_withdrawal_until,
+        }
 
     def is_calf_care(self, traitement: Traitement) -> bool:
         """Détermine si un traitement doit être considéré comme un soin de génisse.
@@ -189,6 +241,18 @@ class Cow(db.Model):
             and all(parse_date(traitement["date_traitement"]) <= parse_date(date) for date in self.reproduction[0]["insemination"])
         )
 
+    def refresh_withdrawal(self) -> None:
+        """Recalcule les fins de délai d'attente de la vache à partir de
+        celles enregistrées dans ses traitements.
+
+        À appeler avant chaque enregistrement (commit) modifiant `cow_cares`.
+        """
+        from web_app.fonction import parse_date
+        for attr, key in (("milk_withdrawal_until", "fin_retrait_lait"),
+                          ("meat_withdrawal_until", "fin_retrait_viande")):
+            setattr(self, attr, max((parse_date(care[key]) for care in self.cow_cares
+                                     if care.get(key)), default=None))
+
     def has_reproduction(self) -> bool:
         """Indique si la vache possède un historique de reproduction.
 
@@ -218,6 +282,27 @@ class Cow(db.Model):
         )
 
 
+gin_index(Cow.__table__, "cow_cares")
+gin_index(Cow.__table__, "reproduction")
+
+
+def _history_entry(user_id: int, cow_id: int, history: str, index: int) -> Any:
+    """Renvoie l'entrée d'un historique de vache (`cow_cares` ou
+    `reproduction`) à la position fournie, ou None si elle n'existe pas."""
+    cow: Cow | None = Cow.query.get({"user_id": user_id, "cow_id": cow_id})
+    entries = [] if cow is None else getattr(cow, history)
+    return entries[index] if -len(entries) <= index < len(entries) else None
+
+
+def _care_entry(user_id: int, cow_id: int, care_index: int, *_: Any, **__: Any) -> Any:
+    return _history_entry(user_id, cow_id, "cow_cares", care_index)
+
+
+def _reproduction_entry(user_id: int, cow_id: int, repro_index: int,
+                        *_: Any, **__: Any) -> Any:
+    return _history_entry(user_id, cow_id, "reproduction", repro_index)
+
+
 class CowUtils:
     """Cette classe est un namespace. Tous ses membres sont statiques.
 
@@ -264,6 +349,7 @@ class CowUtils:
         return Cow.query.filter_by(user_id=user_id).all()
 
     @staticmethod
+    @retry_on_lock
     def add_cow(user_id: int, cow_id: int, born_date: date | None = None,
                 init_as_cow: bool = True) -> None:
         """Ajoute une nouvelle vache pour un utilisateur donné si elle n'existe pas déjà.
@@ -299,6 +385,8 @@ class CowUtils:
                 f"(user :{user_id}, cow: {cow_id}) : already in database")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def update_cow(user_id: int, cow_id: int, **kwargs: dict[str, Any]) -> None:
         """Met à jour les attributs d'une vache dans la base de données.
 
@@ -321,6 +409,8 @@ class CowUtils:
                 f"(user :{user_id}, cow: {cow_id}) : doesn't exist in database")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def suppress_cow(user_id: int, cow_id: int) -> None:
         """Retire une vache associée à un identifiant de la base de données.
 
@@ -342,6 +432,8 @@ class CowUtils:
                 f"(user :{user_id}, cow: {cow_id}) : doesn't exist in database")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def remove_cow(user_id: int, cow_id: int) -> None:
         """Enregistre la sortie d'une vache de la ferme en mettant à jour le
         statut de la vache.
@@ -368,6 +460,7 @@ class CowUtils:
                 f"(user :{user_id}, cow: {cow_id}): n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
     def add_calf(user_id: int, calf_id: int,
                  mother_id: int | None = None,
                  born_date: date | None = None,
@@ -405,6 +498,8 @@ class CowUtils:
                 f"(user :{user_id}, cow: {calf_id}) : already in database")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def set_cow_name(user_id: int, cow_id: int, cow_name: str):
         """Met à jour le nom d'une vache dans la base de données.
 
@@ -435,8 +530,10 @@ class CowUtils:
 
     # cow care functions ------------------------------------------------
     @staticmethod
+    @retry_on_lock
     def add_cow_care(
-        user_id: int, cow_id: int,  cow_care: Traitement
+        user_id: int, cow_id: int,  cow_care: Traitement,
+        stock_change: Callable[[], Any] | None = None
     ) -> tuple[int, date | None]:
         """Met à jour l'historique des traitements de la vache associée à
         l'identifiant fourni en argument.
@@ -450,6 +547,8 @@ class CowUtils:
             * user_id (int): Identifiant de l'utilisateur
             * cow_id (int): Identifiant de la vache
             * cow_care (Traitement): Traitement à ajouter
+            * stock_change (Callable[[], Any] | None): Mouvement de stock causé
+            par le traitement, enregistré avec lui (voir `add_care`)
 
         Retourne:
             * tuple ([int, date] | None): le nombre de traitements restants et
@@ -458,13 +557,14 @@ class CowUtils:
         """
         cow: Cow | None
         if cow := Cow.query.get({"user_id": user_id, "cow_id": cow_id}):
-            return CowUtils.add_care(cow, cow_care)
+            return CowUtils.add_care(cow, cow_care, stock_change)
         lg.error(f"(user :{user_id}, cow: {cow_id})  not found.")
         raise ValueError(f"(user :{user_id}, cow: {cow_id})  n'existe pas.")
 
     @staticmethod
+    @retry_on_conflict
     def add_care(
-        cow: Cow, cow_care: Traitement
+        cow: Cow, cow_care: Traitement, stock_change: Callable[[], Any] | None = None
     ) -> tuple[int, date | None]:
         """Ajoute un traitement à la vache spécifiée et renvoie les données de
         traitement mises à jour.
@@ -474,10 +574,17 @@ class CowUtils:
         modifications, et calcule le nombre de traitements restants et la date
         du suivant.
 
+        Le mouvement de stock `stock_change` (pharmacie et lots) est appliqué
+        à la session avant le traitement, puis enregistré dans la même
+        transaction : traitement et stock ne peuvent diverger, et un nouvel
+        essai après conflit le rejoue sur l'état relu.
+
         Arguments:
             * cow (Cow): L'objet Cow à mettre à jour
             * cow_care (Traitement): Les informations de
             traitement à ajouter
+            * stock_change (Callable[[], Any] | None): Mouvement de stock causé
+            par le traitement, sans enregistrement (commit)
 
         Renvoie:
         * tuple[int, date]: Le nombre de traitements restants et la date du
@@ -485,8 +592,11 @@ class CowUtils:
         """
 
         from ..fonction import remaining_care_on_year, new_available_care
+        if stock_change:
+            stock_change()
         # Ajouter le traitement à la liste
         cow.cow_cares.append(cow_care)
+        cow.refresh_withdrawal()
 
         # Commit les changements
         db.session.commit()
@@ -497,8 +607,11 @@ class CowUtils:
         return remaining_care_on_year(cow=cow), new_available_care(cow=cow)
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict(target=_care_entry)
     def update_cow_care(
-        user_id: int, cow_id: int, care_index: int, new_care: Traitement
+        user_id: int, cow_id: int, care_index: int, new_care: Traitement,
+        stock_change: Callable[[], Any] | None = None
     ) -> None:
         """Met à jour la liste de traitements d'une vache.
 
@@ -512,18 +625,26 @@ class CowUtils:
             * cow_id (int): Identifiant de la vache concernée
             * care_index (int): Position dans la liste du traitement à modifier
             * new_care (Traitement): Nouvelles données de traitement
+            * stock_change (Callable[[], Any] | None): Mouvement de stock causé
+            par la modification, enregistré avec elle (voir `add_care`)
         """
         cow: Cow | None
         if cow := Cow.query.get({"user_id": user_id, "cow_id": cow_id}):
             # Remplacement du soin dans la liste
             if care_index >= len(cow.cow_cares):
                 raise IndexError("index out of bounds")
+            if stock_change:
+                stock_change()
             care = cow.cow_cares[care_index]
             care["date_traitement"] = new_care["date_traitement"]
             care["medicaments"] = new_care["medicaments"]
             care["annotation"] = new_care["annotation"]
+            for key in ("fin_retrait_lait", "fin_retrait_viande"):
+                if key in new_care:
+                    care[key] = new_care[key]
             # Indique à SQLAlchemy que cow_cares a été modifié
             flag_modified(cow, "cow_cares")
+            cow.refresh_withdrawal()
             db.session.commit()
 
             lg.info(
@@ -533,7 +654,10 @@ class CowUtils:
                 f"(user :{user_id}, cow: {cow_id}) : doesn't exist in database")
 
     @staticmethod
-    def delete_cow_care(user_id: int, cow_id: int, care_index: int) -> None:
+    @retry_on_lock
+    @retry_on_conflict(target=_care_entry)
+    def delete_cow_care(user_id: int, cow_id: int, care_index: int,
+                        stock_change: Callable[[], Any] | None = None) -> None:
         """Retire un traitement de la liste de traitements d'une vache
 
         Cette fonction retire le traitement à l'indice spécifié de la liste de
@@ -544,10 +668,17 @@ class CowUtils:
             * user_id (int): Identifiant de l'utilisateur
             * cow_id (int): Identifiant de la vache
             * care_index (int): Indice du traitement dans la liste
+            * stock_change (Callable[[], Any] | None): Remise en stock causée
+            par la suppression, enregistrée avec elle (voir `add_care`)
         """
         cow: Cow | None
         if cow := Cow.query.get({"user_id": user_id, "cow_id": cow_id}):
+            if care_index >= len(cow.cow_cares):
+                raise IndexError("index out of bounds")
+            if stock_change:
+                stock_change()
             del cow.cow_cares[care_index]
+            cow.refresh_withdrawal()
             db.session.commit()
             lg.info(
                 f"(user :{user_id}, cow: {cow_id}) : care deleted in database")
@@ -585,6 +716,134 @@ class CowUtils:
                        ["date_traitement"], reverse=True)
         return all_cares
 
+    @staticmethod
+    def get_care_events(user_id: int, after: HistoryKey | None, limit: int,
+                        medic: str | None = None) -> list[HistoryItem]:
+        """Lit un lot de traitements de toutes les vaches d'un utilisateur,
+        du plus récent au plus ancien, pour l'historique de la pharmacie.
+
+        Les listes JSON sont dépliées et triées par la base (`json_each` sur
+        SQLite, `jsonb_array_elements` sur PostgreSQL) : seul le lot demandé
+        est chargé. Sur PostgreSQL, le filtre par médicament est aussi évalué
+        en base ; ailleurs, il revient à l'appelant.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * after (HistoryKey | None): Clé du dernier événement déjà lu
+            * limit (int): Nombre maximal de traitements lus
+            * medic (str | None): Clé du médicament recherché, son
+            identifiant du catalogue (PostgreSQL)
+
+        Renvoie:
+            * list[HistoryItem]: Couples (clé, événement), par clé décroissante
+        """
+        if is_postgresql(db.engine):
+            elements = func.jsonb_array_elements(type_coerce(Cow.cow_cares, JSONB)).table_valued(
+                column("value", JSONB), with_ordinality="key", joins_implicitly=True)
+            care_date = elements.c.value["date_traitement"].astext
+        else:
+            elements = func.json_each(Cow.cow_cares).table_valued(
+                "key", "value", joins_implicitly=True)
+            care_date = func.json_extract(elements.c.value, "$.date_traitement")
+
+        query = (select(Cow.cow_id, elements.c.key, elements.c.value)
+                 .where(Cow.user_id == user_id, care_date.is_not(None))
+                 .order_by(care_date.desc(), Cow.cow_id.desc(), elements.c.key.desc())
+                 .limit(limit))
+        if (condition := keyset_before(after, 1, care_date, Cow.cow_id, elements.c.key)) is not None:
+            query = query.where(condition)
+        if medic is not None and is_postgresql(db.engine):
+            query = query.where(elements.c.value["medicaments"].has_key(medic))
+
+        events: list[HistoryItem] = []
+        for cow_id, key, value in db.session.execute(query):
+            care: Traitement = json.loads(value) if isinstance(value, str) else value
+            events.append(((care["date_traitement"], 1, cow_id, int(key)),
+                           Pharma_list_event(date=care["date_traitement"],
+                                             medicaments=care["medicaments"],
+                                             event_type=f"care {cow_id}")))
+        return events
+
+    @staticmethod
+    def get_cows_treated_with(user_id: int, medic: str) -> list[int]:
+        """Renvoie les identifiants des vaches présentes dans la ferme ayant
+        reçu au moins un traitement contenant le médicament donné.
+
+        Sur PostgreSQL, le filtre est évalué en base sur la colonne JSONB
+        (opérateur `@?`, servi par l'index GIN) ; sur les autres bases, il est
+        appliqué après lecture des vaches.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medic (str): Clé du médicament recherché, son identifiant du
+            catalogue
+
+        Renvoie:
+            * list[int]: Identifiants des vaches traitées, triés
+        """
+        query = Cow.query.filter_by(user_id=user_id, in_farm=True)
+        if is_postgresql(db.engine):
+            # json.dumps produit un littéral de chaîne valide en JSONPath
+            path = f"$[*].medicaments.{json.dumps(medic)}"
+            cows: list[Cow] = query.filter(
+                type_coerce(Cow.cow_cares, JSONB).path_exists(path)).all()
+        else:
+            cows = [cow for cow in query.all()
+                    if any(medic in care.get("medicaments", {})
+                           for care in cow.cow_cares)]
+        return sorted(cow.cow_id for cow in cows)
+
+    @staticmethod
+    def get_under_withdrawal(user_id: int, today: date) -> list[Cow]:
+        """Renvoie les vaches présentes dans la ferme dont le lait ou la viande
+        sont encore sous délai d'attente à la date fournie.
+
+        La lecture parcourt les index (user_id, milk_withdrawal_until) et
+        (user_id, meat_withdrawal_until) ; les traitements ne sont pas relus.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * today (date): Date de référence
+
+        Renvoie:
+            * list[Cow]: Vaches en délai d'attente, par identifiant croissant
+        """
+        return (Cow.query.filter(Cow.user_id == user_id,
+                                 or_(Cow.milk_withdrawal_until > today,
+                                     Cow.meat_withdrawal_until > today))
+                .filter_by(in_farm=True).order_by(Cow.cow_id).all())
+
+    @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
+    def refresh_cares_withdrawal(user_id: int, medic: str,
+                                 withdrawal_fields: Callable[[Traitement], dict[str, Any]]) -> int:
+        """Recalcule les fins de délai d'attente des traitements contenant un
+        médicament, après modification de ses délais.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medic (str): Clé du médicament, son identifiant du catalogue
+            * withdrawal_fields (Callable[[Traitement], dict[str, Any]]):
+            Calcule les champs de fin de délai d'un traitement
+
+        Renvoie:
+            * int: Nombre de vaches mises à jour
+        """
+        updated = 0
+        for cow in Cow.query.filter_by(user_id=user_id).all():
+            cares = [care for care in cow.cow_cares
+                     if medic in care.get("medicaments", {})]
+            for care in cares:
+                care.update(withdrawal_fields(care))
+            if cares:
+                flag_modified(cow, "cow_cares")
+                cow.refresh_withdrawal()
+                updated += 1
+        db.session.commit()
+        lg.info(f"(user :{user_id}) : withdrawal refreshed on {updated} cows")
+        return updated
+
     @staticmethod
     def get_care_by_id(user_id: int, cow_id: int,) -> list[Traitement] | None:
         """Récupère l'historique des traitements pour une vache donnée.
@@ -674,6 +933,8 @@ class CowUtils:
     # reproduction functions ------------------------------------------------
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def add_insemination(user_id: int, cow_id: int, insemination: str) -> None:
         """Ajoute une entrée à l'historique d'insémination de la vache spécifiée
 
@@ -720,6 +981,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def add_second_isemination_on_current_reproduction(user_id: int, cow_id: int, insemination: str) -> None:
         """Ajoute une seconde insémination à la dernière reproduction de la vache spécifiée
 
@@ -752,6 +1015,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def validated_ultrasound(user_id: int, cow_id: int, ultrasound: bool, dry_time: int,  calving_preparation_time: int, date: str) -> None:
         """Valide ou invalide le résultat de l'échographie pour une vache.
 
@@ -851,6 +1116,24 @@ class CowUtils:
         return None if len(cow.reproduction) < 1 else cow.reproduction[-1]
 
     @staticmethod
+    def _with_ultrasound_query(user_id: int) -> Any:
+        """Construit la requête des vaches présentes dans la ferme ayant au
+        moins une reproduction confirmée par échographie.
+
+        Sur PostgreSQL, la condition est évaluée en base (opérateur `@>` sur la
+        colonne JSONB, servi par l'index GIN). Ailleurs, la requête renvoie
+        toutes les vaches présentes : l'appelant doit toujours vérifier la
+        dernière reproduction.
+        """
+        query = Cow.query.filter_by(user_id=user_id, in_farm=True)
+        if is_postgresql(db.engine):
+            query = query.filter(type_coerce(Cow.reproduction, JSONB)
+                                 .contains([{"ultrasound": True}]))
+        return query
+
+    @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def reload_all_reproduction(user_id: int, dry_time: int, calving_preparation_time: int) -> None:
         """Recalcule les dates de reproduction pour toutes les vaches en gestation d'un utilisateur.
 
@@ -867,8 +1150,7 @@ class CowUtils:
         """
         from ..fonction import last
 
-        cows: list[Cow] = Cow.query.filter_by(
-            user_id=user_id, in_farm=True).all()
+        cows: list[Cow] = CowUtils._with_ultrasound_query(user_id).all()
         for cow in cows:
             if (last(cow.reproduction)
                 and cow.reproduction[-1].get("ultrasound")
@@ -881,6 +1163,7 @@ class CowUtils:
         lg.info("reproduction reload")
 
     @staticmethod
+    @cache.memoize("cow")
     def get_valid_reproduction(user_id: int) -> dict[int, Reproduction]:
         """Récupère la dernière entrée de reproduction valide pour toutes les
         vaches dont les ultrasons ont été confirmés.
@@ -897,8 +1180,7 @@ class CowUtils:
             contenant leur plus récente reproduction avec ultrasons confirmés
         """
         from ..fonction import last
-        cows: list[Cow] = Cow.query.filter_by(
-            user_id=user_id, in_farm=True).all()
+        cows: list[Cow] = CowUtils._with_ultrasound_query(user_id).all()
         return {
             cow.cow_id: cow.reproduction[-1]
             for cow in cows
@@ -908,6 +1190,8 @@ class CowUtils:
         }
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def validated_calving(cow_id: int, user_id: int, abortion: bool,
                           info: str | None = None) -> None:
         """Valide le vêlage pour une vache et enregistre si c'était un
@@ -948,6 +1232,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def validated_dry(user_id: int, cow_id: int) -> None:
         """Valide le tarissage d'une vache.
 
@@ -984,6 +1270,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def validated_calving_preparation(user_id: int, cow_id: int) -> None:
         """Valide la date de préparation du vêlage pour une vache.
 
@@ -1016,6 +1304,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} n'existe pas.")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict(target=_reproduction_entry)
     def update_cow_reproduction(
         user_id: int,
         cow_id: int,
@@ -1058,6 +1348,8 @@ class CowUtils:
             raise ValueError(f"{cow_id} : doesn't exist in database")
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict(target=_reproduction_entry)
     def delete_cow_reproduction(user_id: int, cow_id: int, repro_index: int) -> None:
         """Supprime une entrée de l'historique de reproduction d'une vache.
 
@@ -0,0 +1,34 @@
+from sqlalchemy import DDL, JSON, Engine, Table, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeEngine
+
+
+def json_type() -> TypeEngine:
+    """Renvoie le type des colonnes JSON : JSONB sur PostgreSQL, JSON
+    générique sur les autres bases (SQLite).
+
+    Une nouvelle instance est créée à chaque appel, comme l'attendent
+    `MutableList.as_mutable` et `MutableDict.as_mutable`.
+    """
+    return JSON().with_variant(JSONB(), "postgresql")
+
+
+def gin_index(table: Table, column: str) -> None:
+    """Déclare un index GIN sur une colonne JSONB. L'index n'est créé qu'avec
+    la table, et seulement sur PostgreSQL.
+
+    Arguments:
+        * table (Table): Table portant la colonne
+        * column (str): Nom de la colonne JSONB à indexer
+    """
+    event.listen(
+        table,
+        "after_create",
+        DDL(f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{column}_gin "
+            f"ON {table.name} USING gin ({column})"
+            ).execute_if(dialect="postgresql"))
+
+
+def is_postgresql(engine: Engine) -> bool:
+    """Indique si le moteur fourni cible PostgreSQL."""
+    return engine.dialect.name == "postgresql"
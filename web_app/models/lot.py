@@ -0,0 +1,208 @@
+# Standard
+import logging as lg
+from datetime import date
+from typing import Any, Mapping
+
+from sqlalchemy import Date, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .. import db
+
+
+class Lot(db.Model):
+    """Représente un lot de médicament entré en pharmacie par une ligne de
+    prescription : quantité reçue, quantité restante et date de péremption.
+
+    Les lots sont consommés du premier périmé au dernier (FEFO). Une ligne de
+    prescription saisie sans date de péremption donne un lot sans date,
+    consommé en dernier. Le stock enregistré avant le suivi par lot (stock
+    initial, prescriptions antérieures) n'a pas de lot : seule la pharmacie
+    annuelle (`Pharmacie`) fait foi pour les quantités.
+    """
+    __tablename__: str = "lot"
+    from datetime import date as dateType
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    """Identifiant du lot."""
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"),
+                                         nullable=False)
+    """Identifiant de l'utilisateur propriétaire du lot."""
+
+    medicine_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Identifiant du médicament dans le catalogue de l'utilisateur."""
+
+    prescription_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("prescription.id", ondelete="CASCADE"))
+    """Identifiant de la prescription ayant fait entrer le lot."""
+
+    expiry: Mapped[dateType | None] = mapped_column(Date)
+    """Date de péremption du lot, None si inconnue."""
+
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Quantité entrée avec le lot."""
+
+    remaining: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Quantité du lot restant en pharmacie."""
+
+    # (user_id, medicine_id, expiry) sert la consommation FEFO d'un médicament,
+    # (user_id, expiry) le rapport des lots arrivant à péremption
+    __table_args__: tuple[Any, ...] = (
+        Index("ix_lot_user_medicine_expiry", user_id, medicine_id, expiry),
+        Index("ix_lot_user_expiry", user_id, expiry),
+        {})
+
+    def __init__(self, user_id: int, medicine_id: int, quantity: int,
+                 expiry: dateType | None = None,
+                 prescription_id: int | None = None):
+        """Initialise un lot plein avec les arguments fournis.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medicine_id (int): Identifiant du médicament
+            * quantity (int): Quantité entrée
+            * expiry (date | None): Date de péremption du lot
+            * prescription_id (int | None): Identifiant de la prescription
+        """
+        self.user_id = user_id
+        self.medicine_id = medicine_id
+        self.quantity = quantity
+        self.remaining = quantity
+        self.expiry = expiry
+        self.prescription_id = prescription_id
+
+
+class LotUtils:
+    """Cette classe est un namespace, ses membres sont statiques.
+
+    Ce namespace regroupe les fonctions de création, de consommation et de
+    lecture des lots de médicaments.
+    """
+
+    @staticmethod
+    def add_lots(user_id: int, prescription_id: int, care_items: Mapping[str, int],
+                 expiries: Mapping[str, date] | None = None) -> None:
+        """Ajoute à la session un lot par ligne de prescription, sans
+        enregistrer (commit) : l'appelant valide les lots avec la
+        prescription.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * prescription_id (int): Identifiant de la prescription
+            * care_items (Mapping[str, int]): Quantités prescrites par
+            identifiant de médicament
+            * expiries (Mapping[str, date] | None): Dates de péremption par
+            identifiant de médicament
+        """
+        expiries = expiries or {}
+        db.session.add_all(Lot(user_id=user_id, medicine_id=int(key), quantity=quantity,
+                               expiry=expiries.get(key), prescription_id=prescription_id)
+                           for key, quantity in care_items.items() if quantity > 0)
+
+    @staticmethod
+    def apply_stock_delta(user_id: int, stock_delta: Mapping[str, int]) -> dict[int, int]:
+        """Répercute une variation de stock sur les lots, sans enregistrer
+        (commit) : l'appelant valide les lots avec le mouvement de stock
+        (voir `PharmacieUtils.change_pharmacie_year`).
+
+        Les quantités retirées (négatives) sont prises sur les lots du premier
+        périmé au dernier ; les quantités rendues (positives, suppression d'un
+        soin par exemple) remplissent les lots entamés dans l'ordre inverse,
+        ce qui annule la dernière consommation. Les lots de tous les
+        médicaments concernés sont lus en une requête par sens, servie par
+        l'index (user_id, medicine_id, expiry). La part d'un retrait qui
+        dépasse les lots suivis concerne du stock sans lot et est ignorée.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * stock_delta (Mapping[str, int]): Variation du stock par
+            identifiant de médicament
+
+        Renvoie:
+            * dict[int, int]: Quantité prise (négative) ou rendue (positive)
+            par identifiant de lot
+        """
+        moved: dict[int, int] = {}
+        for sign in (-1, 1):
+            pending = {int(key): sign * change for key, change in stock_delta.items()
+                       if sign * change > 0}
+            if not pending:
+                continue
+            query = Lot.query.filter(Lot.user_id == user_id,
+                                     Lot.medicine_id.in_(pending))
+            if sign < 0:
+                query = query.filter(Lot.remaining > 0).order_by(
+                    Lot.medicine_id, Lot.expiry.asc().nulls_last(), Lot.id)
+            else:
+                query = query.filter(Lot.remaining < Lot.quantity).order_by(
+                    Lot.medicine_id, Lot.expiry.desc().nulls_first(), Lot.id.desc())
+            for lot in query.with_for_update():
+                room = lot.remaining if sign < 0 else lot.quantity - lot.remaining
+                step = min(room, pending[lot.medicine_id])
+                if step:
+                    lot.remaining += sign * step
+                    pending[lot.medicine_id] -= step
+                    moved[lot.id] = sign * step
+            if untracked := {medicine_id: left for medicine_id, left in pending.items() if left}:
+                lg.debug(f"(user :{user_id}) : stock without lot {untracked}")
+        return moved
+
+    @staticmethod
+    def get_lots(user_id: int, medicine_id: int) -> list[Lot]:
+        """Récupère les lots entamés ou pleins d'un médicament, dans l'ordre de
+        consommation (premier périmé en premier).
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medicine_id (int): Identifiant du médicament
+
+        Renvoie:
+            * list[Lot]: Les lots non vides du médicament
+        """
+        return (Lot.query.filter(Lot.user_id == user_id, Lot.medicine_id == medicine_id,
+                                 Lot.remaining > 0)
+                .order_by(Lot.expiry.asc().nulls_last(), Lot.id).all())
+
+    @staticmethod
+    def get_expiring(user_id: int, until: date) -> list[Lot]:
+        """Récupère les lots non vides périmés au plus tard à la date fournie,
+        déjà périmés compris, du premier périmé au dernier.
+
+        La lecture est un parcours de l'intervalle (user_id, expiry <= until)
+        de l'index (user_id, expiry) ; l'historique n'est pas relu.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * until (date): Dernière date de péremption incluse
+
+        Renvoie:
+            * list[Lot]: Les lots concernés
+        """
+        return (Lot.query.filter(Lot.user_id == user_id, Lot.expiry <= until,
+                                 Lot.remaining > 0)
+                .order_by(Lot.expiry, Lot.id).all())
+
+    @staticmethod
+    def remove_prescription_lots(user_id: int, prescription_id: int) -> None:
+        """Supprime de la session les lots d'une prescription, sans enregistrer
+        (commit) : l'appelant valide la suppression avec celle de la
+        prescription.
+
+        La part déjà consommée d'un lot (`quantity - remaining`) reste sortie
+        du stock : elle est reportée sur les autres lots du médicament, du
+        premier périmé au dernier, pour que les lots restants suivent encore
+        le stock de la pharmacie.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * prescription_id (int): Identifiant de la prescription
+        """
+        consumed: dict[str, int] = {}
+        for lot in Lot.query.filter_by(user_id=user_id, prescription_id=prescription_id):
+            if lot.remaining < lot.quantity:
+                key = str(lot.medicine_id)
+                consumed[key] = consumed.get(key, 0) - (lot.quantity - lot.remaining)
+            db.session.delete(lot)
+        if consumed:
+            db.session.flush()
+            LotUtils.apply_stock_delta(user_id, consumed)
@@ -0,0 +1,284 @@
+# Standard
+import logging as lg
+from datetime import date, timedelta
+from typing import Any, Mapping
+
+from sqlalchemy import (
+    ForeignKey,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    UniqueConstraint,
+    func
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .. import db
+from ..cache import cache
+from ..storage import retry_on_lock
+
+
+class Medicine(db.Model):
+    """Représente un médicament du catalogue de la pharmacie d'un utilisateur.
+
+    Les identifiants sont attribués par utilisateur dans l'ordre d'ajout, à
+    partir de 0, et ne sont jamais réattribués : ils servent de clés aux
+    quantités enregistrées (soins, prescriptions, bilans de pharmacie) et
+    d'indices aux vecteurs de quantités.
+    """
+    __tablename__: str = "medicine"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"),
+                                         nullable=False)
+    """Identifiant de l'utilisateur propriétaire du catalogue."""
+
+    medicine_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    """Identifiant du médicament, dense et unique pour chaque utilisateur."""
+
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    """Nom du médicament, unique pour chaque utilisateur."""
+
+    unit: Mapped[str] = mapped_column(String(20), nullable=False, default="")
+    """Unité de mesure des quantités (ml, comprimé...)."""
+
+    milk_withdrawal_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0,
+                                                      server_default="0")
+    """Délai d'attente pour le lait après administration, en jours."""
+
+    meat_withdrawal_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0,
+                                                      server_default="0")
+    """Délai d'attente pour la viande après administration, en jours."""
+
+    reorder_threshold: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    """Seuil de réapprovisionnement : une alerte est levée quand le stock
+    descend à ce niveau ou en dessous. None si le médicament n'est pas suivi."""
+
+    __table_args__: tuple[Any, ...] = (
+        PrimaryKeyConstraint(user_id, medicine_id),
+        UniqueConstraint(user_id, name),
+        {})
+
+    def __init__(self, user_id: int, medicine_id: int, name: str, unit: str,
+                 milk_withdrawal_days: int = 0, meat_withdrawal_days: int = 0):
+        """Initialise un objet Medicine avec les arguments fournis.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * medicine_id (int): Identifiant du médicament
+            * name (str): Nom du médicament
+            * unit (str): Unité de mesure du médicament
+            * milk_withdrawal_days (int): Délai d'attente lait, en jours
+            * meat_withdrawal_days (int): Délai d'attente viande, en jours
+        """
+        self.user_id = user_id
+        self.medicine_id = medicine_id
+        self.name = name
+        self.unit = unit
+        self.milk_withdrawal_days = milk_withdrawal_days
+        self.meat_withdrawal_days = meat_withdrawal_days
+
+
+class MedicineCatalog:
+    """Instantané du catalogue de médicaments d'un utilisateur.
+
+    Les quantités sont enregistrées en base sous la forme
+    {<identifiant en chaîne>: <quantité>} (les clés d'un objet JSON sont des
+    chaînes) ; le catalogue les convertit depuis et vers les noms affichés.
+    Les agrégations se font sur des vecteurs indexés par identifiant (voir
+    `StockVector`).
+    """
+
+    def __init__(self, names: list[str], units: list[str],
+                 milk_withdrawals: list[int] | None = None,
+                 meat_withdrawals: list[int] | None = None,
+                 thresholds: list[int | None] | None = None):
+        """Arguments:
+            * names (list[str]): Noms des médicaments, indexés par identifiant
+            * units (list[str]): Unités des médicaments, indexées par
+            identifiant
+            * milk_withdrawals (list[int] | None): Délais d'attente lait en
+            jours, indexés par identifiant, nuls par défaut
+            * meat_withdrawals (list[int] | None): Délais d'attente viande en
+            jours, indexés par identifiant, nuls par défaut
+            * thresholds (list[int | None] | None): Seuils de
+            réapprovisionnement, indexés par identifiant, aucun par défaut
+        """
+        self.names = names
+        self.units = units
+        self.milk_withdrawals = milk_withdrawals or [0] * len(names)
+        self.meat_withdrawals = meat_withdrawals or [0] * len(names)
+        self.thresholds = thresholds or [None] * len(names)
+        self.ids: dict[str, int] = {name: medicine_id
+                                    for medicine_id, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def key_of(self, name: str) -> str:
+        """Renvoie la clé de stockage du médicament nommé.
+
+        Lance:
+            * ValueError si le médicament n'est pas dans le catalogue
+        """
+        try:
+            return str(self.ids[name])
+        except KeyError:
+            raise ValueError(f"{name} n'est pas dans la pharmacie") from None
+
+    def encode(self, quantities: Mapping[str, int]) -> dict[str, int]:
+        """Convertit des quantités par nom en quantités par identifiant.
+
+        Lance:
+            * ValueError si un médicament n'est pas dans le catalogue
+        """
+        return {self.key_of(name): quantity for name, quantity in quantities.items()}
+
+    def decode(self, stored: Mapping[str, int]) -> dict[str, int]:
+        """Convertit des quantités par identifiant en quantités par nom."""
+        return {self.names[int(key)]: quantity for key, quantity in stored.items()}
+
+    def withdrawal_ends(self, care_date: date,
+                        stored: Mapping[str, int]) -> tuple[date | None, date | None]:
+        """Calcule les fins des délais d'attente d'un traitement, premiers
+        jours où le lait, puis la viande, peuvent de nouveau être livrés.
+
+        Arguments:
+            * care_date (date): Date du traitement
+            * stored (Mapping[str, int]): Médicaments du traitement, par
+            identifiant
+
+        Renvoie:
+            * tuple[date | None, date | None]: Fins des délais lait et
+            viande, None si aucun médicament du traitement n'en impose
+        """
+        ends = []
+        for withdrawals in (self.milk_withdrawals, self.meat_withdrawals):
+            days = max((withdrawals[int(key)] for key in stored), default=0)
+            ends.append(care_date + timedelta(days=days) if days > 0 else None)
+        return ends[0], ends[1]
+
+    def units_by_name(self) -> dict[str, str]:
+        """Renvoie le dictionnaire {<nom>: <unité>} des médicaments, dans
+        l'ordre des identifiants."""
+        return dict(zip(self.names, self.units))
+
+
+class MedicineUtils:
+    """Cette classe est un namespace, ses membres sont statiques.
+
+    Ce namespace regroupe les fonctions d'ajout et de lecture du catalogue de
+    médicaments des utilisateurs.
+    """
+
+    @staticmethod
+    @retry_on_lock
+    def add_medicine(user_id: int, name: str, unit: str) -> int:
+        """Ajoute un médicament au catalogue de l'utilisateur s'il n'y est pas
+        déjà, et renvoie son identifiant.
+
+        Le nouvel identifiant suit le dernier attribué. Si un ajout concurrent
+        prend le même identifiant ou le même nom, l'insertion est annulée et
+        relancée.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * name (str): Nom du médicament
+            * unit (str): Unité de mesure du médicament
+
+        Renvoie:
+            * int: Identifiant du médicament
+        """
+        while True:
+            if medicine := Medicine.query.filter_by(user_id=user_id, name=name).first():
+                return medicine.medicine_id
+            medicine_id = (db.session.query(func.count(Medicine.medicine_id))
+                           .filter_by(user_id=user_id).scalar())
+            db.session.add(Medicine(user_id=user_id, medicine_id=medicine_id,
+                                    name=name, unit=unit))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                continue
+            lg.info(f"{name} add in pharma list")
+            return medicine_id
+
+    @staticmethod
+    @cache.memoize("medicine")
+    def get_catalog(user_id: int) -> MedicineCatalog:
+        """Récupère le catalogue de médicaments de l'utilisateur.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+
+        Renvoie:
+            * MedicineCatalog: Le catalogue, indexé par identifiant
+        """
+        medicines = (Medicine.query.filter_by(user_id=user_id)
+                     .order_by(Medicine.medicine_id).all())
+        return MedicineCatalog(names=[medicine.name for medicine in medicines],
+                               units=[medicine.unit for medicine in medicines],
+                               milk_withdrawals=[medicine.milk_withdrawal_days
+                                                 for medicine in medicines],
+                               meat_withdrawals=[medicine.meat_withdrawal_days
+                                                 for medicine in medicines],
+                               thresholds=[medicine.reorder_threshold
+                                           for medicine in medicines])
+
+    @staticmethod
+    @retry_on_lock
+    def set_withdrawal(user_id: int, name: str, milk_days: int, meat_days: int) -> int:
+        """Règle les délais d'attente d'un médicament du catalogue.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * name (str): Nom du médicament
+            * milk_days (int): Délai d'attente lait, en jours
+            * meat_days (int): Délai d'attente viande, en jours
+
+        Renvoie:
+            * int: Identifiant du médicament
+
+        Lance:
+            * ValueError si le médicament n'est pas dans le catalogue ou si un
+            délai est négatif
+        """
+        if milk_days < 0 or meat_days < 0:
+            raise ValueError("Un délai d'attente ne peut pas être négatif")
+        medicine = Medicine.query.filter_by(user_id=user_id, name=name).first()
+        if medicine is None:
+            raise ValueError(f"{name} n'est pas dans la pharmacie")
+        medicine.milk_withdrawal_days = milk_days
+        medicine.meat_withdrawal_days = meat_days
+        db.session.commit()
+        lg.info(f"(user :{user_id}) : withdrawal of {name} set to {milk_days}/{meat_days} days")
+        return medicine.medicine_id
+
+    @staticmethod
+    @retry_on_lock
+    def set_threshold(user_id: int, name: str, threshold: int | None) -> int:
+        """Règle le seuil de réapprovisionnement d'un médicament du catalogue.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * name (str): Nom du médicament
+            * threshold (int | None): Seuil, None pour ne plus suivre le
+            médicament
+
+        Renvoie:
+            * int: Identifiant du médicament
+
+        Lance:
+            * ValueError si le médicament n'est pas dans le catalogue ou si le
+            seuil est négatif
+        """
+        if threshold is not None and threshold < 0:
+            raise ValueError("Un seuil de réapprovisionnement ne peut pas être négatif")
+        medicine = Medicine.query.filter_by(user_id=user_id, name=name).first()
+        if medicine is None:
+            raise ValueError(f"{name} n'est pas dans la pharmacie")
+        medicine.reorder_threshold = threshold
+        db.session.commit()
+        lg.info(f"(user :{user_id}) : reorder threshold of {name} set to {threshold}")
+        return medicine.medicine_id
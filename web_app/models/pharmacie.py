@@ -1,5 +1,4 @@
 # Standard
-from collections import Counter
 from datetime import datetime
 from enum import Enum
 
@@ -7,15 +6,18 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     PrimaryKeyConstraint,
-    JSON,
     )
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column
 from typing import Any
 
-from web_app.fonction import addition_dict
-
+from .alert import AlertUtils
+from .json_type import json_type
+from .lot import LotUtils
+from .medicine import MedicineUtils
+from .stock import StockVector
 from .. import db
+from ..storage import retry_on_conflict, retry_on_lock
 
 class PharmacieAttr(Enum):
     total_enter = "total_enter"
@@ -31,7 +33,8 @@ class Pharmacie(db.Model):
 
     Cette classe stocke les données annuelles de la pharmacie telles que les
     entrées, utilisations et retraits de traitements et les stocks restants pour
-    le bilan.
+    le bilan. Les quantités sont enregistrées par identifiant de médicament du
+    catalogue (voir `Medicine`).
     """
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"),
@@ -40,35 +43,35 @@ class Pharmacie(db.Model):
     year: Mapped[int] = mapped_column(Integer)
     """Année du bilan de pharmacie."""
 
-    total_enter: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    total_enter: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                         default=dict, nullable=False)
     """Quantité de traitements entrés dans la pharmacie au cours de l'année.
-    Forme un dictionnaire {<nom>: <quantité entrée>}."""
+    Forme un dictionnaire {<identifiant>: <quantité entrée>}."""
 
-    total_used: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    total_used: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                        default=dict, nullable=False)
     """Quantité de traitements utilisés au cours de l'année. Forme un
-    dictionnaire {<nom>: <quantité utilisée>}."""
+    dictionnaire {<identifiant>: <quantité utilisée>}."""
 
-    total_used_calf: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    total_used_calf: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                             default=dict, nullable=False)
     """Quantité de traitement utilisés sur des veaux au cours de l'année. Forme
-    un dictionnaire {<nom>: <quantité utilisée>}."""
+    un dictionnaire {<identifiant>: <quantité utilisée>}."""
 
-    total_out_dlc: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    total_out_dlc: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                           default=dict, nullable=False)
     """Quantité de médicaments périmés éliminés au cours de l'année. Forme un
-    dictionnaire {<nom>: <quantité éliminée>}."""
+    dictionnaire {<identifiant>: <quantité éliminée>}."""
 
-    total_out: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    total_out: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                       default=dict, nullable=False)
     """Quantité de médicaments retirés de la pharmacie au cours de l'année.
-    Forme un dictionnaire {<nom>: <quantité retirée>}."""
+    Forme un dictionnaire {<identifiant>: <quantité retirée>}."""
 
-    remaining_stock: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    remaining_stock: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                             default=dict, nullable=False)
     """Stocks restants à la fin de l'année. Forme un dictionnaire
-    {<nom>: <quantité>}."""
+    {<identifiant>: <quantité>}."""
 
     __table_args__: tuple[PrimaryKeyConstraint, dict[str, Any]] = (
         PrimaryKeyConstraint(
@@ -146,6 +149,7 @@ class PharmacieUtils:
         raise ValueError(f"{year} doesn't exist.")
 
     @staticmethod
+    @retry_on_lock
     def updateOrDefault_pharmacie_year(user_id: int,
                                        default: Pharmacie) -> Pharmacie:
         """Met à jour ou crée une entrée de pharmacie pour une année donnée.
@@ -195,6 +199,7 @@ class PharmacieUtils:
         return Pharmacie.query.filter_by(user_id=user_id).all()
 
     @staticmethod
+    @retry_on_lock
     def set_pharmacie_year(
         user_id: int,
         year: int,
@@ -214,16 +219,16 @@ class PharmacieUtils:
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
             * year (int): Année de l'entrée de pharmacie
-            * total_enter (dict[str,int]): Dictionnaire associant les noms et
+            * total_enter (dict[str,int]): Dictionnaire associant les identifiants et
             quantités de traitements ajoutés à la pharmacie au cours de l'année
-            * total_used (dict[str,int]): Dictionnaire associant les noms et
+            * total_used (dict[str,int]): Dictionnaire associant les identifiants et
             quantités de traitements utilisés au cours de l'année
-            * total_out_dlc (dict[str,int]): Dictionnaire associant les noms et
+            * total_out_dlc (dict[str,int]): Dictionnaire associant les identifiants et
             quantités de traitements expirés dans la pharmacie au cours de
             l'année
-            * total_out (dict[str,int]): Dictionnaire associant les noms et
+            * total_out (dict[str,int]): Dictionnaire associant les identifiants et
             quantités de traitements retirés de la pharmacie au cours de l'année
-            * remaining_stock (dict[str,int]): Dictionnaire associant les noms
+            * remaining_stock (dict[str,int]): Dictionnaire associant les identifiants
             et quantités de traitements restant à la fin de l'année
         """
         pharmacie = Pharmacie(
@@ -240,6 +245,8 @@ class PharmacieUtils:
         db.session.commit()
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def upload_pharmacie_year(user_id: int, year: int, remaining_stock: dict[str, int]) -> None:
         """Créée et enregistre une nouvelle entrée de pharmacie, pour l'année
         spécifiée, avec les stocks restants spécifiés.
@@ -252,7 +259,7 @@ class PharmacieUtils:
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
             * year (int): Année de la nouvelle entrée de pharmacie
-            * remaining_stock (dict[str,int]): Dictionnaire associant les noms
+            * remaining_stock (dict[str,int]): Dictionnaire associant les identifiants
             et quantités de traitements restant en stock
 
         Lance:
@@ -273,49 +280,142 @@ class PharmacieUtils:
             total_out={},
         )
         db.session.add(pharmacie)
+        if year == datetime.now().year:
+            AlertUtils.track_stock(user_id, StockVector.from_stored(remaining_stock),
+                                   map(int, remaining_stock))
         db.session.commit()
 
     @staticmethod
+    @retry_on_lock
+    @retry_on_conflict
     def modify_pharmacie_year(user_id: int, year: int, attr: PharmacieAttr, care_delta: dict[str, int]) -> None:
+        """Modifie une entrée de pharmacie pour une année spécifique (voir
+        `change_pharmacie_year`) et enregistre (commit) l'ensemble en une
+        seule transaction.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * year (int): Année de l'entrée de pharmacie à modifier
+            * attr (str): Attribut de l'entrée de pharmacie à modifier, parmi
+            "total_enter", "total_used", "total_used_calf", "total_out_dlc",
+            "remaining_stock"
+            * care_delta (dict[str, int]): Quantités à ajouter, par
+            identifiant de médicament
+
+        Lance:
+            * ValueError s'il manque l'entrée de pharmacie de l'année spécifiée
+            ou d'une des années suivantes jusqu'à l'année en cours, ou si la
+            modification rendrait négatif le stock d'un médicament retiré
+        """
+        PharmacieUtils.change_pharmacie_year(user_id=user_id, year=year, attr=attr,
+                                             care_delta=care_delta)
+        db.session.commit()
+
+    @staticmethod
+    def change_pharmacie_year(user_id: int, year: int, attr: PharmacieAttr, care_delta: dict[str, int]) -> None:
         """Modifie une entrée de pharmacie pour une année spécifique, en
-        mettant à jour un attribut spécifique avec les données fournies.
+        mettant à jour un attribut spécifique avec les données fournies, sans
+        enregistrer (commit) : l'appelant valide le mouvement de stock avec
+        l'écriture qui le cause (un traitement par exemple).
 
         Cette fonction met à jour l'attribut de l'entrée de pharmacie
         correspondant à l'année fournie en argument, avec les données fournies
         en argument. Et met à jour les attributs "total_out" et "remaining_stock" en conséquence.
-        commit les changements dans la base de données.
+        La variation du stock restant est reportée sur les bilans des années
+        suivantes jusqu'à l'année en cours, les sorties (traitements, DLC) et
+        leurs annulations sont répercutées sur les lots, et les alertes de
+        stock bas des médicaments modifiés sont mises à jour.
+
+        Les vérifications sont faites avant toute modification : si une
+        erreur est lancée, la session est laissée inchangée.
 
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
             * year (int): Année de l'entrée de pharmacie à modifier
             * attr (str): Attribut de l'entrée de pharmacie à modifier, parmi
-            "total_enter", "total_used", "total_used_calf", "total_out_dlc"
+            "total_enter", "total_used", "total_used_calf", "total_out_dlc",
+            "remaining_stock"
+            * care_delta (dict[str, int]): Quantités à ajouter, par
+            identifiant de médicament
+
+        Lance:
+            * ValueError s'il manque l'entrée de pharmacie de l'année spécifiée
+            ou d'une des années suivantes jusqu'à l'année en cours, ou si la
+            modification rendrait négatif le stock d'un médicament retiré
         """
-        pharmacie : Pharmacie = PharmacieUtils.get_pharmacie_year(user_id=user_id, year=year)
-        remaining_stock_old = pharmacie.remaining_stock
-        
-        setattr(pharmacie, attr.value, dict(Counter(getattr(pharmacie, attr.value)) + Counter(care_delta)))
-        
-        if attr in [PharmacieAttr.total_used, PharmacieAttr.total_used_calf, PharmacieAttr.total_out_dlc]:
-            pharmacie.total_out = dict(Counter(pharmacie.total_out) + Counter(care_delta)) # on met a jour le total out si c'est du used ou du out dlc
+        pharmacies: list[Pharmacie] = (
+            Pharmacie.query
+            .filter(Pharmacie.user_id == user_id, Pharmacie.year >= year,
+                    Pharmacie.year <= max(year, datetime.now().year))
+            .order_by(Pharmacie.year).all())
+        # comme la propagation année par année, une année manquante est une
+        # erreur : sans son bilan, le stock n'y serait pas vérifié
+        if missing := set(range(year, max(year, datetime.now().year) + 1)) - {
+                row.year for row in pharmacies}:
+            raise ValueError(f"{min(missing)} doesn't exist.")
+        pharmacie = pharmacies[0]
+        delta = StockVector.from_stored(care_delta)
+        outgoing = attr in [PharmacieAttr.total_used, PharmacieAttr.total_used_calf,
+                            PharmacieAttr.total_out_dlc]
+        stock_delta = -delta if outgoing else delta  # on retire du stock restant si c'est du used ou du out dlc
+
+        for row in pharmacies:
+            if shortfalls := StockVector.from_stored(row.remaining_stock).shortfalls(stock_delta):
+                raise ValueError(f"Stock insuffisant en {row.year} : "
+                                 + PharmacieUtils.describe_shortfalls(user_id, shortfalls))
+
+        def add(name: str, vector: StockVector) -> None:
+            setattr(pharmacie, name,
+                    (StockVector.from_stored(getattr(pharmacie, name)) + vector).to_stored())
+
+        if attr != PharmacieAttr.remaining_stock:
+            add(attr.value, delta)
+        if outgoing:
+            add("total_out", delta)  # on met a jour le total out si c'est du used ou du out dlc
             if attr == PharmacieAttr.total_used_calf:
-                pharmacie.total_used = dict(Counter(pharmacie.total_used) + Counter(care_delta)) # on met a jour le total used si c'est du used calf
-            pharmacie.remaining_stock = dict(Counter(pharmacie.remaining_stock) - Counter(care_delta)) # on retire du stock restant si c'est du used ou du out dlc
-        if attr == PharmacieAttr.total_enter:
-            pharmacie.remaining_stock = dict(Counter(pharmacie.remaining_stock) + Counter(care_delta)) # on ajoute au stock restant si c'est du total enter
-        
-        db.session.commit()
-        if year < datetime.now().year :
-            #propagation de la modification sur remaining stock des années suivante
-            stock_delta = dict(Counter(pharmacie.remaining_stock) - Counter(remaining_stock_old))
-            PharmacieUtils.modify_pharmacie_year(user_id=user_id, year=year+1, attr= PharmacieAttr.remaining_stock, care_delta=stock_delta)
-        
+                add("total_used", delta)  # on met a jour le total used si c'est du used calf
+            # les entrées ont leurs lots (prescription) ; les sorties les consomment
+            LotUtils.apply_stock_delta(user_id, stock_delta.to_stored())
+
+        # propagation de la variation du stock restant sur les années suivantes
+        for row in pharmacies:
+            stock = StockVector.from_stored(row.remaining_stock) + stock_delta
+            row.remaining_stock = stock.to_stored()
+        if row.year == datetime.now().year:
+            AlertUtils.track_stock(user_id, stock, [medicine_id for medicine_id, change
+                                                    in enumerate(stock_delta.values) if change])
+
     @staticmethod
     def validat_quantity(user_id: int, stock_delta: dict[str, int], year_to_verify: int) -> bool:
-        for year in range(year_to_verify, datetime.now().year +1):
-            pharmatcie: Pharmacie = PharmacieUtils.get_pharmacie_year(user_id=user_id, year=year)
-            new_remaining_stock : dict[str, int] =  addition_dict((pharmatcie.remaining_stock), (stock_delta))
-            if any(x < 0 for x in new_remaining_stock.values()) :
-                return False
-        return True
-            
+        """Vérifie qu'un mouvement de stock ne rend négatif le stock d'aucun
+        médicament retiré, de l'année fournie à l'année en cours.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * stock_delta (dict[str, int]): Variation du stock, par
+            identifiant de médicament
+            * year_to_verify (int): Première année vérifiée
+
+        Renvoie:
+            * bool: True si le mouvement est possible, False sinon
+
+        Lance:
+            * ValueError s'il manque l'entrée de pharmacie d'une des années
+            vérifiées
+        """
+        delta = StockVector.from_stored(stock_delta)
+        pharmacies: list[Pharmacie] = Pharmacie.query.filter(
+            Pharmacie.user_id == user_id, Pharmacie.year >= year_to_verify,
+            Pharmacie.year <= datetime.now().year).all()
+        if missing := set(range(year_to_verify, datetime.now().year + 1)) - {
+                pharmacie.year for pharmacie in pharmacies}:
+            raise ValueError(f"{min(missing)} doesn't exist.")
+        return not any(StockVector.from_stored(pharmacie.remaining_stock).shortfalls(delta)
+                       for pharmacie in pharmacies)
+
+    @staticmethod
+    def describe_shortfalls(user_id: int, shortfalls: dict[int, int]) -> str:
+        """Décrit les quantités manquantes, par nom de médicament."""
+        names = MedicineUtils.get_catalog(user_id).names
+        return ", ".join(f"{names[medicine_id]} (manque {missing})"
+                         for medicine_id, missing in shortfalls.items())
@@ -5,16 +5,22 @@ from sqlalchemy import (
     Boolean,
     Date,
     ForeignKey,
+    Index,
     Integer,
-    JSON,
-    extract)
+    extract,
+    type_coerce)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column
 
-from web_app.fonction import my_strftime
-from web_app.models.type_dict import Prescription_export_format
+from web_app.fonction import my_strftime, parse_date
+from web_app.models.type_dict import Pharma_list_event, Prescription_export_format
 
+from .json_type import gin_index, is_postgresql, json_type
+from .lot import LotUtils
 from .. import db
+from ..history import HistoryItem, HistoryKey, keyset_before
+from ..storage import retry_on_lock
 
 class Prescription(db.Model):
     """Représente un traitement dans la base de données. Sont inclus la date de
@@ -32,16 +38,22 @@ class Prescription(db.Model):
     """Date de la prescription."""
 
     # Traitement stocké au format JSON en base
-    care: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(JSON),
+    care: Mapped[dict[str, int]] = mapped_column(MutableDict.as_mutable(json_type()),
                                                  default=dict, nullable=False)
     """Informations sur le traitement, stocké au format JSON dans la base de
-    données."""
+    données : {<identifiant du médicament>: <quantité>}."""
 
     dlc_left: Mapped[bool] = mapped_column(Boolean)
     """True si remiser pour date limite de consommation est dépassée, False sinon."""
 
     # TODO ajouter le pdf de la prescription scanné ?
 
+    # Sert les listes paginées (prescriptions ou sorties DLC, plus récentes
+    # en premier) et les filtres par année
+    __table_args__ = (
+        Index("ix_prescription_user_dlc_date", "user_id", "dlc_left", "date"),
+    )
+
     def __init__(self,
                  user_id: int,
                  date: dateType,
@@ -63,6 +75,9 @@ class Prescription(db.Model):
         self.care = care
         self.dlc_left = dlc_left
 
+gin_index(Prescription.__table__, "care")
+
+
 class PrescriptionUtils:
     """Cette class est un namespace, tous ses membres sont statiques.
 
@@ -71,26 +86,34 @@ class PrescriptionUtils:
     """
 
     @staticmethod
-    def add_prescription(user_id: int, date: date, care_items: dict[str, int]) -> None:
+    @retry_on_lock
+    def add_prescription(user_id: int, date: date, care_items: dict[str, int],
+                         expiries: dict[str, date] | None = None) -> None:
         """Ajoute une nouvelle prescription à la base de données avec les date
         et éléments spécifiés.
 
-        Cette fonction créée un nouvel objet Prescription, l'ajoute à la base
-        de données et enregistre (commit) les changements dans la base de
-        données.
+        Cette fonction créée un nouvel objet Prescription et un lot par ligne
+        de la prescription (voir `Lot`), les ajoute à la base de données et
+        enregistre (commit) les changements dans la base de données.
 
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
             * date (date): Date de la prescription
             * care_items (dict[str, int]): Éléments de la prescription,
-            typiquement nom du traitement et dose
+            typiquement identifiant du traitement et dose
+            * expiries (dict[str, date] | None): Dates de péremption des lots,
+            par identifiant du traitement
         """
         prescription = Prescription(user_id=user_id, date=date, care=care_items,
                                     dlc_left=False)
         db.session.add(prescription)
+        db.session.flush()
+        LotUtils.add_lots(user_id=user_id, prescription_id=prescription.id,
+                          care_items=care_items, expiries=expiries)
         db.session.commit()
 
     @staticmethod
+    @retry_on_lock
     def add_dlc_left(user_id: int, date: date, care_items: dict[str, int]) -> None:
         """Ajoute une prescription remisée pour péremption.
 
@@ -142,16 +165,92 @@ class PrescriptionUtils:
             * list[tuple[date, dict[str, int], bool]]: Liste des prescriptions
             présentes dans la base de données, par ordre décroissante de date.
         """
-        all_cares: list[Prescription_export_format] = [
-            Prescription_export_format(id=prescription.id,
-                                       date_prescription=my_strftime(prescription.date),
-                                       prescription=prescription.care,
-                                       dlc_left=prescription.dlc_left)
-            for prescription in (Prescription.query.filter_by(user_id=user_id).all())
-        ]
-        # Tri décroissant sur la date
-        all_cares.sort(key=lambda x: x["date_prescription"], reverse=True)
-        return all_cares
+        # Tri décroissant sur la date fait par la base
+        return [PrescriptionUtils.to_export_format(prescription)
+                for prescription in Prescription.query.filter_by(user_id=user_id)
+                .order_by(Prescription.date.desc(), Prescription.id.desc())]
+
+    @staticmethod
+    def to_export_format(prescription: Prescription) -> Prescription_export_format:
+        """Convertit une prescription au format d'export (date en chaîne
+        "AAAA-MM-JJ", contenu copié hors de l'ORM)."""
+        return Prescription_export_format(id=prescription.id,
+                                          date_prescription=my_strftime(prescription.date),
+                                          prescription=dict(prescription.care),
+                                          dlc_left=prescription.dlc_left)
+
+    @staticmethod
+    def get_prescriptions_page(user_id: int, dlc_left: bool, page: int = 1,
+                               per_page: int = 20) -> dict:
+        """Récupère une page des prescriptions (ou des sorties pour DLC),
+        les plus récentes en premier.
+
+        Seule la page demandée est lue, par une requête servie par l'index
+        (user_id, dlc_left, date).
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * dlc_left (bool): True pour les sorties pour DLC, False pour les
+            prescriptions
+            * page (int): Numéro de page, à partir de 1
+            * per_page (int): Nombre d'entrées par page
+
+        Renvoie:
+            * dict: Les entrées de la page au format d'export (`items`),
+            `page`, `per_page`, `total` et `has_more`.
+        """
+        query = Prescription.query.filter_by(user_id=user_id, dlc_left=dlc_left)
+        total = query.count()
+        rows = (query.order_by(Prescription.date.desc(), Prescription.id.desc())
+                .offset((page - 1) * per_page).limit(per_page).all())
+        return {
+            "items": [PrescriptionUtils.to_export_format(row) for row in rows],
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "has_more": page * per_page < total,
+        }
+
+    @staticmethod
+    def get_prescription_events(user_id: int, after: HistoryKey | None, limit: int,
+                                dlc_left: bool | None = None,
+                                medic: str | None = None) -> list[HistoryItem]:
+        """Lit un lot de prescriptions et de sorties pour DLC, de la plus
+        récente à la plus ancienne, pour l'historique de la pharmacie.
+
+        La lecture suit l'index (user_id, dlc_left, date) et reprend après la
+        clé `after`. Sur PostgreSQL, le filtre par médicament est évalué en
+        base (index GIN) ; ailleurs, il revient à l'appelant.
+
+        Arguments:
+            * user_id (int): Identifiant de l'utilisateur
+            * after (HistoryKey | None): Clé du dernier événement déjà lu
+            * limit (int): Nombre maximal de prescriptions lues
+            * dlc_left (bool | None): Ne lire que les sorties pour DLC (True)
+            ou que les prescriptions (False)
+            * medic (str | None): Clé du médicament recherché, son
+            identifiant du catalogue (PostgreSQL)
+
+        Renvoie:
+            * list[HistoryItem]: Couples (clé, événement), par clé décroissante
+        """
+        query = Prescription.query.filter_by(user_id=user_id)
+        if dlc_left is not None:
+            query = query.filter_by(dlc_left=dlc_left)
+        if after is not None:
+            # la colonne Date attend un objet date
+            after = (parse_date(after[0]), *after[1:])
+        if (condition := keyset_before(after, 0, Prescription.date, Prescription.id)) is not None:
+            query = query.filter(condition)
+        if medic is not None and is_postgresql(db.engine):
+            query = query.filter(type_coerce(Prescription.care, JSONB).has_key(medic))
+        rows = (query.order_by(Prescription.date.desc(), Prescription.id.desc())
+                .limit(limit).all())
+        return [((my_strftime(row.date), 0, row.id, 0),
+                 Pharma_list_event(date=my_strftime(row.date),
+                                   medicaments=dict(row.care),
+                                   event_type="dlc left" if row.dlc_left else "prescription"))
+                for row in rows]
 
     @staticmethod
     def get_year_prescription(user_id: int, year: int) -> list[Prescription]:
@@ -204,9 +303,11 @@ class PrescriptionUtils:
             raise ValueError("aucune prescription ne corespond a ce couple user_id, prescription_id")
         
     @staticmethod
+    @retry_on_lock
     def remove_prescription(user_id: int, prescription_id : int)->None:
         # TODO Doc remove_prescription
         if prescription := Prescription.query.get({"id": prescription_id}):
+            LotUtils.remove_prescription_lots(user_id=user_id, prescription_id=prescription_id)
             db.session.delete(prescription)
             db.session.commit()
             lg.info(f"(user :{user_id}, prescription: {prescription_id}) : delete in database")
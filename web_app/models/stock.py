@@ -0,0 +1,89 @@
+from array import array
+from itertools import zip_longest
+from typing import Iterable, Mapping
+
+
+class StockVector:
+    """Quantités par médicament, stockées dans un tableau d'entiers indexé par
+    identifiant du catalogue (voir `Medicine`).
+
+    Les opérations sont faites terme à terme, le plus court des deux vecteurs
+    étant complété par des zéros. Contrairement à `Counter`, la soustraction
+    conserve les valeurs négatives : un stock insuffisant reste visible.
+
+    Le calcul n'est pas vectorisé au sens de numpy : `array("q")` donne un
+    stockage compact, mais chaque opération parcourt les valeurs en Python,
+    en temps linéaire dans la taille du catalogue (quelques dizaines de
+    médicaments par ferme).
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.values = array("q", values)
+
+    @classmethod
+    def zeros(cls, size: int) -> "StockVector":
+        """Renvoie un vecteur nul de la taille fournie."""
+        return cls([0] * size)
+
+    @classmethod
+    def from_stored(cls, stored: Mapping[str, int]) -> "StockVector":
+        """Construit un vecteur à partir de quantités enregistrées par
+        identifiant, {"<identifiant>": <quantité>} (format des colonnes JSON)."""
+        vector = cls.zeros(max(map(int, stored), default=-1) + 1)
+        vector.add_stored(stored)
+        return vector
+
+    def to_stored(self) -> dict[str, int]:
+        """Convertit le vecteur au format des colonnes JSON ; les quantités
+        nulles sont omises."""
+        return {str(medicine_id): quantity
+                for medicine_id, quantity in enumerate(self.values) if quantity}
+
+    def add_stored(self, stored: Mapping[str, int]) -> None:
+        """Ajoute au vecteur, en place, des quantités enregistrées par
+        identifiant."""
+        for key, quantity in stored.items():
+            medicine_id = int(key)
+            if medicine_id >= len(self.values):
+                self.values.extend([0] * (medicine_id + 1 - len(self.values)))
+            self.values[medicine_id] += quantity
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, medicine_id: int) -> int:
+        return self.values[medicine_id] if medicine_id < len(self.values) else 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StockVector):
+            return NotImplemented
+        return all(a == b for a, b in zip_longest(self.values, other.values, fillvalue=0))
+
+    def __repr__(self) -> str:
+        return f"StockVector({self.values.tolist()})"
+
+    def __add__(self, other: "StockVector") -> "StockVector":
+        return StockVector(a + b for a, b in zip_longest(self.values, other.values, fillvalue=0))
+
+    def __sub__(self, other: "StockVector") -> "StockVector":
+        return StockVector(a - b for a, b in zip_longest(self.values, other.values, fillvalue=0))
+
+    def __neg__(self) -> "StockVector":
+        return StockVector(-a for a in self.values)
+
+    def is_valid(self) -> bool:
+        """Indique si aucune quantité n'est négative."""
+        return min(self.values, default=0) >= 0
+
+    def shortfalls(self, delta: "StockVector") -> dict[int, int]:
+        """Renvoie les médicaments que `delta` ferait passer sous zéro,
+        {<identifiant>: <quantité manquante>}.
+
+        Seuls les médicaments retirés par `delta` sont vérifiés : une
+        opération n'est pas refusée à cause d'un autre médicament déjà en
+        négatif.
+        """
+        return {medicine_id: -(self[medicine_id] + change)
+                for medicine_id, change in enumerate(delta.values)
+                if change < 0 and self[medicine_id] + change < 0}
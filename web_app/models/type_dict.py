@@ -6,13 +6,21 @@ class Traitement(TypedDict):
 
     :var id: int, Identifiant du traitement
     :var date_traitement: str, Date du traitement au format 'YYYY-MM-DD'
-    :var medicaments: dict[str, int], Dictionnaire des médicaments et dosages administrés
+    :var medicaments: dict[str, int], Dictionnaire des médicaments et dosages
+    administrés, enregistré par identifiant du catalogue et affiché par nom
     :var annotation: str, Annotation ou remarque sur le traitement
+    :var fin_retrait_lait: str | None, Fin du délai d'attente lait au format
+    'YYYY-MM-DD', calculée à l'enregistrement, None sans délai
+    :var fin_retrait_viande: str | None, Fin du délai d'attente viande au
+    format 'YYYY-MM-DD', calculée à l'enregistrement, None sans délai
     """
     id : int
     date_traitement: str  # date au format 'YYYY-MM-DD'
     medicaments: dict[str, int]  # [medicament,dosage]
     annotation: str
+    # absents des traitements enregistrés avant le suivi des délais d'attente
+    fin_retrait_lait: str | None  # premier jour de livraison du lait
+    fin_retrait_viande: str | None  # premier jour de vente
 
 
 class Traitement_signe(TypedDict):
@@ -102,6 +110,38 @@ class Prescription_export_format(TypedDict):
     dlc_left: bool
 
 
+class Lot_export_format(TypedDict):
+    """Représente un lot de médicament en pharmacie.
+
+    :var id: int, id propre au lot
+    :var medicament: str, Nom du médicament
+    :var expiry: str, Date de péremption au format 'YYYY-MM-DD'
+    :var quantity: int, Quantité entrée avec le lot
+    :var remaining: int, Quantité restante du lot
+    """
+    id: int  # id du lot
+    medicament: str
+    expiry: str  # date au format 'YYYY-MM-DD'
+    quantity: int
+    remaining: int
+
+
+class Stock_alert_format(TypedDict):
+    """Représente une alerte de stock bas.
+
+    :var medicament: str, Nom du médicament
+    :var unit: str, Unité de mesure du médicament
+    :var stock: int, Stock courant du médicament
+    :var threshold: int, Seuil de réapprovisionnement
+    :var raised_at: str, Date du franchissement du seuil au format 'YYYY-MM-DD'
+    """
+    medicament: str
+    unit: str
+    stock: int
+    threshold: int
+    raised_at: str  # date au format 'YYYY-MM-DD'
+
+
 class Setting(TypedDict):
     """Stocke des réglages utilisateur, en l'occurrence les durées de
     tarissement et de préparation au vêlage.
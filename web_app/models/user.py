@@ -4,13 +4,15 @@ import logging as lg
 from sqlalchemy import (
     Integer,
     String,
-    JSON,
 )
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column
-from typing import TypedDict, Any
+from typing import TypedDict
 
+from .json_type import json_type
+from .medicine import MedicineUtils
 from .. import db
+from ..storage import retry_on_lock
 
 
 class Setting(TypedDict):
@@ -41,10 +43,8 @@ class Users(db.Model):
         String(100), unique=True, nullable=False)
     password: Mapped[str] = mapped_column(String(200), nullable=False)
     setting: Mapped[Setting] = mapped_column(
-        MutableDict.as_mutable(JSON), default=dict, nullable=False
+        MutableDict.as_mutable(json_type()), default=dict, nullable=False
     )  # setting utilisateur
-    medic_list: Mapped[dict[Any, Any]] = mapped_column(MutableDict.as_mutable(JSON),
-                                                       default=dict, nullable=False)
 
     def __init__(self, email: str, password: str, setting: Setting):
         """Initialise un objet Users avec les arguments fournis.
@@ -60,7 +60,6 @@ class Users(db.Model):
         self.email = email
         self.password = password
         self.setting = setting
-        self.medic_list = {}
 
 
 class UserUtils:
@@ -72,6 +71,7 @@ class UserUtils:
     """
 
     @staticmethod
+    @retry_on_lock
     def add_user(email: str, password: str) -> None:
         """Ajoute un nouvel utilisateur à la base de données avec les données
         par défaut.
@@ -91,6 +91,7 @@ class UserUtils:
         db.session.commit()
 
     @staticmethod
+    @retry_on_lock
     def set_user_setting(user_id: int, dry_time: int, calving_preparation: int) -> None:
         """Met à jour les réglages utilisateur concernant les durées de
         tarissement et de préparation du vêlage.
@@ -140,36 +141,32 @@ class UserUtils:
     def add_medic_in_pharma_list(user_id: int, medic: str, mesur: str) -> None:
         """Ajoute un médicament à la pharmacie.
 
-        Cette fonction ajoute un médicament à la pharmacie de l'utilisateur s'il
-        n'existe pas déjà. S'il existe déjà, une erreur est marquée dans le
-        journal.
+        Cette fonction ajoute un médicament au catalogue de l'utilisateur s'il
+        n'existe pas déjà, voir `MedicineUtils.add_medicine`.
 
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
             * medic (str): Nom du médicament
-            * mesur (int): Quantité de médicament
+            * mesur (str): Unité de mesure du médicament
         """
-        user: Users = Users.query.get(user_id)  # type: ignore
-        user.medic_list.setdefault(medic, mesur)
-        db.session.commit()
-        lg.info(f"{medic} add in pharma list")
+        MedicineUtils.add_medicine(user_id=user_id, name=medic, unit=mesur)
 
     @staticmethod
-    def get_pharma_list(user_id: int) -> dict[str, int]:
+    def get_pharma_list(user_id: int) -> dict[str, str]:
         """Récupère la liste des médicaments dans la pharmacie de l'utilisateur.
 
-        Cette fonction renvoie un dictionnaire contenant les médicaments
-        présents dans la pharmacie de l'utilisateur ainsi que leurs quantité.
+        Cette fonction renvoie un dictionnaire contenant les médicaments du
+        catalogue de l'utilisateur, dans l'ordre de leurs identifiants, ainsi
+        que leurs unités de mesure.
 
         Arguments:
             * user_id (int): Identifiant de l'utilisateur
 
         Renvoie:
-            * dict[str, int]: Un dictionnaire associant les noms des médicaments
-            à leurs quantités
+            * dict[str, str]: Un dictionnaire associant les noms des médicaments
+            à leurs unités
         """
-        user: Users = Users.query.get(user_id)  # type: ignore
-        return user.medic_list
+        return MedicineUtils.get_catalog(user_id).units_by_name()
 
     @staticmethod
     def get_user_by_email(email: str) -> Users:
@@ -11,7 +11,16 @@ from flask import (
 
 from flask_login import login_required, current_user  # type: ignore
 
-from web_app.fonction import my_strftime, parse_date, reload_reproduction_with
+from web_app.conditional import conditional_response
+from web_app.fonction import (
+    display_to_storage_index,
+    history_page,
+    my_strftime,
+    new_available_care,
+    parse_date,
+    reload_reproduction_with,
+    remaining_care_on_year
+)
 from web_app.models.type_dict import Reproduction, Traitement  # type: ignore
 
 from ..connnected_user_web.connected_user import ConnectedUser
@@ -34,6 +43,80 @@ def display_cow(cow_id):
     return render_template("cow.html", cow=cow, medic_list=current_user.medic_list)
 
 
+HISTORY_SECTIONS = {"cares": "cow_cares", "reproductions": "reproduction"}
+MAX_PER_PAGE = 100
+
+
+def section_page(cow, section: str, page: int, per_page: int) -> dict:
+    """Page d'un historique de la vache ; les médicaments des soins y sont
+    désignés par leur nom."""
+    result = history_page(getattr(cow, HISTORY_SECTIONS[section]), page, per_page)
+    if section == "cares":
+        result["items"] = [current_user.cow_utils.named_care(care)
+                           for care in result["items"]]
+    return result
+
+
+@login_required
+@cowbp.route("/cow/get-detail", methods=["GET"])
+@conditional_response("cow")
+def get_detail():
+    """Fiche d'une vache lue en un seul chargement : identité, quota de
+    traitements et premières pages des historiques de soins et de
+    reproduction, les plus récents en premier.
+
+    `page` et `per_page` paginent les historiques ; `section` ("cares" ou
+    "reproductions") limite la réponse à la page demandée de cet historique,
+    pour le chargement des pages suivantes.
+    """
+    cow_id = request.args.get("cow_id", type=int)
+    if cow_id is None:
+        return jsonify({
+            "success": False,
+            "message": "Argument cow_id is missing"
+        })
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), MAX_PER_PAGE)
+    section = request.args.get("section")
+    if section is not None and section not in HISTORY_SECTIONS:
+        return jsonify({
+            "success": False,
+            "message": f"Unknown section {section}"
+        })
+
+    try:
+        cow = current_user.cow_utils.get_cow(cow_id)
+    except ValueError:
+        cow = None
+    if not cow:
+        return jsonify({
+            "success": False,
+            "message": "Vache non trouvée"
+        })
+
+    if section is not None:
+        return jsonify({
+            "success": True,
+            "message": {section: section_page(cow, section, page, per_page)}
+        })
+
+    identity = cow.to_json()
+    for attribute in HISTORY_SECTIONS.values():
+        del identity[attribute]
+    return jsonify({
+        "success": True,
+        "message": {
+            "cow": identity,
+            "quota": {
+                "remaining": remaining_care_on_year(cow),
+                "available_from": new_available_care(cow),
+            },
+            **{name: section_page(cow, name, page, per_page)
+               for name in HISTORY_SECTIONS},
+        }
+    })
+
+
 @login_required
 @cowbp.route("/cow/remove", methods=["POST"])
 def remove_cow():
@@ -145,7 +228,9 @@ def add_care():
 def remove_reproduction():
     try:
         cow_id: int = int(request.form["cow_id"])
-        index: int = int(request.form["index"])
+        cow = current_user.cow_utils.get_cow(cow_id)
+        # convert index from display order to storage order
+        index = display_to_storage_index(cow.reproduction, int(request.form["index"]))
         current_user.cow_utils.delete_cow_reproduction(cow_id, index)
         return jsonify({
             "success": True,
@@ -164,7 +249,6 @@ def remove_reproduction():
 def modify_reproduction():
     try:
         cow_id: int = int(request.form["cow_id"])
-        index: int = int(request.form["index"])
         isneminaton = [my_strftime(
             isemination_date) for isemination_date in request.form.getlist("insemination")]
         cow = current_user.cow_utils.get_cow(cow_id)
@@ -173,6 +257,8 @@ def modify_reproduction():
                 "success": False,
                 "message": "Vache non trouvée"
             })
+        # convert index from display order to storage order
+        index = display_to_storage_index(cow.reproduction, int(request.form["index"]))
         repro: Reproduction = cow.reproduction[index]
         new_repro = Reproduction(
             insemination=isneminaton,
@@ -221,7 +307,7 @@ def remove_care():
                 "message": "Vache non trouvée"
             })
         # convert index from display order to storage order
-        index = len(cow.cow_cares) - int(index) - 1
+        index = display_to_storage_index(cow.cow_cares, int(index))
         current_user.cow_utils.delete_cow_care(int(cow_id), index)
         return jsonify({
             "success": True,
@@ -252,8 +338,8 @@ def modify_care():
                 "success": False,
                 "message": "Vache non trouvée"
             })
-        # convert index from display order to storage order    return jsonify({
-        index = len(cow.cow_cares) - int(index) - 1
+        # convert index from display order to storage order
+        index = display_to_storage_index(cow.cow_cares, int(index))
         care_date = my_strftime(request.form["date"])
         medicaments_list = request.form.getlist("medication")
         quantites = [int(q) for q in request.form.getlist("dose")]
@@ -276,6 +362,7 @@ def modify_care():
 
 @login_required
 @cowbp.route("/cow/get-cares", methods=["GET"])
+@conditional_response("cow")
 def get_cares():
     cow_id = request.args.get("cow_id")
     if not cow_id:
@@ -288,11 +375,10 @@ def get_cares():
 
     try:
         if cow := current_user.cow_utils.get_cow(cow_id):
-            cow_cares = cow.cow_cares
-            cow_cares.reverse()
             return jsonify({
                 "success": True,
-                "message": cow_cares
+                "message": [current_user.cow_utils.named_care(care)
+                            for care in cow.cow_cares[::-1]]
             })
         else:
             return jsonify({
@@ -311,6 +397,7 @@ def get_cares():
 
 @login_required
 @cowbp.route("/cow/get-reproductions", methods=["GET"])
+@conditional_response("cow")
 def get_reproductions():
     cow_id = request.args.get("cow_id")
     if not cow_id:
@@ -323,11 +410,9 @@ def get_reproductions():
 
     try:
         if cow := current_user.cow_utils.get_cow(cow_id):
-            cow_reproductions = cow.reproduction
-            cow_reproductions.reverse()
             return jsonify({
                 "success": True,
-                "message": cow_reproductions
+                "message": cow.reproduction[::-1]
             })
         else:
             return jsonify({
@@ -11,6 +11,7 @@ from flask import (
 from datetime import datetime
 from flask_login import login_required, current_user # type: ignore
 
+from web_app.conditional import conditional_response
 from web_app.connnected_user_web.connected_user import ConnectedUser
 from web_app.fonction import parse_date
 from web_app.models.cow import CowUtils
@@ -26,20 +27,42 @@ def check_authentication():
 
 @login_required
 @herd.route("/herd/list")
+@conditional_response("cow")
 def list():
-    cows = current_user.cow_utils.get_all_cows()
+    # médicaments des traitements désignés par leur nom, comme pour le détail
+    cow_utils = current_user.cow_utils
+    return [cow_utils.named_cow(cow) for cow in cow_utils.get_all_cows()]
 
-    return [cow.to_json() for cow in cows]
+@login_required
+@herd.route("/herd/under-withdrawal", methods=["GET"])
+@conditional_response("cow")
+def under_withdrawal():
+    """Animaux présents dont le lait ou la viande sont sous délai d'attente
+    aujourd'hui, avec les fins de délai, pour la liste de traite du jour."""
+    try:
+        cows = [{"cow_id": cow.cow_id,
+                 "name": cow.name,
+                 "milk_withdrawal_until": cow.milk_withdrawal_until,
+                 "meat_withdrawal_until": cow.meat_withdrawal_until}
+                for cow in current_user.cow_utils.get_under_withdrawal()]
+        return jsonify({
+            "success": True,
+            "message": cows
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur lors de recuperation des délais d'attente : {e}"
+        })
 
 @login_required
 @herd.route("/herd/list/filter", methods=["GET"])
 def list_filter():
     idsearch = str(request.args.get("id_filter"))
 
-    cows = filter(lambda cow: idsearch in str(cow.cow_id),
-            current_user.cow_utils.get_all_cows())
-
-    return [cow.to_json() for cow in cows]
+    cow_utils = current_user.cow_utils
+    return [cow_utils.named_cow(cow) for cow in cow_utils.get_all_cows()
+            if idsearch in str(cow.cow_id)]
 
 @login_required
 @herd.route("/herd/acquire", methods=["POST"])
@@ -14,6 +14,7 @@ from flask import (
 
 from flask_login import login_required, current_user  # type: ignore
 
+from web_app.conditional import conditional_response
 from web_app.fonction import my_strftime, parse_date
 from web_app.models.type_dict import Reproduction, Traitement
 
@@ -33,8 +34,12 @@ def add_prescription():
         doses = request.form.getlist("dose")
         care_items = {medicament: int(dose)
                       for medicament, dose in zip(medicaments, doses)}
+        # une date de péremption par ligne, vide si inconnue
+        expiries = {medicament: parse_date(expiry)
+                    for medicament, expiry in zip(medicaments, request.form.getlist("expiry"))
+                    if expiry}
 
-        current_user.prescription_utils.add_prescription(date, care_items)
+        current_user.prescription_utils.add_prescription(date, care_items, expiries)
         return jsonify({
             "success": True,
             "message": "prescription ajouter avec succes"
@@ -90,12 +95,13 @@ def export_recap_cow():
 @pharmacybp.route("/pharmacy/export-recap-pharmacy", methods=["Get"])
 def export_recap_pharmacy():
     try :
-        file_bytes = current_user.pharmacie_to_csv(datetime.now().year)
+        file_bytes = BytesIO(
+            current_user.pharmacie_to_csv(datetime.now().year).encode("utf-8"))
         return send_file(
             file_bytes,
             as_attachment=True,
             download_name="Recap_pharmacie.csv",
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mimetype="text/csv"
         )
     except Exception as e:
         return jsonify({
@@ -104,12 +110,80 @@ def export_recap_pharmacy():
         })
 
 
+DASHBOARD_SECTIONS = ("prescriptions", "dlc")
+MAX_PER_PAGE = 100
+
+
+@login_required
+@pharmacybp.route("/pharmacy/get-dashboard", methods=["GET"])
+@conditional_response("prescription", "pharmacie")
+def get_dashboard():
+    """Tableau de bord de la pharmacie en une requête : stock courant,
+    totaux de l'année par médicament, et premières pages des prescriptions
+    et des sorties pour DLC.
+
+    `page` et `per_page` paginent les listes ; `section` ("prescriptions" ou
+    "dlc") limite la réponse à la page demandée de cette liste.
+    """
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), MAX_PER_PAGE)
+    section = request.args.get("section")
+    if section is not None and section not in DASHBOARD_SECTIONS:
+        return jsonify({
+            "success": False,
+            "message": f"Unknown section {section}"
+        })
+    try:
+        dashboard = current_user.pharmacy_dashboard(
+            datetime.now().year, page, per_page, section)
+        return jsonify({
+            "success": True,
+            "message": dashboard
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur lors de recuperation du tableau de bord : {e}"
+        })
+
+
+@login_required
+@pharmacybp.route("/pharmacy/get-history", methods=["GET"])
+@conditional_response("cow", "prescription")
+def get_history():
+    """Historique de la pharmacie (soins, prescriptions, sorties pour DLC),
+    du plus récent au plus ancien, paginé par curseur.
+
+    `limit` fixe la taille de la page, `cursor` reprend après la page
+    précédente (`next_cursor`), `medic` et `type` (répétable : "care",
+    "prescription", "dlc left") filtrent les événements.
+    """
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_PER_PAGE)
+    event_types = set(request.args.getlist("type")) or None
+    try:
+        page = current_user.get_history_pharmacie_page(
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            medic=request.args.get("medic"),
+            event_types=event_types)
+        return jsonify({
+            "success": True,
+            "message": page
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur lors de recuperation de l'historique : {e}"
+        })
+
+
 @login_required
 @pharmacybp.route("/pharmacy/get-stock", methods=["GET"])
+@conditional_response("pharmacie")
 def get_stock():
     try:
-        stock = current_user.get_pharmacie_year(
-            datetime.now().year).remaining_stock
+        stock = current_user.catalog.decode(current_user.get_pharmacie_year(
+            datetime.now().year).remaining_stock)
         return jsonify({
             "success": True,
             "message": stock
@@ -121,8 +195,48 @@ def get_stock():
         })
 
 
+@login_required
+@pharmacybp.route("/pharmacy/get-alerts", methods=["GET"])
+@conditional_response("alert")
+def get_alerts():
+    """Alertes de stock bas ouvertes : médicaments dont le stock est au seuil
+    de réapprovisionnement ou en dessous."""
+    try:
+        alerts = current_user.get_stock_alerts()
+        return jsonify({
+            "success": True,
+            "message": alerts
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur lors de recuperation des alertes : {e}"
+        })
+
+
+@login_required
+@pharmacybp.route("/pharmacy/get-expiring-lots", methods=["GET"])
+@conditional_response("lot")
+def get_expiring_lots():
+    """Lots encore en stock périmés dans les `days` prochains jours (30 par
+    défaut), lots déjà périmés compris, du premier périmé au dernier."""
+    days = max(request.args.get("days", 30, type=int), 0)
+    try:
+        lots = current_user.get_expiring_lots(days)
+        return jsonify({
+            "success": True,
+            "message": lots
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur lors de recuperation des lots : {e}"
+        })
+
+
 @login_required
 @pharmacybp.route("/pharmacy/get-prescription", methods=["GET"])
+@conditional_response("prescription")
 def get_prescription():
     try:
         prescription = current_user.prescription_utils.get_all_prescriptions_cares()
@@ -139,6 +253,7 @@ def get_prescription():
 
 @login_required
 @pharmacybp.route("/pharmacy/get-dlc-left", methods=["GET"])
+@conditional_response("prescription")
 def get_dlc_left():
     try:
         dlc = current_user.prescription_utils.get_all_dlc_cares()
@@ -15,6 +15,7 @@ from flask import (
 
 from flask_login import login_required, current_user  # type: ignore
 
+from web_app.conditional import conditional_response
 from web_app.fonction import my_strftime, parse_date
 from web_app.models.type_dict import Reproduction, Traitement
 
@@ -56,6 +57,7 @@ def get_reproduction():
 
 @login_required
 @reproductionbp.route("/reproduction/get-all-reproductions", methods=["GET"])
+@conditional_response("cow")
 def get_calving():
     try:
         reproductions = current_user.cow_utils.get_valid_reproduction()
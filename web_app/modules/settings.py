@@ -1,5 +1,4 @@
 import logging as lg
-import pandas as pd
 
 from datetime import datetime
 from flask import (
@@ -16,6 +15,7 @@ from web_app.connnected_user_web.connected_user import ConnectedUser
 
 from web_app.fonction import *
 from web_app.models.cow import CowUtils
+from web_app.models.medicine import MedicineUtils
 from web_app.models.user import UserUtils
 
 settings = Blueprint("settings", __name__)
@@ -53,6 +53,58 @@ def user_settings():
         )
 
 
+@login_required
+@settings.route("/medicine_withdrawal", methods=["POST"])
+def medicine_withdrawal():
+    try:
+        medic = request.form["medication"]
+        milk_days = int(request.form["milk_days"])
+        meat_days = int(request.form["meat_days"])
+
+        current_user.cow_utils.set_withdrawal(
+            medic=medic, milk_days=milk_days, meat_days=meat_days
+        )
+
+        return jsonify(
+            {"success": True,
+             "message": f"délais d'attente de {medic} mis a jours.",
+             "id": "medicine_withdrawal"}
+        )
+
+    except Exception as e:
+        lg.error(f"Erreur pendant le réglage des délais d'attente : {e}")
+        return jsonify(
+            {"success": False,
+             "message": f"Erreur : {str(e)}",
+             "id": "medicine_withdrawal"}
+        )
+
+
+@login_required
+@settings.route("/reorder_threshold", methods=["POST"])
+def reorder_threshold():
+    try:
+        medic = request.form["medication"]
+        # un seuil vide arrête le suivi du médicament
+        threshold = int(request.form["threshold"]) if request.form.get("threshold") else None
+
+        current_user.set_reorder_threshold(medic=medic, threshold=threshold)
+
+        return jsonify(
+            {"success": True,
+             "message": f"seuil de {medic} mis a jours.",
+             "id": "reorder_threshold"}
+        )
+
+    except Exception as e:
+        lg.error(f"Erreur pendant le réglage du seuil : {e}")
+        return jsonify(
+            {"success": False,
+             "message": f"Erreur : {str(e)}",
+             "id": "reorder_threshold"}
+        )
+
+
 # TODO securiser import de fichier.
 # sur import de fichier verifier que c'est bien des entier et pas du BASH !!!
 @login_required
@@ -65,6 +117,7 @@ def upload_cows():
     try:
         user_id = current_user.id
         # Lire le fichier Excel directement en mémoire
+        import pandas as pd  # chargé à la demande : import coûteux
         df = pd.read_excel(BytesIO(file.read()), header=None)
 
         # Lire uniquement la première colonne (ex: ID de la vache)
@@ -106,6 +159,7 @@ def upload_calfs():
     try:
         user_id = current_user.id
         # Lire le fichier Excel directement en mémoire
+        import pandas as pd
         df = pd.read_excel(BytesIO(file.read()), header=None)
 
         # Lire uniquement la première colonne (ex: ID du veaux)
@@ -150,6 +204,7 @@ def init_stock():
         remaining_stock: dict[str, int] = {}
 
         # Lire le fichier Excel directement en mémoire
+        import pandas as pd
         df = pd.read_excel(BytesIO(file.read()), header=None)
 
         # Lire uniquement la première colonne medics : nom du medicament
@@ -162,10 +217,11 @@ def init_stock():
         added, skipped = 0, 0
         for medic, qt_medic, unit in zip(medics, qt_medics, units):
             try:
-                remaining_stock[medic] = int(qt_medic)
-                UserUtils.add_medic_in_pharma_list(
-                    user_id=user_id, medic=medic, mesur=unit
+                quantity = int(qt_medic)
+                medicine_id = MedicineUtils.add_medicine(
+                    user_id=user_id, name=medic, unit=str(unit)
                 )
+                remaining_stock[str(medicine_id)] = quantity
                 added += 1
             except ValueError:
                 skipped += 1
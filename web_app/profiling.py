@@ -0,0 +1,111 @@
+import cProfile
+import hmac
+import json
+import logging as lg
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+from flask import Flask, Response, g, request
+
+try:
+    import fcntl
+except ImportError:  # Windows : serveur de développement, un seul processus
+    fcntl = None  # type: ignore
+
+PROFILE_HEADER = "X-Profile-Token"
+INDEX_FILE = "index.json"
+
+
+def _should_profile(token: str | None, sample_rate: float) -> bool:
+    if token and hmac.compare_digest(request.headers.get(PROFILE_HEADER, ""), token):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def _update_index(directory: str, entry: dict, size: int) -> None:
+    """Ajoute un profil à l'index des requêtes les plus lentes, en ne
+    conservant que les `size` plus lentes ; les profils écartés sont
+    supprimés. Un verrou de fichier sérialise les workers (sans `fcntl`, un
+    seul processus écrit)."""
+    with open(os.path.join(directory, "index.lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        path = os.path.join(directory, INDEX_FILE)
+        try:
+            with open(path) as file:
+                entries: list[dict] = json.load(file)
+        except (OSError, ValueError):
+            entries = []
+        entries.append(entry)
+        entries.sort(key=lambda e: e["duration_ms"], reverse=True)
+        for dropped in entries[size:]:
+            try:
+                os.remove(os.path.join(directory, dropped["file"]))
+            except OSError:
+                pass
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(entries[:size], file, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+
+def init_profiling(app: Flask) -> None:
+    """Profile à la demande des requêtes réelles avec cProfile.
+
+    Une requête est profilée si elle porte l'en-tête `X-Profile-Token` égal à
+    `PROFILE_TOKEN`, ou par tirage aléatoire selon `PROFILE_SAMPLE_RATE`. Le
+    profil est écrit dans `PROFILE_DIR` (lisible avec `pstats` ou snakeviz) et
+    référencé dans `index.json`, qui conserve les `PROFILE_INDEX_SIZE`
+    requêtes les plus lentes.
+
+    Si `PROFILE_ENABLED` est faux, aucun hook n'est enregistré : le coût est
+    nul.
+    """
+    if not app.config.get("PROFILE_ENABLED", False):
+        return
+    directory = app.config.get("PROFILE_DIR", "profiles")
+    token = app.config.get("PROFILE_TOKEN")
+    sample_rate = float(app.config.get("PROFILE_SAMPLE_RATE", 0.0))
+    index_size = app.config.get("PROFILE_INDEX_SIZE", 50)
+    os.makedirs(directory, exist_ok=True)
+
+    @app.before_request
+    def start_profiler() -> None:
+        if not _should_profile(token, sample_rate):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # un autre profileur est déjà actif dans ce thread
+            return
+        g._profiler = profiler
+        g._profile_start = time.perf_counter()
+
+    @app.after_request
+    def save_profile(response: Response) -> Response:
+        if (profiler := g.pop("_profiler", None)) is None:
+            return response
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g.pop("_profile_start")) * 1000
+        endpoint = request.endpoint or "unmatched"
+        name = (f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}-"
+                f"{re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)}-{int(duration_ms)}ms.prof")
+        try:
+            profiler.dump_stats(os.path.join(directory, name))
+            _update_index(directory, {
+                "file": name,
+                "endpoint": endpoint,
+                "path": request.full_path,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "time": datetime.now().isoformat(timespec="seconds"),
+            }, index_size)
+        except OSError as e:
+            lg.error(f"profile {name} not saved: {e}")
+            return response
+        response.headers["X-Profile-Id"] = name
+        return response
@@ -0,0 +1,311 @@
+import logging as lg
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Iterator
+
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from . import db
+from .cache import cache
+from .connnected_user_web.connected_user import ConnectedUser
+from .fonction import my_strftime
+from .models.alert import AlertUtils
+from .models.cow import Cow, CowUtils
+from .models.lot import Lot, LotUtils
+from .models.medicine import Medicine, MedicineCatalog
+from .models.pharmacie import Pharmacie, PharmacieUtils
+from .models.prescription import Prescription
+from .models.type_dict import Reproduction, Traitement
+from .models.user import Users
+
+# Catalogue de médicaments : nom -> unité de mesure
+MEDICS: dict[str, str] = {
+    "Oxytetracycline": "ml", "Metacam": "ml", "Calcium": "g",
+    "Ivermectine": "ml", "Penicilline": "ml", "Dexamethasone": "ml",
+    "Magnesium": "g", "Vitamine AD3E": "ml", "Spasfon": "cp",
+    "Tylosine": "ml", "Kétoprofène": "ml", "Cefquinome": "ml",
+    "Oblets intra-utérins": "u", "Pommade mammaire": "u",
+}
+MAX_CARES_PER_YEAR = 3  # quota de traitements sur une année glissante
+# Délais d'attente (jours) tirés pour les médicaments qui en imposent
+MILK_WITHDRAWAL_DAYS: tuple[int, ...] = (2, 3, 5, 7, 14)
+MEAT_WITHDRAWAL_DAYS: tuple[int, ...] = (7, 14, 28, 60)
+BATCH_SIZE = 1000
+SEED_PASSWORD = "seed"
+
+
+class FarmGenerator:
+    """Génère de manière déterministe l'historique d'une ferme en respectant
+    les invariants des modèles : au plus trois traitements par vache sur une
+    année glissante, cycles de reproduction calculés avec
+    `CowUtils.set_reproduction`, médicaments issus de la liste de la pharmacie,
+    fins de délai d'attente calculées avec le catalogue, un lot par ligne
+    d'ordonnance.
+    """
+
+    def __init__(self, rng: random.Random, until: date, years: int,
+                 dry_time: int = 60, calving_preparation_time: int = 21) -> None:
+        self.rng = rng
+        self.until = until
+        self.start = until - timedelta(days=365 * years)
+        self.years = years
+        self.dry_time = dry_time
+        self.calving_preparation_time = calving_preparation_time
+
+    def random_day(self, start: date, end: date) -> date:
+        return start + timedelta(days=self.rng.randint(0, max((end - start).days, 0)))
+
+    def medicaments(self, medics: list[str]) -> dict[str, int]:
+        chosen = self.rng.sample(medics, self.rng.randint(1, min(3, len(medics))))
+        return {medic: self.rng.randint(1, 20) for medic in chosen}
+
+    def cares(self, catalog: MedicineCatalog, cares_per_year: int,
+              since: date) -> list[Traitement]:
+        """Tire des dates de traitement en refusant celles qui dépasseraient
+        le quota sur les 365 jours précédents."""
+        medics = [str(medicine_id) for medicine_id in range(len(catalog))]
+        wanted = round(cares_per_year * (self.until - since).days / 365)
+        days = sorted(self.random_day(since, self.until) for _ in range(wanted))
+        accepted: list[date] = []
+        for day in days:
+            recent = [d for d in accepted[-MAX_CARES_PER_YEAR:]
+                      if (day - d).days < 365]
+            if len(recent) < MAX_CARES_PER_YEAR:
+                accepted.append(day)
+        cares = []
+        for day in accepted:
+            medicaments = self.medicaments(medics)
+            milk, meat = catalog.withdrawal_ends(day, medicaments)
+            cares.append(Traitement(
+                id=0, date_traitement=my_strftime(day), medicaments=medicaments,
+                annotation=self.rng.choice(["", "", "boiterie", "mammite",
+                                            "fièvre", "contrôle"]),
+                fin_retrait_lait=my_strftime(milk) if milk else None,
+                fin_retrait_viande=my_strftime(meat) if meat else None))
+        return cares
+
+    @staticmethod
+    def withdrawal_until(cares: list[Traitement]) -> dict[str, date | None]:
+        """Fins de délai d'attente de la vache, comme `Cow.refresh_withdrawal`."""
+        return {attr: max((date.fromisoformat(care[key]) for care in cares  # type: ignore
+                           if care.get(key)), default=None)
+                for attr, key in (("milk_withdrawal_until", "fin_retrait_lait"),
+                                  ("meat_withdrawal_until", "fin_retrait_viande"))}
+
+    def reproductions(self, cycles: int, since: date) -> list[Reproduction]:
+        """Enchaîne jusqu'à `cycles` cycles : insémination, échographie
+        (parfois négative), puis tarissement, préparation et vêlage selon les
+        dates déjà passées. Le dernier cycle peut être en cours."""
+        result: list[Reproduction] = []
+        insemination = self.random_day(since, since + timedelta(days=120))
+        while len(result) < cycles and insemination <= self.until:
+            reproduction: Reproduction = {
+                "insemination": [my_strftime(insemination)],
+                "ultrasound": None,
+                "dry": None,
+                "dry_status": False,
+                "calving_preparation": None,
+                "calving_preparation_status": False,
+                "calving_date": None,
+                "calving": False,
+                "abortion": False,
+                "reproduction_details": None,
+            }
+            result.append(reproduction)
+            if insemination + timedelta(days=35) > self.until:
+                break  # échographie pas encore faite
+            if self.rng.random() < 0.15:
+                reproduction["ultrasound"] = False
+                insemination += timedelta(days=self.rng.randint(21, 45))
+                continue
+            reproduction["ultrasound"] = True
+            CowUtils.set_reproduction(reproduction, self.dry_time,
+                                      self.calving_preparation_time)
+            calving = date.fromisoformat(reproduction["calving_date"])  # type: ignore
+            reproduction["dry_status"] = date.fromisoformat(reproduction["dry"]) <= self.until  # type: ignore
+            reproduction["calving_preparation_status"] = (
+                date.fromisoformat(reproduction["calving_preparation"]) <= self.until)  # type: ignore
+            if calving > self.until:
+                break  # gestation en cours
+            reproduction["calving"] = True
+            reproduction["abortion"] = self.rng.random() < 0.04
+            insemination = calving + timedelta(days=self.rng.randint(50, 110))
+        return result
+
+    def farm(self, user_id: int, cows: int, calves: int, cares_per_year: int,
+             cycles: int, prescriptions_per_year: int,
+             dlc_exits_per_year: int
+             ) -> dict[str, list[dict[str, Any]]]:
+        """Renvoie les lignes à insérer pour une ferme, par table. Les
+        quantités sont enregistrées par identifiant du catalogue.
+
+        La moitié des médicaments environ impose des délais d'attente et un
+        tiers a un seuil de réapprovisionnement. Chaque ligne d'ordonnance
+        donne un lot ; `prescription_id` y est la position de l'ordonnance
+        dans `rows["prescription"]`, à remplacer par son identifiant après
+        insertion.
+        """
+        names = sorted(self.rng.sample(sorted(MEDICS), self.rng.randint(6, len(MEDICS))))
+        medics = [str(medicine_id) for medicine_id in range(len(names))]
+        # les ordonnances couvrent la consommation annuelle avec une marge
+        restock = max(5, round(1.2 * (cows + calves) * max(cares_per_year, 1)
+                               / max(prescriptions_per_year, 1)))
+        # consommation annuelle moyenne d'un médicament : deux médicaments de
+        # 10,5 unités en moyenne par traitement ; sert d'échelle aux seuils
+        yearly_use = max(1, round(21 * (cows + calves) * max(cares_per_year, 1) / len(names)))
+        rows: dict[str, list[dict[str, Any]]] = {"medicine": [], "cow": [], "prescription": [],
+                                                 "lot": [], "pharmacie": []}
+        for medicine_id, name in enumerate(names):
+            withdrawal = self.rng.random() < 0.5
+            rows["medicine"].append(dict(
+                user_id=user_id, medicine_id=medicine_id, name=name, unit=MEDICS[name],
+                milk_withdrawal_days=self.rng.choice(MILK_WITHDRAWAL_DAYS) if withdrawal else 0,
+                meat_withdrawal_days=self.rng.choice(MEAT_WITHDRAWAL_DAYS) if withdrawal else 0,
+                reorder_threshold=(self.rng.randint(yearly_use // 2, 3 * yearly_use)
+                                   if self.rng.random() < 1 / 3 else None)))
+        catalog = MedicineCatalog(
+            names, [row["unit"] for row in rows["medicine"]],
+            [row["milk_withdrawal_days"] for row in rows["medicine"]],
+            [row["meat_withdrawal_days"] for row in rows["medicine"]],
+            [row["reorder_threshold"] for row in rows["medicine"]])
+
+        for cow_id in range(1, cows + 1):
+            born = self.random_day(self.start - timedelta(days=5 * 365),
+                                   self.until - timedelta(days=2 * 365))
+            since = max(born + timedelta(days=450), self.start)
+            in_farm = self.rng.random() > 0.05
+            cares = self.cares(catalog, cares_per_year, since)
+            rows["cow"].append(dict(
+                user_id=user_id, cow_id=cow_id, mother_id=None,
+                name=f"Vache {cow_id}" if self.rng.random() < 0.3 else None,
+                sexe=True, cow_cares=cares,
+                info=[], in_farm=in_farm, born_date=born,
+                reproduction=self.reproductions(cycles, since),
+                is_calf=False, init_as_cow=born < self.start,
+                **self.withdrawal_until(cares)))
+
+        for calf_id in range(cows + 1, cows + calves + 1):
+            born = self.random_day(self.until - timedelta(days=365), self.until)
+            cares = self.cares(catalog, max(cares_per_year - 1, 0), born)
+            rows["cow"].append(dict(
+                user_id=user_id, cow_id=calf_id,
+                mother_id=self.rng.randint(1, cows) if cows else None,
+                name=None, sexe=self.rng.random() < 0.5,
+                cow_cares=cares,
+                info=[], in_farm=True, born_date=born, reproduction=[],
+                is_calf=True, init_as_cow=False, **self.withdrawal_until(cares)))
+
+        for offset in range(self.years + 1):
+            year = self.start.year + offset
+            first = max(date(year, 1, 1), self.start)
+            last = min(date(year, 12, 31), self.until)
+            for _ in range(prescriptions_per_year):
+                day = self.random_day(first, last)
+                care = {m: q * restock for m, q in self.medicaments(medics).items()}
+                for medic, quantity in care.items():
+                    # un lot sur dix sans date de péremption
+                    expiry = (day + timedelta(days=self.rng.randint(180, 3 * 365))
+                              if self.rng.random() < 0.9 else None)
+                    rows["lot"].append(dict(
+                        user_id=user_id, medicine_id=int(medic),
+                        prescription_id=len(rows["prescription"]), expiry=expiry,
+                        quantity=quantity, remaining=quantity))
+                rows["prescription"].append(dict(
+                    user_id=user_id, date=day, care=care, dlc_left=False))
+            for _ in range(dlc_exits_per_year):
+                rows["prescription"].append(dict(
+                    user_id=user_id, date=self.random_day(first, last),
+                    care=self.medicaments(medics), dlc_left=True))
+
+        rows["pharmacie"].append(dict(
+            user_id=user_id, year=self.start.year,
+            remaining_stock={medic: self.rng.randint(0, 50) for medic in medics},
+            total_enter={}, total_used={}, total_used_calf={},
+            total_out_dlc={}, total_out={}))
+        return rows
+
+
+def _batches(rows: list[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    for i in range(0, len(rows), BATCH_SIZE):
+        yield rows[i:i + BATCH_SIZE]
+
+
+def seed_farms(farms: int = 1, cows: int = 100, calves: int = 20,
+               years: int = 3, cares_per_year: int = 2, cycles: int = 3,
+               prescriptions: int = 12, dlc_exits: int = 2, seed: int = 0,
+               until: date | None = None) -> list[int]:
+    """Génère des fermes synthétiques et les insère par lots dans la base.
+
+    Pour une même graine et une même date de fin `until` (aujourd'hui par
+    défaut), les données générées sont identiques. Chaque ferme est un
+    utilisateur `farm<n>@seed.local` de mot de passe `seed`. Les lots des
+    ordonnances sont consommés par l'historique du premier périmé au dernier
+    (`LotUtils.apply_stock_delta`) et les alertes de stock bas de l'année en
+    cours sont ouvertes (`AlertUtils.refresh`).
+
+    Arguments:
+        * farms (int): Nombre de fermes (utilisateurs)
+        * cows (int): Nombre de vaches adultes par ferme
+        * calves (int): Nombre de veaux par ferme
+        * years (int): Profondeur de l'historique en années
+        * cares_per_year (int): Traitements visés par vache et par an (au
+        plus trois sur une année glissante)
+        * cycles (int): Nombre maximal de cycles de reproduction par vache
+        * prescriptions (int): Ordonnances par ferme et par an
+        * dlc_exits (int): Sorties de stock pour péremption par ferme et par an
+        * seed (int): Graine du générateur pseudo-aléatoire
+        * until (date | None): Date de fin de l'historique
+
+    Renvoie:
+        * list[int]: Identifiants des utilisateurs créés
+    """
+    rng = random.Random(seed)
+    generator = FarmGenerator(rng, until or date.today(), years)
+    password = generate_password_hash(SEED_PASSWORD)
+    first_farm = db.session.query(db.func.count(Users.id)).scalar() + 1
+    started = time.perf_counter()
+
+    user_ids: list[int] = []
+    for n in range(first_farm, first_farm + farms):
+        user = Users(email=f"farm{n}@seed.local", password=password,
+                     setting={"dry_time": generator.dry_time,
+                              "calving_preparation_time": generator.calving_preparation_time})
+        db.session.add(user)
+        db.session.flush()
+        rows = generator.farm(user.id, cows, calves, cares_per_year, cycles,
+                              prescriptions, dlc_exits)
+        for model in (Medicine, Cow, Prescription, Pharmacie):
+            for batch in _batches(rows[model.__tablename__]):
+                db.session.execute(insert(model), batch)
+        # identifiants attribués dans l'ordre d'insertion des ordonnances
+        prescription_ids = db.session.scalars(
+            select(Prescription.id).where(Prescription.user_id == user.id)
+            .order_by(Prescription.id)).all()
+        for batch in _batches([dict(lot, prescription_id=prescription_ids[lot["prescription_id"]])
+                               for lot in rows["lot"]]):
+            db.session.execute(insert(Lot), batch)
+        # consommation de l'historique (traitements et sorties pour DLC) prise
+        # sur les lots du premier périmé au dernier
+        consumed: dict[str, int] = {}
+        for quantities in ([care["medicaments"] for cow in rows["cow"] for care in cow["cow_cares"]]
+                           + [row["care"] for row in rows["prescription"] if row["dlc_left"]]):
+            for medic, quantity in quantities.items():
+                consumed[medic] = consumed.get(medic, 0) - quantity
+        LotUtils.apply_stock_delta(user.id, consumed)
+        db.session.commit()
+        # bilans annuels calculés par le code de l'application, comme si la
+        # ferme avait clôturé chaque année, puis alertes de stock bas
+        farm = ConnectedUser(user=user)
+        for year in range(generator.start.year + 1, generator.until.year + 1):
+            farm.update_pharmacie_year(year=year)
+        AlertUtils.refresh(user.id, PharmacieUtils.get_pharmacie_year(
+            user.id, generator.until.year).remaining_stock, range(len(rows["medicine"])))
+        user_ids.append(user.id)
+        lg.info(f"seed: farm {user.id} generated")
+
+    # les insertions en masse ne passent pas par le suivi des versions
+    cache.clear()
+    lg.warning(f"seed: {farms} farms generated in {time.perf_counter() - started:.1f}s")
+    return user_ids
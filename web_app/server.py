@@ -0,0 +1,35 @@
+import logging as lg
+import os
+
+from flask import Flask
+
+from . import db
+from .cache import cache
+from .logs import restart_after_fork
+from .metrics import registry
+
+
+def reset_after_fork(app: Flask) -> None:
+    """Réinitialise dans un worker les ressources héritées du maître.
+
+    L'application est chargée une seule fois avant le fork (mémoire partagée
+    en copie sur écriture), mais les connexions ouvertes par le maître ne
+    doivent pas être partagées : le pool SQLAlchemy est vidé sans fermer les
+    connexions du parent, le backend de cache rouvre les siennes et les
+    threads d'écriture des journaux sont relancés.
+    """
+    restart_after_fork()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    cache.reset_after_fork()
+    lg.info(f"worker {os.getpid()} ready")
+
+
+def flush_before_exit(app: Flask) -> None:
+    """Écrit les métriques du worker avant son arrêt (recyclage après
+    `max_requests` ou arrêt du serveur), pour ne pas perdre ses compteurs."""
+    if directory := app.config.get("METRICS_DIR"):
+        try:
+            registry.flush(directory)
+        except OSError as e:
+            lg.error(f"metrics of worker {os.getpid()} not saved: {e}")
@@ -175,315 +175,319 @@ window.addEventListener("load", () => {
 
 
 
+  for (const section of ["reproductions", "cares"]) {
+    document.querySelector(`button#${section}-more-button`).addEventListener("click", () => {
+      loadMoreHistory(section);
+    });
+  }
+
   updateCow();
 });
 
-async function updateCowReproductions() {
-  const reproductionList = document.querySelector("#reproduction-list");
-  const changeReproductionPopup = document.querySelector("div.popup#change-reproduction-popup");
+const HISTORY_PER_PAGE = 20;
+const historyPages = { reproductions: 0, cares: 0 };
 
+async function fetchCowDetail(params) {
+  const query = new URLSearchParams({ cow_id: cowId, per_page: HISTORY_PER_PAGE, ...params });
+  const response = await fetch(`/cow/get-detail?${query}`);
 
-  try {
-    const response = await fetch(`/cow/get-reproductions?cow_id=${cowId}`);
+  const contentType = response.headers.get("Content-Type");
+  if (!(contentType.includes("application/json"))) {
+    console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
+    console.log(await response.text());
+    return null;
+  }
 
-    const contentType = response.headers.get("Content-Type");
-    if (!(contentType.includes("application/json"))) {
-      console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
-      console.log(await response.text());
-      return;
-    }
+  const result = await response.json();
+  if (!result.success) {
+    console.error(result.message);
+    return null;
+  }
 
-    const result = await response.json();
-    if (!result.success) {
-      console.error(result.message);
+  return result.message;
+}
+
+function updateMoreButton(section, page) {
+  historyPages[section] = page.page;
+  document.querySelector(`button#${section}-more-button`).hidden = !page.has_more;
+}
+
+async function loadMoreHistory(section) {
+  try {
+    const detail = await fetchCowDetail({ section: section, page: historyPages[section] + 1 });
+    if (!detail) {
       return;
     }
 
-    const reproductions = result.message;
-
-    let index = 0;
-    reproductions.forEach(reproduction => {
+    if (section === "cares") {
+      appendCowCares(detail.cares);
+    } else {
+      appendCowReproductions(detail.reproductions);
+    }
+  } catch (error) {
+    console.error(`AJAX request failed due to: ${error}`);
+    alert("Impossible de récupérer la suite de l'historique.");
+  }
+}
 
-      console.log(reproduction["insemination"]);
+function appendCowReproductions(page) {
+  const reproductionList = document.querySelector("#reproduction-list");
+  const changeReproductionPopup = document.querySelector("div.popup#change-reproduction-popup");
 
-      const date = reproduction["insemination"]
-        .map(insemination =>
-          new Date(insemination).toLocaleDateString(
-            "fr-FR",
-            {
-              day: "2-digit",
-              month: "short",
-              year: "numeric"
-            }
-          )
+  page.items.forEach(reproduction => {
+    // position d'affichage, attendue par les vues de modification et de suppression
+    const index = reproduction["index"];
+
+    const date = reproduction["insemination"]
+      .map(insemination =>
+        new Date(insemination).toLocaleDateString(
+          "fr-FR",
+          {
+            day: "2-digit",
+            month: "short",
+            year: "numeric"
+          }
         )
-        .join(", ");
+      )
+      .join(", ");
 
-      const template = document.querySelector(
-        "#reproduction-template"
-      );
+    const template = document.querySelector(
+      "#reproduction-template"
+    );
 
-      const card = template.content.children[0].cloneNode(true);
+    const card = template.content.children[0].cloneNode(true);
 
-      card.querySelector(".title").textContent = `Insémination du ${date}`;
+    card.querySelector(".title").textContent = `Insémination du ${date}`;
 
-      card.querySelector(".status").textContent =
-        reproduction["calving"] ? "Terminée" : "En cours";
+    card.querySelector(".status").textContent =
+      reproduction["calving"] ? "Terminée" : "En cours";
 
-      card.querySelector(".echo").textContent =
-        reproduction["ultrasound"] === null ? "En attente" :
-          reproduction["ultrasound"] ? "Pleine" : "Vide";
+    card.querySelector(".echo").textContent =
+      reproduction["ultrasound"] === null ? "En attente" :
+        reproduction["ultrasound"] ? "Pleine" : "Vide";
 
-      card.querySelector(".dry").textContent = reproduction["dry"] ? new Date(reproduction["dry"]).toLocaleDateString("fr-FR", {
-        day: "2-digit",
-        month: "short",
-        year: "numeric"
-      }) : "En attente";
+    card.querySelector(".dry").textContent = reproduction["dry"] ? new Date(reproduction["dry"]).toLocaleDateString("fr-FR", {
+      day: "2-digit",
+      month: "short",
+      year: "numeric"
+    }) : "En attente";
 
-      card.querySelector(".prep").textContent = reproduction["calving_preparation"] ? new Date(reproduction["calving_preparation"]).toLocaleDateString("fr-FR", {
-        day: "2-digit",
-        month: "short",
-        year: "numeric"
-      }) : "En attente";
+    card.querySelector(".prep").textContent = reproduction["calving_preparation"] ? new Date(reproduction["calving_preparation"]).toLocaleDateString("fr-FR", {
+      day: "2-digit",
+      month: "short",
+      year: "numeric"
+    }) : "En attente";
 
-      card.querySelector(".calving").textContent = reproduction["calving_date"] ? new Date(reproduction["calving_date"]).toLocaleDateString("fr-FR", {
-        day: "2-digit",
-        month: "short",
-        year: "numeric"
-      }) : "En attente";
+    card.querySelector(".calving").textContent = reproduction["calving_date"] ? new Date(reproduction["calving_date"]).toLocaleDateString("fr-FR", {
+      day: "2-digit",
+      month: "short",
+      year: "numeric"
+    }) : "En attente";
 
-      card.querySelector(".abortion").textContent =
-        reproduction["abortion"] === null ? "En attente" :
-          reproduction["abortion"] ? "avortement" : "non";
+    card.querySelector(".abortion").textContent =
+      reproduction["abortion"] === null ? "En attente" :
+        reproduction["abortion"] ? "avortement" : "non";
 
-      card.querySelector(".details-content").textContent =
-        reproduction["reproduction_details"] || "Aucune information supplémentaire";
+    card.querySelector(".details-content").textContent =
+      reproduction["reproduction_details"] || "Aucune information supplémentaire";
 
-      card.querySelector("button#reproduction-change-button").setAttribute("index", index);
-      card.querySelector("button#reproduction-delete-button").setAttribute("index", index);
+    card.querySelector("button#reproduction-change-button").setAttribute("index", index);
+    card.querySelector("button#reproduction-delete-button").setAttribute("index", index);
 
-      reproductionList.appendChild(card);
+    reproductionList.appendChild(card);
 
-      card.querySelector("button#reproduction-delete-button").addEventListener("click", async (e) => {
-        if (!confirm('Are you sure?')) {
-          return;
-        }
+    card.querySelector("button#reproduction-delete-button").addEventListener("click", async (e) => {
+      if (!confirm('Are you sure?')) {
+        return;
+      }
 
-        const index = e.currentTarget.getAttribute("index");
+      const index = e.currentTarget.getAttribute("index");
 
-        let reqData = new FormData();
-        reqData.append("cow_id", cowId);
-        reqData.append("index", index);
+      let reqData = new FormData();
+      reqData.append("cow_id", cowId);
+      reqData.append("index", index);
 
-        const response = await fetch("/cow/remove_reproduction", {
-          method: "POST",
-          body: reqData
-        });
+      const response = await fetch("/cow/remove_reproduction", {
+        method: "POST",
+        body: reqData
+      });
 
-        const contentType = response.headers.get("Content-Type");
+      const contentType = response.headers.get("Content-Type");
 
-        if (!contentType.includes("application/json")) {
-          console.error(`Unexpected response: expected application/json, got ${contentType}`);
-          return;
-        }
+      if (!contentType.includes("application/json")) {
+        console.error(`Unexpected response: expected application/json, got ${contentType}`);
+        return;
+      }
 
-        const result = await response.json();
-        sessionStorage.setItem(
-          "flashMessage",
-          JSON.stringify(result)
-        );
+      const result = await response.json();
+      sessionStorage.setItem(
+        "flashMessage",
+        JSON.stringify(result)
+      );
 
-        location.reload()
-      });
+      location.reload()
+    });
 
-      card.querySelector("button#reproduction-change-button").addEventListener("click", async (e) => {
-        changeReproductionPopup.querySelector(".popup-title").textContent = `Modifier la reproduction du ${date}`;
-        changeReproductionPopup.querySelector(".index").setAttribute("value", index);
-        // changeReproductionPopup.querySelector(".insemination").setAttribute("value", reproduction["insemination"] ? new Date(reproduction["insemination"]).toISOString().split("T")[0] : "");
+    card.querySelector("button#reproduction-change-button").addEventListener("click", async (e) => {
+      changeReproductionPopup.querySelector(".popup-title").textContent = `Modifier la reproduction du ${date}`;
+      changeReproductionPopup.querySelector(".index").setAttribute("value", index);
+      // changeReproductionPopup.querySelector(".insemination").setAttribute("value", reproduction["insemination"] ? new Date(reproduction["insemination"]).toISOString().split("T")[0] : "");
 
-        changeReproductionPopup.querySelector(".echo").value =
-          reproduction["ultrasound"] === null ? "None" :
-            reproduction["ultrasound"] ? "1" : "";
+      changeReproductionPopup.querySelector(".echo").value =
+        reproduction["ultrasound"] === null ? "None" :
+          reproduction["ultrasound"] ? "1" : "";
 
-        changeReproductionPopup.querySelector(".dry").value =
-          reproduction["dry_status"] ? "1" : "";
+      changeReproductionPopup.querySelector(".dry").value =
+        reproduction["dry_status"] ? "1" : "";
 
-        changeReproductionPopup.querySelector(".prep").value =
-          reproduction["calving_preparation_status"] ? "1" : "";
+      changeReproductionPopup.querySelector(".prep").value =
+        reproduction["calving_preparation_status"] ? "1" : "";
 
-        changeReproductionPopup.querySelector(".calving").value =
-          reproduction["calving"] ? "1" : "";
+      changeReproductionPopup.querySelector(".calving").value =
+        reproduction["calving"] ? "1" : "";
 
-        changeReproductionPopup.querySelector(".abortion").value =
-          reproduction["abortion"] ? "1" : "";
+      changeReproductionPopup.querySelector(".abortion").value =
+        reproduction["abortion"] ? "1" : "";
 
-        changeReproductionPopup.querySelector(".details-content").value =
-          reproduction["reproduction_details"] || "";
+      changeReproductionPopup.querySelector(".details-content").value =
+        reproduction["reproduction_details"] || "";
 
-        changeReproductionPopup.querySelector(".index").setAttribute("value", index);
+      changeReproductionPopup.querySelector(".index").setAttribute("value", index);
 
-        const inseminationDateContainer = changeReproductionPopup.querySelector("#insemination-container");
-        while (inseminationDateContainer.children.length > 0) {
-          inseminationDateContainer.removeChild(inseminationDateContainer.lastElementChild);
-        }
-        const inseminationDateTemplate = document.querySelector("#insemination-date-template");
-
-        let count = 0;
-        reproduction["insemination"].forEach(insemination => {
-          cardInsemination = inseminationDateTemplate.content.cloneNode(true);
-          cardInsemination.querySelector("label").textContent = `Insemination ${count + 1}`;
-          cardInsemination.querySelector("input").setAttribute("value", new Date(insemination).toISOString().split("T")[0]);
-          inseminationDateContainer.appendChild(cardInsemination);
-          count++;
-        });
+      const inseminationDateContainer = changeReproductionPopup.querySelector("#insemination-container");
+      while (inseminationDateContainer.children.length > 0) {
+        inseminationDateContainer.removeChild(inseminationDateContainer.lastElementChild);
+      }
+      const inseminationDateTemplate = document.querySelector("#insemination-date-template");
+
+      let count = 0;
+      reproduction["insemination"].forEach(insemination => {
+        cardInsemination = inseminationDateTemplate.content.cloneNode(true);
+        cardInsemination.querySelector("label").textContent = `Insemination ${count + 1}`;
+        cardInsemination.querySelector("input").setAttribute("value", new Date(insemination).toISOString().split("T")[0]);
+        inseminationDateContainer.appendChild(cardInsemination);
+        count++;
+      });
 
 
-        changeReproductionPopup.style.display = "block";
-        index++;
-      });
+      changeReproductionPopup.style.display = "block";
     });
+  });
 
-
-  } catch (error) {
-    console.error(`AJAX request failed due to: ${error}`);
-    alert("Impossible de récupérer la liste des reproductions.");
-  }
+  updateMoreButton("reproductions", page);
 }
 
-async function updateCowCares() {
+function appendCowCares(page) {
   const careList = document.querySelector("#care-list");
 
-  try {
-    const response = await fetch(`/cow/get-cares?cow_id=${cowId}`);
-
-    const contentType = response.headers.get("Content-Type");
-    if (!(contentType.includes("application/json"))) {
-      console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
-      console.log(await response.text());
-      return;
-    }
-
-    const result = await response.json();
-    if (!result.success) {
-      console.error(result.message);
-      return;
-    }
+  page.items.forEach(care => {
+    const index = care["index"];
 
-    const cares = result.message;
+    const careTemplate = document.querySelector(
+      "#care-template"
+    );
 
-    let index = 0;
+    const card = careTemplate.content.children[0].cloneNode(true);
 
-    cares.forEach(care => {
+    const date = new Date(care["date_traitement"]).toLocaleDateString("fr-FR", {
+      day: "2-digit",
+      month: "short",
+      year: "numeric"
+    })
 
-      const careTemplate = document.querySelector(
-        "#care-template"
+    const medicationList =
+      card.querySelector(
+        ".medication-list"
       );
 
-      const card = careTemplate.content.children[0].cloneNode(true);
+    const medicationTemplate =
+      card.querySelector(".medication-template");
 
-      const date = new Date(care["date_traitement"]).toLocaleDateString("fr-FR", {
-        day: "2-digit",
-        month: "short",
-        year: "numeric"
-      })
+    Object.entries(care["medicaments"] || {})
+      .forEach(([medication, dose]) => {
 
-      const medicationList =
-        card.querySelector(
-          ".medication-list"
-        );
+        const medCard =
+          medicationTemplate.content.children[0].cloneNode(true);
 
-      const medicationTemplate =
-        card.querySelector(".medication-template");
+        medCard.querySelector(".medication").textContent =
+          medication + ":";
 
-      Object.entries(care["medicaments"] || {})
-        .forEach(([medication, dose]) => {
+        medCard.querySelector(".dose").textContent =
+          dose;
 
-          const medCard =
-            medicationTemplate.content.children[0].cloneNode(true);
+        medicationList.appendChild(medCard);
 
-          medCard.querySelector(".medication").textContent =
-            medication + ":";
+      });
+    medicationTemplate.remove();
 
-          medCard.querySelector(".dose").textContent =
-            dose;
+    const details = care["annotation"] || "Aucune information supplémentaire";
+    card.querySelector(".title").textContent = `Soins du ${date}`;
+    card.querySelector(".details-content").textContent = details;
 
-          medicationList.appendChild(medCard);
+    card.querySelector("button#care-change-button").setAttribute("index", index);
+    card.querySelector("button#care-delete-button").setAttribute("index", index);
 
-        });
-      medicationTemplate.remove();
+    card.querySelector("button#care-delete-button").addEventListener("click", async (e) => {
+      if (!confirm('Are you sure?')) {
+        return;
+      }
 
-      const details = care["annotation"] || "Aucune information supplémentaire";
-      card.querySelector(".title").textContent = `Soins du ${date}`;
-      card.querySelector(".details-content").textContent = details;
+      const index = e.currentTarget.getAttribute("index");
 
-      card.querySelector("button#care-change-button").setAttribute("index", index);
-      card.querySelector("button#care-delete-button").setAttribute("index", index);
+      let reqData = new FormData();
+      reqData.append("cow_id", cowId);
+      reqData.append("index", index);
 
-      card.querySelector("button#care-delete-button").addEventListener("click", async (e) => {
-        if (!confirm('Are you sure?')) {
-          return;
-        }
+      const response = await fetch("/cow/remove_care", {
+        method: "POST",
+        body: reqData
+      });
 
-        const index = e.currentTarget.getAttribute("index");
+      const contentType = response.headers.get("Content-Type");
 
-        let reqData = new FormData();
-        reqData.append("cow_id", cowId);
-        reqData.append("index", index);
+      if (!contentType.includes("application/json")) {
+        console.error(`Unexpected response: expected application/json, got ${contentType}`);
+        return;
+      }
 
-        const response = await fetch("/cow/remove_care", {
-          method: "POST",
-          body: reqData
-        });
+      const result = await response.json();
+      sessionStorage.setItem(
+        "flashMessage",
+        JSON.stringify(result)
+      );
 
-        const contentType = response.headers.get("Content-Type");
+      location.reload()
+    });
 
-        if (!contentType.includes("application/json")) {
-          console.error(`Unexpected response: expected application/json, got ${contentType}`);
-          return;
-        }
+    card.querySelector("button#care-change-button").addEventListener("click", async (e) => {
+      const changeCarePopup = document.querySelector("div.popup#change-care-popup");
+      changeCarePopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
+      changeCarePopup.querySelector(".date").value =
+        new Date(care["date_traitement"]).toISOString().split("T")[0];
+      changeCarePopup.querySelector(".annotation").value = care["annotation"] || "";
 
-        const result = await response.json();
-        sessionStorage.setItem(
-          "flashMessage",
-          JSON.stringify(result)
-        );
+      const medicationContainer = changeCarePopup.querySelector("#medication-extend");
+      while (medicationContainer.children.length > 0) {
+        medicationContainer.removeChild(medicationContainer.lastElementChild);
+      }
+      const medicationTemplate = document.querySelector("#medication-template");
+      Object.entries(care["medicaments"] || {}).forEach(([medication, dose]) => {
+        const medCard = medicationTemplate.content.children[0].cloneNode(true);
+        medCard.querySelector(".medication").value = medication;
 
-        location.reload()
+        medCard.querySelector(".dose").value = dose;
+        medicationContainer.appendChild(medCard);
       });
 
-      card.querySelector("button#care-change-button").addEventListener("click", async (e) => {
-        const changeCarePopup = document.querySelector("div.popup#change-care-popup");
-        changeCarePopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
-        changeCarePopup.querySelector(".date").value =
-          new Date(care["date_traitement"]).toISOString().split("T")[0];
-        changeCarePopup.querySelector(".annotation").value = care["annotation"] || "";
-
-        const medicationContainer = changeCarePopup.querySelector("#medication-extend");
-        while (medicationContainer.children.length > 0) {
-          medicationContainer.removeChild(medicationContainer.lastElementChild);
-        }
-        const medicationTemplate = document.querySelector("#medication-template");
-        Object.entries(care["medicaments"] || {}).forEach(([medication, dose]) => {
-          const medCard = medicationTemplate.content.children[0].cloneNode(true);
-          medCard.querySelector(".medication").value = medication;
+      changeCarePopup.querySelector(".index").setAttribute("value", index);
 
-          medCard.querySelector(".dose").value = dose;
-          medicationContainer.appendChild(medCard);
-        });
-
-        changeCarePopup.querySelector(".index").setAttribute("value", index);
-
-        changeCarePopup.style.display = "block";
-      });
-
-      careList.appendChild(card);
-      index++;
+      changeCarePopup.style.display = "block";
     });
 
-  } catch (error) {
-    console.error(`AJAX request failed due to: ${error}`);
-    alert("Impossible de récupérer la liste des soins.");
-  }
+    careList.appendChild(card);
+  });
+
+  updateMoreButton("cares", page);
 }
 
 async function loadMessages() {
@@ -544,6 +548,16 @@ async function loadMessages() {
 }
 
 async function updateCow() {
-  await updateCowReproductions();
-  await updateCowCares();
+  try {
+    const detail = await fetchCowDetail({});
+    if (!detail) {
+      return;
+    }
+
+    appendCowReproductions(detail.reproductions);
+    appendCowCares(detail.cares);
+  } catch (error) {
+    console.error(`AJAX request failed due to: ${error}`);
+    alert("Impossible de récupérer l'historique de la vache.");
+  }
 }
\ No newline at end of file
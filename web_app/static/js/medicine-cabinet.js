@@ -23,7 +23,7 @@ window.addEventListener("load", () => {
         prescriptionPopup.style.display = "none";
     });
 
-    const prescriptionMedicationTemplate = document.querySelector("#medication-template");
+    const prescriptionMedicationTemplate = document.querySelector("#prescription-medication-template");
     const prescriptionContainer = document.querySelector("#medication-extend-treatment");
 
     const addMedicationButtonTreatment = document.querySelector("div#btn-ext-treatment button#extend-medication");
@@ -106,9 +106,15 @@ window.addEventListener("load", () => {
         }
     });
 
-    updateStock();
-    updatePrescription();
-    updateDlc();
+    for (const section of ["prescriptions", "dlc"]) {
+        document.querySelector(`button#${section}-more-button`).addEventListener("click", () => {
+            loadMoreDashboard(section);
+        });
+    }
+
+    updateDashboard();
+    updateExpiringLots();
+    updateStockAlerts();
 
 });
 
@@ -169,16 +175,95 @@ async function loadMessages() {
 
 }
 
-async function updateStock() {
+const DASHBOARD_PER_PAGE = 20;
+const dashboardPages = { prescriptions: 0, dlc: 0 };
+
+async function fetchDashboard(params) {
+    const query = new URLSearchParams({ per_page: DASHBOARD_PER_PAGE, ...params });
+    const response = await fetch(`/pharmacy/get-dashboard?${query}`);
+
+    const contentType = response.headers.get("Content-Type");
+    if (!(contentType.includes("application/json"))) {
+        console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
+        console.log(await response.text());
+        return null;
+    }
+
+    const result = await response.json();
+    if (!result.success) {
+        console.error(result.message);
+        return null;
+    }
+
+    return result.message;
+}
+
+async function updateDashboard() {
+    try {
+        const dashboard = await fetchDashboard({});
+        if (!dashboard) {
+            return;
+        }
+
+        appendStock(dashboard.stock, dashboard.totals);
+        appendPrescriptions(dashboard.prescriptions);
+        appendDlc(dashboard.dlc);
+    } catch (error) {
+        console.error(`AJAX request failed due to: ${error}`);
+        alert("Impossible de récupérer la pharmacie.");
+    }
+}
+
+async function loadMoreDashboard(section) {
+    try {
+        const dashboard = await fetchDashboard({ section: section, page: dashboardPages[section] + 1 });
+        if (!dashboard) {
+            return;
+        }
+
+        if (section === "dlc") {
+            appendDlc(dashboard.dlc);
+        } else {
+            appendPrescriptions(dashboard.prescriptions);
+        }
+    } catch (error) {
+        console.error(`AJAX request failed due to: ${error}`);
+        alert("Impossible de récupérer la suite de la liste.");
+    }
+}
+
+function updateMoreButton(section, page) {
+    dashboardPages[section] = page.page;
+    document.querySelector(`button#${section}-more-button`).hidden = !page.has_more;
+}
+
+function appendStock(stock, totals) {
     const stockList = document.querySelector("#stock-list");
 
+    const StockTemplate = document.querySelector(
+        "#stock-row"
+    );
+
+    Object.entries(stock || {}).forEach(([medication, dose]) => {
+        const Card = StockTemplate.content.children[0].cloneNode(true);
+        Card.querySelector(".medication").textContent = medication;
+
+        Card.querySelector(".dose").textContent = dose;
+        Card.querySelector(".enter").textContent = totals["total_enter"][medication] || 0;
+        Card.querySelector(".used").textContent = totals["total_used"][medication] || 0;
+        Card.querySelector(".out-dlc").textContent = totals["total_out_dlc"][medication] || 0;
+        stockList.appendChild(Card);
+    });
+}
+
+
+async function updateStockAlerts() {
     try {
-        const response = await fetch(`/pharmacy/get-stock`);
+        const response = await fetch("/pharmacy/get-alerts");
 
         const contentType = response.headers.get("Content-Type");
         if (!(contentType.includes("application/json"))) {
             console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
-            console.log(await response.text());
             return;
         }
 
@@ -188,37 +273,29 @@ async function updateStock() {
             return;
         }
 
-        const medication = result.message;
+        const alertList = document.querySelector("#stock-alert-list");
+        const alertTemplate = document.querySelector("#stock-alert-row");
 
-        const StockTemplate = document.querySelector(
-            "#stock-row"
-        );
-
-        Object.entries(medication || {}).forEach(([medication, dose]) => {
-            const Card = StockTemplate.content.children[0].cloneNode(true);
-            Card.querySelector(".medication").textContent = medication;
-
-            Card.querySelector(".dose").textContent = dose;
-            stockList.appendChild(Card);
+        result.message.forEach(alert => {
+            const row = alertTemplate.content.children[0].cloneNode(true);
+            row.textContent = `${alert["medicament"]} : ${alert["stock"]} ${alert["unit"]} en stock (seuil ${alert["threshold"]})`;
+            alertList.appendChild(row);
         });
-
+        document.querySelector("#stock-alerts").hidden = result.message.length === 0;
     } catch (error) {
         console.error(`AJAX request failed due to: ${error}`);
-        alert("Impossible de récupérer la liste des stock.");
     }
 }
 
+const EXPIRING_DAYS = 30;
 
-async function updatePrescription() {
-    const prescriptionList = document.querySelector("#prescription-list");
-
+async function updateExpiringLots() {
     try {
-        const response = await fetch(`/pharmacy/get-prescription`);
+        const response = await fetch(`/pharmacy/get-expiring-lots?days=${EXPIRING_DAYS}`);
 
         const contentType = response.headers.get("Content-Type");
         if (!(contentType.includes("application/json"))) {
             console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
-            console.log(await response.text());
             return;
         }
 
@@ -228,248 +305,241 @@ async function updatePrescription() {
             return;
         }
 
-        const prescriptions = result.message;
+        const expiringList = document.querySelector("#expiring-list");
+        const expiringTemplate = document.querySelector("#expiring-row");
 
-        let index = 0;
+        result.message.forEach(lot => {
+            const row = expiringTemplate.content.children[0].cloneNode(true);
+            row.querySelector(".medication").textContent = lot["medicament"];
+            row.querySelector(".expiry").textContent = new Date(lot["expiry"]).toLocaleDateString("fr-FR", {
+                day: "2-digit",
+                month: "short",
+                year: "numeric"
+            });
+            row.querySelector(".remaining").textContent = lot["remaining"];
+            row.querySelector(".quantity").textContent = lot["quantity"];
+            expiringList.appendChild(row);
+        });
+    } catch (error) {
+        console.error(`AJAX request failed due to: ${error}`);
+    }
+}
 
 
-        prescriptions.forEach(prescription => {
+function appendPrescriptions(page) {
+    const prescriptionList = document.querySelector("#prescription-list");
 
-            const prescriptionTemplate = document.querySelector(
-                "#prescription-dlc-template"
-            );
+    page.items.forEach(prescription => {
 
-            const card = prescriptionTemplate.content.children[0].cloneNode(true);
+        const prescriptionTemplate = document.querySelector(
+            "#prescription-dlc-template"
+        );
 
-            const date = new Date(prescription["date_prescription"]).toLocaleDateString("fr-FR", {
-                day: "2-digit",
-                month: "short",
-                year: "numeric"
-            })
+        const card = prescriptionTemplate.content.children[0].cloneNode(true);
 
-            const medicationList =
-                card.querySelector(
-                    ".medication-list"
-                );
+        const date = new Date(prescription["date_prescription"]).toLocaleDateString("fr-FR", {
+            day: "2-digit",
+            month: "short",
+            year: "numeric"
+        })
 
-            const medicationTemplate =
-                card.querySelector(".medication-template");
+        const medicationList =
+            card.querySelector(
+                ".medication-list"
+            );
 
-            Object.entries(prescription["prescription"] || {})
-                .forEach(([medication, dose]) => {
+        const medicationTemplate =
+            card.querySelector(".medication-template");
 
-                    const medCard =
-                        medicationTemplate.content.children[0].cloneNode(true);
+        Object.entries(prescription["prescription"] || {})
+            .forEach(([medication, dose]) => {
 
-                    medCard.querySelector(".medication").textContent =
-                        medication + ":";
+                const medCard =
+                    medicationTemplate.content.children[0].cloneNode(true);
 
-                    medCard.querySelector(".dose").textContent =
-                        dose;
+                medCard.querySelector(".medication").textContent =
+                    medication + ":";
 
-                    medicationList.appendChild(medCard);
+                medCard.querySelector(".dose").textContent =
+                    dose;
 
-                });
-            medicationTemplate.remove();
+                medicationList.appendChild(medCard);
 
-            card.querySelector(".title").textContent = `prescription du ${date}`;
-            // TODO Change btn
-            // card.querySelector("button#prescription-change-button").setAttribute("prescription_id", prescription["id"]);
-            card.querySelector("button#prescription-delete-button").setAttribute("prescription_id", prescription["id"]);
+            });
+        medicationTemplate.remove();
 
-            card.querySelector("button#prescription-delete-button").addEventListener("click", async (e) => {
-                if (!confirm('Are you sure?')) {
-                    return;
-                }
+        card.querySelector(".title").textContent = `prescription du ${date}`;
+        // TODO Change btn
+        // card.querySelector("button#prescription-change-button").setAttribute("prescription_id", prescription["id"]);
+        card.querySelector("button#prescription-delete-button").setAttribute("prescription_id", prescription["id"]);
 
-                const prescription_id = e.currentTarget.getAttribute("prescription_id");
+        card.querySelector("button#prescription-delete-button").addEventListener("click", async (e) => {
+            if (!confirm('Are you sure?')) {
+                return;
+            }
 
-                let reqData = new FormData();
-                reqData.append("prescription_id", prescription_id);
+            const prescription_id = e.currentTarget.getAttribute("prescription_id");
 
-                const response = await fetch("/pharmacy/remove-prescription", {
-                    method: "POST",
-                    body: reqData
-                });
+            let reqData = new FormData();
+            reqData.append("prescription_id", prescription_id);
 
-                const contentType = response.headers.get("Content-Type");
+            const response = await fetch("/pharmacy/remove-prescription", {
+                method: "POST",
+                body: reqData
+            });
 
-                if (!contentType.includes("application/json")) {
-                    console.error(`Unexpected response: expected application/json, got ${contentType}`);
-                    return;
-                }
+            const contentType = response.headers.get("Content-Type");
 
-                const result = await response.json();
-                sessionStorage.setItem(
-                    "flashMessage",
-                    JSON.stringify(result)
-                );
+            if (!contentType.includes("application/json")) {
+                console.error(`Unexpected response: expected application/json, got ${contentType}`);
+                return;
+            }
 
-                location.reload()
-            });
+            const result = await response.json();
+            sessionStorage.setItem(
+                "flashMessage",
+                JSON.stringify(result)
+            );
 
-            // card.querySelector("button#prescription-change-button").addEventListener("click", async (e) => {
-            //     const changeprescriptionPopup = document.querySelector("div.popup#change-prescription-popup");
-            //     changeprescriptionPopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
-            //     changeprescriptionPopup.querySelector(".date").value =
-            //         new Date(prescription["date_traitement"]).toISOString().split("T")[0];
-            //     changeprescriptionPopup.querySelector(".annotation").value = prescription["annotation"] || "";
-
-            //     const medicationContainer = changeprescriptionPopup.querySelector("#medication-extend");
-            //     while (medicationContainer.children.length > 0) {
-            //         medicationContainer.removeChild(medicationContainer.lastElementChild);
-            //     }
-            //     const medicationTemplate = document.querySelector("#medication-template");
-            //     Object.entries(prescription["medicaments"] || {}).forEach(([medication, dose]) => {
-            //         const medCard = medicationTemplate.content.children[0].cloneNode(true);
-            //         medCard.querySelector(".medication").value = medication;
-
-            //         medCard.querySelector(".dose").value = dose;
-            //         medicationContainer.appendChild(medCard);
-            //     });
-
-            //     changeprescriptionPopup.querySelector(".index").setAttribute("value", index);
-
-            //     changeprescriptionPopup.style.display = "block";
-            // });
-
-            prescriptionList.appendChild(card);
-            index++;
+            location.reload()
         });
 
-    } catch (error) {
-        console.error(`AJAX request failed due to: ${error}`);
-        alert("Impossible de récupérer la liste des soins.");
-    }
-}
+        // card.querySelector("button#prescription-change-button").addEventListener("click", async (e) => {
+        //     const changeprescriptionPopup = document.querySelector("div.popup#change-prescription-popup");
+        //     changeprescriptionPopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
+        //     changeprescriptionPopup.querySelector(".date").value =
+        //         new Date(prescription["date_traitement"]).toISOString().split("T")[0];
+        //     changeprescriptionPopup.querySelector(".annotation").value = prescription["annotation"] || "";
 
-async function updateDlc() {
-    const dlcList = document.querySelector("#dlc-list");
+        //     const medicationContainer = changeprescriptionPopup.querySelector("#medication-extend");
+        //     while (medicationContainer.children.length > 0) {
+        //         medicationContainer.removeChild(medicationContainer.lastElementChild);
+        //     }
+        //     const medicationTemplate = document.querySelector("#medication-template");
+        //     Object.entries(prescription["medicaments"] || {}).forEach(([medication, dose]) => {
+        //         const medCard = medicationTemplate.content.children[0].cloneNode(true);
+        //         medCard.querySelector(".medication").value = medication;
 
-    try {
-        const response = await fetch(`/pharmacy/get-dlc-left`);
+        //         medCard.querySelector(".dose").value = dose;
+        //         medicationContainer.appendChild(medCard);
+        //     });
 
-        const contentType = response.headers.get("Content-Type");
-        if (!(contentType.includes("application/json"))) {
-            console.error(`list: AJAX request failed: expected application/json response, got ${contentType}`);
-            console.log(await response.text());
-            return;
-        }
+        //     changeprescriptionPopup.querySelector(".index").setAttribute("value", index);
 
-        const result = await response.json();
-        if (!result.success) {
-            console.error(result.message);
-            return;
-        }
+        //     changeprescriptionPopup.style.display = "block";
+        // });
 
-        const dlcs = result.message;
+        prescriptionList.appendChild(card);
+    });
 
-        dlcs.forEach(dlc => {
+    updateMoreButton("prescriptions", page);
+}
 
-            const dlcTemplate = document.querySelector(
-                "#prescription-dlc-template"
-            );
+function appendDlc(page) {
+    const dlcList = document.querySelector("#dlc-list");
 
-            const card = dlcTemplate.content.children[0].cloneNode(true);
+    page.items.forEach(dlc => {
 
-            const date = new Date(dlc["date_prescription"]).toLocaleDateString("fr-FR", {
-                day: "2-digit",
-                month: "short",
-                year: "numeric"
-            })
+        const dlcTemplate = document.querySelector(
+            "#prescription-dlc-template"
+        );
 
-            const medicationList =
-                card.querySelector(
-                    ".medication-list"
-                );
+        const card = dlcTemplate.content.children[0].cloneNode(true);
 
-            const medicationTemplate =
-                card.querySelector(".medication-template");
+        const date = new Date(dlc["date_prescription"]).toLocaleDateString("fr-FR", {
+            day: "2-digit",
+            month: "short",
+            year: "numeric"
+        })
 
-            Object.entries(dlc["prescription"] || {})
-                .forEach(([medication, dose]) => {
+        const medicationList =
+            card.querySelector(
+                ".medication-list"
+            );
 
-                    const medCard =
-                        medicationTemplate.content.children[0].cloneNode(true);
+        const medicationTemplate =
+            card.querySelector(".medication-template");
 
-                    medCard.querySelector(".medication").textContent =
-                        medication + ":";
+        Object.entries(dlc["prescription"] || {})
+            .forEach(([medication, dose]) => {
 
-                    medCard.querySelector(".dose").textContent =
-                        dose;
+                const medCard =
+                    medicationTemplate.content.children[0].cloneNode(true);
 
-                    medicationList.appendChild(medCard);
+                medCard.querySelector(".medication").textContent =
+                    medication + ":";
 
-                });
-            medicationTemplate.remove();
+                medCard.querySelector(".dose").textContent =
+                    dose;
 
-            card.querySelector(".title").textContent = `sortie pour dlc du ${date}`;
-            // TODO Change btn
-            // card.querySelector("button#prescription-change-button").setAttribute("prescription_id", dlc["id"]);
-            card.querySelector("button#prescription-delete-button").setAttribute("prescription_id", dlc["id"]);
+                medicationList.appendChild(medCard);
 
-            card.querySelector("button#prescription-delete-button").addEventListener("click", async (e) => {
-                if (!confirm('Are you sure?')) {
-                    return;
-                }
+            });
+        medicationTemplate.remove();
 
-                const prescription_id = e.currentTarget.getAttribute("prescription_id");
+        card.querySelector(".title").textContent = `sortie pour dlc du ${date}`;
+        // TODO Change btn
+        // card.querySelector("button#prescription-change-button").setAttribute("prescription_id", dlc["id"]);
+        card.querySelector("button#prescription-delete-button").setAttribute("prescription_id", dlc["id"]);
 
-                let reqData = new FormData();
-                reqData.append("index", index);
+        card.querySelector("button#prescription-delete-button").addEventListener("click", async (e) => {
+            if (!confirm('Are you sure?')) {
+                return;
+            }
 
-                const response = await fetch("/cow/remove_prescription", {
-                    method: "POST",
-                    body: reqData
-                });
-                // TODO
+            const prescription_id = e.currentTarget.getAttribute("prescription_id");
 
-                const contentType = response.headers.get("Content-Type");
+            let reqData = new FormData();
+            reqData.append("prescription_id", prescription_id);
 
-                if (!contentType.includes("application/json")) {
-                    console.error(`Unexpected response: expected application/json, got ${contentType}`);
-                    return;
-                }
+            const response = await fetch("/pharmacy/remove-prescription", {
+                method: "POST",
+                body: reqData
+            });
 
-                const result = await response.json();
-                sessionStorage.setItem(
-                    "flashMessage",
-                    JSON.stringify(result)
-                );
+            const contentType = response.headers.get("Content-Type");
 
-                location.reload()
-            });
+            if (!contentType.includes("application/json")) {
+                console.error(`Unexpected response: expected application/json, got ${contentType}`);
+                return;
+            }
 
-            // card.querySelector("button#prescription-change-button").addEventListener("click", async (e) => {
-            //     const changeprescriptionPopup = document.querySelector("div.popup#change-prescription-popup");
-            //     changeprescriptionPopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
-            //     changeprescriptionPopup.querySelector(".date").value =
-            //         new Date(prescription["date_traitement"]).toISOString().split("T")[0];
-            //     changeprescriptionPopup.querySelector(".annotation").value = prescription["annotation"] || "";
-
-            //     const medicationContainer = changeprescriptionPopup.querySelector("#medication-extend");
-            //     while (medicationContainer.children.length > 0) {
-            //         medicationContainer.removeChild(medicationContainer.lastElementChild);
-            //     }
-            //     const medicationTemplate = document.querySelector("#medication-template");
-            //     Object.entries(prescription["medicaments"] || {}).forEach(([medication, dose]) => {
-            //         const medCard = medicationTemplate.content.children[0].cloneNode(true);
-            //         medCard.querySelector(".medication").value = medication;
-
-            //         medCard.querySelector(".dose").value = dose;
-            //         medicationContainer.appendChild(medCard);
-            //     });
-
-            //     changeprescriptionPopup.querySelector(".index").setAttribute("value", index);
-
-            //     changeprescriptionPopup.style.display = "block";
-            // });
-            // TODO Change btn
-            dlcList.appendChild(card);
+            const result = await response.json();
+            sessionStorage.setItem(
+                "flashMessage",
+                JSON.stringify(result)
+            );
+
+            location.reload()
         });
 
-    } catch (error) {
-        console.error(`AJAX request failed due to: ${error}`);
-        alert("Impossible de récupérer la liste des sortie pour dlc.");
-    }
+        // card.querySelector("button#prescription-change-button").addEventListener("click", async (e) => {
+        //     const changeprescriptionPopup = document.querySelector("div.popup#change-prescription-popup");
+        //     changeprescriptionPopup.querySelector(".popup-title").textContent = `Modifier les soins du ${date}`;
+        //     changeprescriptionPopup.querySelector(".date").value =
+        //         new Date(prescription["date_traitement"]).toISOString().split("T")[0];
+        //     changeprescriptionPopup.querySelector(".annotation").value = prescription["annotation"] || "";
+
+        //     const medicationContainer = changeprescriptionPopup.querySelector("#medication-extend");
+        //     while (medicationContainer.children.length > 0) {
+        //         medicationContainer.removeChild(medicationContainer.lastElementChild);
+        //     }
+        //     const medicationTemplate = document.querySelector("#medication-template");
+        //     Object.entries(prescription["medicaments"] || {}).forEach(([medication, dose]) => {
+        //         const medCard = medicationTemplate.content.children[0].cloneNode(true);
+        //         medCard.querySelector(".medication").value = medication;
+
+        //         medCard.querySelector(".dose").value = dose;
+        //         medicationContainer.appendChild(medCard);
+        //     });
+
+        //     changeprescriptionPopup.querySelector(".index").setAttribute("value", index);
+
+        //     changeprescriptionPopup.style.display = "block";
+        // });
+        // TODO Change btn
+        dlcList.appendChild(card);
+    });
+
+    updateMoreButton("dlc", page);
 }
\ No newline at end of file
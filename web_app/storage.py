@@ -0,0 +1,206 @@
+import copy
+import logging as lg
+import random
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable
+
+from flask import current_app
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import db
+
+# Pragmas appliqués à chaque connexion SQLite du profil de production
+DEFAULT_SQLITE_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # en Kio lorsque négatif : 64 Mo
+    "mmap_size": 268435456,  # 256 Mo
+    "foreign_keys": "ON",
+    "auto_vacuum": "INCREMENTAL",  # effectif sur une base neuve seulement
+    "temp_store": "MEMORY",
+}
+
+_lock_retries: int = 5
+_retry_base_delay: float = 0.05
+
+
+def apply_sqlite_profile(engine: Engine, pragmas: dict[str, str | int],
+                         busy_timeout_ms: int) -> None:
+    """Applique les pragmas fournis et le délai d'attente sur verrou à chaque
+    nouvelle connexion du moteur SQLite.
+
+    Arguments:
+        * engine (Engine): Moteur SQLAlchemy à configurer
+        * pragmas (dict[str, str | int]): Pragmas à appliquer
+        * busy_timeout_ms (int): Délai d'attente d'un verrou en millisecondes
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def is_lock_error(error: BaseException) -> bool:
+    """Indique si l'erreur est une contention de verrou SQLite."""
+    message = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def retry_on_lock(func: Callable) -> Callable:
+    """Décorateur relançant une unité d'écriture lorsque SQLite signale un
+    verrou ("database is locked").
+
+    La session est annulée (rollback) avant chaque nouvel essai, avec une
+    attente exponentielle aléatoire. Après `SQLITE_LOCK_RETRIES` essais,
+    l'erreur est propagée. La fonction décorée doit relire en base l'état
+    qu'elle modifie, ce que font toutes les fonctions des namespaces *Utils.
+    """
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        for attempt in range(_lock_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e) or attempt == _lock_retries:
+                    raise
+                db.session.rollback()
+                delay = _retry_base_delay * 2 ** attempt * (1 + random.random())
+                lg.warning(f"{func.__qualname__}: database locked, "
+                           f"retry {attempt + 1}/{_lock_retries} in {delay:.2f}s")
+                time.sleep(delay)
+    return wrapper
+
+
+# Tables dont un index unique partiel n'admet qu'une ligne ouverte : une
+# violation signale une insertion concurrente, traitée comme un conflit
+_conflict_tables: tuple[str, ...] = ("stock_alert",)
+
+
+def is_conflict_error(error: BaseException) -> bool:
+    """Indique si l'erreur est un conflit d'écriture concurrente : échec de
+    la vérification de version, ou violation de l'index d'unicité d'une
+    table de `_conflict_tables`."""
+    if isinstance(error, StaleDataError):
+        return True
+    message = str(getattr(error, "orig", error)).lower()
+    return isinstance(error, IntegrityError) and any(
+        table in message for table in _conflict_tables)
+
+
+def retry_on_conflict(func: Callable | None = None, *,
+                      target: Callable[..., Any] | None = None) -> Callable:
+    """Décorateur relançant une unité d'écriture lorsque la vérification de
+    version (compare-and-swap) échoue, c'est-à-dire lorsqu'un autre worker a
+    modifié la même ligne entre la lecture et l'écriture, ou a inséré la ligne
+    ouverte que la fonction allait créer (voir `is_conflict_error`).
+
+    La session est annulée (rollback), ce qui expire les instances chargées :
+    le nouvel essai relit l'état à jour et y réapplique la modification.
+    Après `OPTIMISTIC_LOCK_RETRIES` essais, StaleDataError est propagée.
+
+    Les fonctions qui désignent une entrée d'historique par sa position
+    fournissent `target`, appelée avec leurs arguments et renvoyant l'entrée
+    visée : l'écriture concurrente a pu insérer ou supprimer une entrée, la
+    position désigne alors une autre entrée. Le nouvel essai n'a lieu que si
+    l'entrée relue est celle du premier essai, sinon StaleDataError est
+    propagée.
+
+    Arguments:
+        * func (Callable): Fonction à décorer
+        * target (Callable[..., Any] | None): Lecture de l'entrée visée
+    """
+    if func is None:
+        return lambda func: retry_on_conflict(func, target=target)
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        retries = current_app.config.get("OPTIMISTIC_LOCK_RETRIES", 3)
+        # copie : la fonction décorée modifie l'entrée sur place
+        expected = None if target is None else copy.deepcopy(target(*args, **kwargs))
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except (StaleDataError, IntegrityError) as e:
+                if not is_conflict_error(e):
+                    raise
+                db.session.rollback()
+                if attempt == retries:
+                    lg.error(f"{func.__qualname__}: concurrent update, "
+                             f"giving up after {retries} retries")
+                    raise
+                if target is not None and target(*args, **kwargs) != expected:
+                    lg.error(f"{func.__qualname__}: concurrent update moved the "
+                             f"targeted entry, not retried")
+                    raise
+                lg.warning(f"{func.__qualname__}: concurrent update, "
+                           f"retry {attempt + 1}/{retries}")
+                time.sleep(_retry_base_delay * random.random())
+    return wrapper
+
+
+def run_sqlite_maintenance(engine: Engine, vacuum_pages: int = 1000) -> None:
+    """Met à jour les statistiques du planificateur et restitue une partie
+    des pages libres du fichier.
+
+    Arguments:
+        * engine (Engine): Moteur SQLite concerné
+        * vacuum_pages (int): Nombre maximal de pages libérées par passage
+    """
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        connection.execute(text("PRAGMA optimize"))
+        connection.execute(text(f"PRAGMA incremental_vacuum({int(vacuum_pages)})"))
+        connection.commit()
+    lg.info(f"sqlite maintenance done in {time.perf_counter() - started:.2f}s")
+
+
+def init_sqlite_profile(app: Any) -> None:
+    """Active le profil SQLite de production si la base configurée est une
+    base SQLite et que `SQLITE_PROFILE` le demande.
+
+    Le profil applique les pragmas `SQLITE_PRAGMAS`, le délai
+    `SQLITE_BUSY_TIMEOUT_MS`, et planifie une maintenance (ANALYZE et VACUUM
+    incrémental) au plus une fois par `SQLITE_MAINTENANCE_INTERVAL` secondes
+    pour l'ensemble des workers, grâce à un verrou posé dans le cache partagé.
+    """
+    global _lock_retries
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    if app.config.get("SQLITE_PROFILE", "production") != "production":
+        return
+
+    _lock_retries = app.config.get("SQLITE_LOCK_RETRIES", 5)
+    interval = app.config.get("SQLITE_MAINTENANCE_INTERVAL", 24 * 3600)
+
+    with app.app_context():
+        engine = db.engine
+    apply_sqlite_profile(engine,
+                         app.config.get("SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS),
+                         app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+    if not interval:
+        return
+
+    from .cache import cache
+
+    # Le cache partagé n'est consulté qu'une fois par minute et par processus
+    next_check = [time.monotonic() + 60]
+
+    @app.after_request
+    def schedule_sqlite_maintenance(response: Any) -> Any:
+        if time.monotonic() < next_check[0]:
+            return response
+        next_check[0] = time.monotonic() + 60
+        if cache.backend.add("sqlite:maintenance", b"1", interval):
+            threading.Thread(target=run_sqlite_maintenance, args=(engine,),
+                             daemon=True).start()
+        return response
@@ -0,0 +1,7 @@
+"""Point d'entrée WSGI de production.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+from web_app import create_proxy_app
+
+application = create_proxy_app()